@@ -1,25 +1,20 @@
 # Import necessary modules
-from langchain.chat_models import init_chat_model
+from app.llm.factory import get_chat_model
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from langchain.agents import create_tool_calling_agent
 from langchain.agents import AgentExecutor
 from pydantic import BaseModel
+from app.llm.singleflight import single_flight
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens
 import os
-import getpass
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Access the GOOGLE_API_KEY environment variable
-google_api_key = os.getenv("GOOGLE_API_KEY")
-# Load environment variables
-if not os.environ.get("GOOGLE_API_KEY"):
-    os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
-
 # Initialize the Langchain model
-model = init_chat_model("gemini-2.5-flash-lite", model_provider="google_genai")
+model = get_chat_model("gemini-2.5-flash-lite")
 
 class RecommendationResult(BaseModel):
     recommendations: str
@@ -66,6 +61,7 @@ recommendation_agent_chain = AgentExecutor.from_agent_and_tools(
 )
 
 # Function to get recommendations from the report
+@single_flight("advisor")
 def get_report_recommendations(medical_report: str):
     """
     Takes in the medical report as input and returns expert recommendations.
@@ -76,7 +72,8 @@ def get_report_recommendations(medical_report: str):
     query = f"Provide recommendations based on the following medical report:\n\n{medical_report}"
 
     # Invoke the recommendation agent with the query
-    raw_response = recommendation_agent_chain.invoke({"query": query})
+    with gemini_limiter.lease(estimate_tokens(query)):
+        raw_response = recommendation_agent_chain.invoke({"query": query})
 
     # Check for the raw response to ensure there is no error
     if "output" not in raw_response:
@@ -1,19 +1,16 @@
-from langchain.chat_models import init_chat_model
+from app.llm.factory import get_chat_model
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from langchain.agents import create_tool_calling_agent
 from langchain.agents import AgentExecutor
 from pydantic import BaseModel
+from app.llm.singleflight import single_flight
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens
 from typing import Dict, List, Optional
 import os
-import getpass
-
-# Load environment variables
-if not os.environ.get("GOOGLE_API_KEY"):
-    os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
 
 # Initialize the Langchain model
-model = init_chat_model("gemini-2.5-flash-lite", model_provider="google_genai")
+model = get_chat_model("gemini-2.5-flash-lite")
 
 class DomainEntry(BaseModel):
     level: str
@@ -105,6 +102,7 @@ agent_chain = AgentExecutor.from_agent_and_tools(
 )
 
 # Function to classify the report
+@single_flight("classifier")
 def classify_report(medical_report: str):
     """
     Takes in the medical report as input and returns a classification.
@@ -115,7 +113,8 @@ def classify_report(medical_report: str):
     query = f"Classify the following medical report:\n\n{medical_report}"
 
     # Invoke the agent with the query
-    raw_response = agent_chain.invoke({"query": query})
+    with gemini_limiter.lease(estimate_tokens(query)):
+        raw_response = agent_chain.invoke({"query": query})
 
     # Check for the raw response to ensure there is no error
     if "output" not in raw_response:
@@ -124,6 +123,14 @@ def classify_report(medical_report: str):
     # Parse the response from the agent into the new ClassifierOutput shape
     response = parser.parse(raw_response["output"])
 
+    return build_cleaned_response(response)
+
+
+def build_cleaned_response(response: ClassifierOutput):
+    """
+    Turn a raw ClassifierOutput into the CleanedResponse returned to callers
+    (or a small message dict when no domain could be classified).
+    """
     # Normalize domains: remove entries marked as 'Unclear / Insufficient Data' if present
     cleaned_domains = {k: v for k, v in response.domains.items() if v.level != "Unclear / Insufficient Data"}
 
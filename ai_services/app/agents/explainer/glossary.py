@@ -0,0 +1,162 @@
+# app/agents/explainer/glossary.py
+"""
+Medical glossary for the plain-language explainer.
+
+- A regex built from the glossary vocabulary finds known terms locally.
+- Heuristics (lab row names, acronyms, medical suffixes) propose candidate
+  terms the glossary has not seen yet. The explainer still sends the report
+  to the LLM, with the known terms to skip and the candidates as hints, so
+  its output covers only new terms.
+- The vocabulary is loaded from MongoDB and re-read every
+  GLOSSARY_REFRESH_SECONDS so workers pick up each other's additions.
+"""
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.storage.glossary_mongo import load_glossary, upsert_terms
+from app.tools.clean_normalize import parse_text_to_panels
+
+EXPLAINER_GLOSSARY_ENABLED = os.getenv("EXPLAINER_GLOSSARY_ENABLED", "true").lower() == "true"
+GLOSSARY_REFRESH_SECONDS = float(os.getenv("GLOSSARY_REFRESH_SECONDS", "300"))
+# Candidate hints sent with a report (the LLM reads the whole report anyway)
+GLOSSARY_MAX_CANDIDATES = int(os.getenv("GLOSSARY_MAX_CANDIDATES", "40"))
+
+_ACRONYM = re.compile(r"\b[A-Z][A-Z0-9]{1,5}\b")
+_MEDICAL_WORD = re.compile(
+    r"\b[A-Za-z]+(?:emia|aemia|itis|osis|ology|ectomy|plasty|cytes?|globin|penia|uria|pathy|"
+    r"algia|trophy|megaly|rubin|inine|ides|crit|phils?)\b",
+    re.I,
+)
+# Acronyms that are almost never medical terms in reports
+_NOT_TERMS = {
+    "ID", "NO", "DR", "MR", "MRS", "MS", "AM", "PM", "DOB", "AGE", "SEX", "REF", "PAGE", "TEL",
+    "MG", "DL", "ML", "IU", "UL", "MMOL", "H", "L", "NA", "N/A", "OK", "USA", "UK", "LKR",
+}
+
+
+def canonical(term: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s/+-]", " ", term)).strip().lower()
+
+
+def _line_of(text: str, start: int) -> str:
+    line_start = text.rfind("\n", 0, start) + 1
+    line_end = text.find("\n", start)
+    return text[line_start: line_end if line_end != -1 else len(text)].strip()[:160]
+
+
+def extract_candidates(text: str) -> List[Tuple[str, str]]:
+    """Possible medical terms as (surface form, line it appears in), in report order."""
+    found: Dict[str, Tuple[int, str, str]] = {}
+
+    def add(term: str, start: int) -> None:
+        term = term.strip()
+        key = canonical(term)
+        if len(key) < 2 or term.upper() in _NOT_TERMS or key in found:
+            return
+        found[key] = (start, term, _line_of(text, start))
+
+    for panel in parse_text_to_panels(text):
+        for item in panel.items:
+            add(item.name, max(0, text.lower().find(item.name.lower())))
+    for match in _ACRONYM.finditer(text):
+        add(match.group(0), match.start())
+    for match in _MEDICAL_WORD.finditer(text):
+        add(match.group(0), match.start())
+
+    return [(term, line) for _, term, line in sorted(found.values())]
+
+
+class Glossary:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._pattern: Optional[re.Pattern] = None
+        self._loaded_at = 0.0
+        self._stats = {"lookups": 0, "known_terms": 0, "new_terms": 0, "llm_calls": 0}
+
+    # -----------------------------
+    # Vocabulary
+    # -----------------------------
+    def _rebuild_pattern(self) -> None:
+        forms = sorted(
+            (e["term"] for e in self._entries.values() if e.get("is_term", True)),
+            key=len,
+            reverse=True,
+        )
+        self._pattern = (
+            re.compile(r"(?<![\w])(" + "|".join(re.escape(f) for f in forms) + r")(?![\w])", re.I)
+            if forms else None
+        )
+
+    def _refresh(self) -> None:
+        if time.monotonic() - self._loaded_at < GLOSSARY_REFRESH_SECONDS:
+            return
+        try:
+            rows = load_glossary()
+        except Exception as e:
+            print(f"⚠️ Glossary not reachable, using in-memory terms: {e}")
+            rows = []
+        with self._lock:
+            for row in rows:
+                self._entries[row["_id"]] = row
+            self._rebuild_pattern()
+            self._loaded_at = time.monotonic()
+
+    def known_terms(self, text: str) -> Dict[str, Dict[str, Any]]:
+        """Glossary entries for every known term in text, keyed by canonical term, in order."""
+        self._refresh()
+        with self._lock:
+            pattern = self._pattern
+            entries = self._entries
+        found: Dict[str, Dict[str, Any]] = {}
+        if pattern is not None:
+            for match in pattern.finditer(text):
+                key = canonical(match.group(0))
+                if key in entries and key not in found:
+                    found[key] = entries[key]
+        return found
+
+    def is_known(self, term: str) -> bool:
+        with self._lock:
+            return canonical(term) in self._entries
+
+    def add(self, explanations: Dict[str, str], not_terms: List[str] = (), source: str = "llm") -> None:
+        """Write new explanations (and rejected candidates) to memory and MongoDB."""
+        entries = [
+            {"_id": canonical(term), "term": term, "explanation": text, "is_term": True, "source": source}
+            for term, text in explanations.items() if canonical(term)
+        ] + [
+            {"_id": canonical(term), "term": term, "explanation": None, "is_term": False, "source": source}
+            for term in not_terms if canonical(term)
+        ]
+        if not entries:
+            return
+        with self._lock:
+            for entry in entries:
+                self._entries[entry["_id"]] = entry
+            self._rebuild_pattern()
+        try:
+            upsert_terms(entries)
+        except Exception as e:
+            print(f"⚠️ Could not persist glossary terms: {e}")
+
+    # -----------------------------
+    # Stats
+    # -----------------------------
+    def record(self, **counts: int) -> None:
+        with self._lock:
+            for key, value in counts.items():
+                self._stats[key] += value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["vocabulary"] = sum(1 for e in self._entries.values() if e.get("is_term", True))
+        snapshot["enabled"] = EXPLAINER_GLOSSARY_ENABLED
+        return snapshot
+
+
+# Shared by all explainer calls in this worker
+glossary = Glossary()
@@ -1,23 +1,25 @@
 # app/agents/explainer/plain_language_agent.py
-from langchain.chat_models import init_chat_model
+from app.llm.factory import get_chat_model
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 import os
-import getpass
 from dotenv import load_dotenv
 from pydantic import BaseModel
+from app.llm.singleflight import single_flight
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens, LLMCapacityError
+from app.agents.explainer.glossary import (
+    EXPLAINER_GLOSSARY_ENABLED,
+    GLOSSARY_MAX_CANDIDATES,
+    extract_candidates,
+    glossary,
+)
 from typing import List, Dict
 
 # Load environment variables from the .env file
 load_dotenv()
 
-# Access the GOOGLE_API_KEY environment variable
-if not os.environ.get("GOOGLE_API_KEY"):
-    google_api_key = os.getenv("GOOGLE_API_KEY") or getpass.getpass("Enter API key for Google Gemini: ")
-    os.environ["GOOGLE_API_KEY"] = google_api_key
-
 # Initialize the LangChain model
-model = init_chat_model("gemini-2.5-flash-lite", model_provider="google_genai")
+model = get_chat_model("gemini-2.5-flash-lite")
 
 # Updated Pydantic model to match the actual output format
 class PlainLanguageResult(BaseModel):
@@ -54,26 +56,96 @@ prompt = ChatPromptTemplate.from_messages([
     ("human", "Please explain the medical terminology in this report:\n\n{medical_report}")
 ])
 
+# Explanations for the terms of a report the glossary does not know yet
+class TermExplanations(BaseModel):
+    explanations: Dict[str, str]
+    not_medical: List[str] = []
+
+term_parser = PydanticOutputParser(pydantic_object=TermExplanations)
+
+term_prompt = ChatPromptTemplate.from_messages([
+    ("system",
+     """You are an AI trained to explain complex medical terms in simple language.
+
+     TASK: Find the medical terminology in the report and explain each term that is NOT in the
+     "already explained" list, with a simple, clear, general explanation (1-2 sentences) that does
+     not depend on this patient's values. Do NOT provide diagnoses or interpretations.
+     The "possible terms" list holds words spotted automatically: explain those that are medical
+     terms and put the others (names, places, headings, units) in "not_medical".
+     Use each term as it appears in the report as the key.
+
+     {format_instructions}"""),
+    ("human",
+     "Already explained (skip these):\n{known}\n\n"
+     "Possible terms:\n{candidates}\n\n"
+     "Report:\n{medical_report}")
+])
+
+
+def _explain_new_terms(medical_report: str, known: List[str], candidates: List[str]) -> TermExplanations:
+    messages = term_prompt.format_messages(
+        known="\n".join(f"- {term}" for term in known) or "(none)",
+        candidates="\n".join(f"- {term}" for term in candidates) or "(none)",
+        medical_report=medical_report,
+        format_instructions=term_parser.get_format_instructions()
+    )
+    with gemini_limiter.lease(estimate_tokens(medical_report) + 8 * (len(known) + len(candidates))):
+        response = model.invoke(messages)
+    glossary.record(llm_calls=1)
+    return term_parser.parse(response.content)
+
+
+def _explain_with_glossary(medical_report: str) -> Dict[str, str]:
+    """
+    Known terms come straight from the glossary. The report still goes to
+    the LLM, told to skip those, so terms the local heuristics miss are
+    explained too; its answers are written back to the glossary.
+    """
+    known = glossary.known_terms(medical_report)
+    candidates = [t for t, _ in extract_candidates(medical_report) if not glossary.is_known(t)]
+    glossary.record(lookups=1, known_terms=len(known))
+
+    explanations = {entry["term"]: entry["explanation"] for entry in known.values()}
+    fresh = _explain_new_terms(medical_report, list(explanations), candidates[:GLOSSARY_MAX_CANDIDATES])
+    new = {term: text for term, text in fresh.explanations.items() if term not in explanations}
+    glossary.add(new, fresh.not_medical)
+    glossary.record(new_terms=len(new))
+    explanations.update(new)
+    return explanations
+
+
+def _explain_full(medical_report: str) -> Dict[str, str]:
+    """Original single-call path: the LLM finds and explains every term."""
+    # Format the prompt with the medical report
+    format_instructions = parser.get_format_instructions()
+
+    messages = prompt.format_messages(
+        medical_report=medical_report,
+        format_instructions=format_instructions
+    )
+
+    # Get response from the model
+    with gemini_limiter.lease(estimate_tokens(medical_report)):
+        response = model.invoke(messages)
+
+    # Parse the response
+    parsed_response = parser.parse(response.content)
+
+    return parsed_response.explanation
+
+
+@single_flight("explainer")
 def process_medical_report(medical_report: str):
     """
     Takes in the medical report as input and returns explanations for medical terms.
+    Terms already in the medical glossary are answered without the LLM.
     """
     try:
-        # Format the prompt with the medical report
-        format_instructions = parser.get_format_instructions()
-        
-        messages = prompt.format_messages(
-            medical_report=medical_report,
-            format_instructions=format_instructions
-        )
-        
-        # Get response from the model
-        response = model.invoke(messages)
-        
-        # Parse the response
-        parsed_response = parser.parse(response.content)
-        
-        return parsed_response.explanation
-        
+        if EXPLAINER_GLOSSARY_ENABLED:
+            return _explain_with_glossary(medical_report)
+        return _explain_full(medical_report)
+
+    except LLMCapacityError:
+        raise
     except Exception as e:
         raise ValueError(f"Error processing medical report: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,121 @@
+# app/agents/fused/fused_agent.py
+import os
+from app.llm.factory import get_chat_model
+from langchain.prompts import ChatPromptTemplate
+from langchain.output_parsers import PydanticOutputParser
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Sequence
+from app.llm.singleflight import single_flight
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens
+from app.agents.classifier.classifier import ClassifierOutput, build_cleaned_response
+
+# Initialize the Langchain model
+model = get_chat_model("gemini-2.5-flash-lite")
+
+# Routes use fused mode only when asked to, unless this is switched on
+FUSED_ANALYSIS_DEFAULT = os.getenv("FUSED_ANALYSIS_DEFAULT", "false").lower() == "true"
+
+
+# Combined output of every chain agent; fields for tasks that were not requested stay empty
+class FusedAnalysisOutput(BaseModel):
+    cleaned_text: Optional[str] = None
+    summary: Optional[str] = None
+    sources: List[str] = []
+    tools_used: List[str] = []
+    classification: Optional[ClassifierOutput] = None
+    explanations: Dict[str, str] = {}
+    recommendations: Optional[str] = None
+    toned_recommendations: Optional[str] = None
+    translation: Optional[str] = None
+
+# Initialize Pydantic parser
+parser = PydanticOutputParser(pydantic_object=FusedAnalysisOutput)
+
+# One instruction per task, condensed from the single-agent prompts
+TASK_INSTRUCTIONS = {
+    "cleaned_text": (
+        "cleaned_text: the full report text with numerical values and units standardized. "
+        "Indicate any unit conversion (e.g. 'Cholesterol: 5.94 mmol/L (converted from 230 mg/dL)') "
+        "and do not remove or alter any information."
+    ),
+    "summary": (
+        "summary: a clear, concise, factual summary of the key details (diagnoses, procedures, findings). "
+        "Do not add information or give advice; mention missing or ambiguous parts. "
+        "Fill sources and tools_used as lists."
+    ),
+    "classification": (
+        "classification: overall_classification (Healthy, Mild Condition, Moderate Condition, Severe Condition "
+        "or Unclear/Insufficient Data); domains mapping each health domain supported by the data "
+        "(Diabetes/Glucose Control, Cholesterol / Lipid Profile, Blood Pressure / Hypertension, Weight / BMI, "
+        "Cardiac Symptoms, Kidney Function, Liver Function, Respiratory Status, Infection / Inflammation, "
+        "Mental Health / Cognition, Cancer / Oncology, Other Notable Conditions) to a level "
+        "(Normal / Controlled, Mildly Abnormal / At Risk, Moderately Abnormal / Needs Management, "
+        "Severely Abnormal / High Risk, Unclear / Insufficient Data) and a short explanation citing report findings; "
+        "and missing_data listing information that would improve confidence."
+    ),
+    "explanations": (
+        "explanations: a dictionary mapping each medical term found in the report to a simple "
+        "1-2 sentence explanation. Do not diagnose or interpret."
+    ),
+    "recommendations": (
+        "recommendations: actionable recommendations and next steps based strictly on the report, "
+        "in clear and accessible language, acknowledging any gaps in the data."
+    ),
+    "toned_recommendations": (
+        "toned_recommendations: the recommendations rewritten to be calm, empathetic, non-urgent "
+        "and patient-friendly, with technical terms simplified."
+    ),
+    "translation": (
+        "translation: a faithful, fluent Sinhala translation of toned_recommendations "
+        "(or of recommendations when no toned version is requested), adding nothing."
+    ),
+}
+
+prompt = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are an AI trained to analyze medical reports. Perform every task listed below on the provided report "
+     "in a single response. Base everything strictly on the report; do not assume or invent data.\n\n"
+     "Tasks (fill only these fields, leave all others empty):\n{tasks}\n\n"
+     "wrap the output in this format and provide no other text\n{format_instructions}"),
+    ("human", "Analyze the following medical report:\n\n{medical_report}"),
+])
+
+
+def _filled(value: object) -> bool:
+    if isinstance(value, str):
+        return bool(value.strip())
+    return bool(value)
+
+
+@single_flight("fused")
+def run_fused_analysis(medical_report: str, tasks: Sequence[str]) -> FusedAnalysisOutput:
+    """
+    Run several chain agents' tasks in one structured LLM call.
+    `tasks` is a subset of TASK_INSTRUCTIONS keys.
+    """
+    unknown = [t for t in tasks if t not in TASK_INSTRUCTIONS]
+    if unknown:
+        raise ValueError(f"Unknown fused tasks: {unknown}")
+
+    task_lines = "\n".join(f"{i}. {TASK_INSTRUCTIONS[t]}" for i, t in enumerate(tasks, start=1))
+    messages = prompt.format_messages(
+        tasks=task_lines,
+        medical_report=medical_report,
+        format_instructions=parser.get_format_instructions(),
+    )
+
+    with gemini_limiter.lease(estimate_tokens(medical_report)):
+        response = model.invoke(messages)
+    result = parser.parse(response.content)
+
+    # Empty strings, dicts (explanations) and whitespace-only text all count as skipped
+    missing = [t for t in tasks if not _filled(getattr(result, t))]
+    if missing:
+        raise ValueError(f"Fused analysis did not return: {missing}")
+    return result
+
+
+def classification_payload(result: FusedAnalysisOutput) -> dict:
+    """Split the classification part into the same shape classify_report returns."""
+    cleaned = build_cleaned_response(result.classification)
+    return cleaned.model_dump() if hasattr(cleaned, "model_dump") else cleaned
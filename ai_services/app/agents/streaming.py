@@ -0,0 +1,43 @@
+# app/agents/streaming.py
+from typing import Any, AsyncIterator, Dict, Tuple, Type
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens
+
+
+async def astream_field(
+    prompt: Runnable,
+    model: Runnable,
+    inputs: Dict[str, Any],
+    output_model: Type[BaseModel],
+    field: str,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Stream a structured agent call token by token.
+
+    The model is prompted with the agent's usual prompt (format instructions
+    included), and the JSON it writes is parsed incrementally. Yields:
+      ("token", str)      new text appended to `field` since the last event
+      ("final", model)    the validated output_model instance at the end
+    """
+    chain = prompt | model | JsonOutputParser(pydantic_object=output_model)
+
+    sent = ""
+    last: Dict[str, Any] = {}
+    # The lease is held for the whole stream and released if the consumer stops early
+    async with gemini_limiter.alease(estimate_tokens(" ".join(str(v) for v in inputs.values()))):
+        async for partial in chain.astream(inputs):
+            if not isinstance(partial, dict):
+                continue
+            last = partial
+            value = partial.get(field)
+            if not isinstance(value, str) or value == sent:
+                continue
+            # Partial JSON only ever grows, but fall back to resending if it doesn't
+            delta = value[len(sent):] if value.startswith(sent) else value
+            sent = value
+            if delta:
+                yield "token", delta
+
+    yield "final", output_model.model_validate(last)
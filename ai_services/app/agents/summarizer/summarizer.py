@@ -1,19 +1,25 @@
 # app/agents/summarizer/summarizer.py
 import os
-import getpass
-from langchain.chat_models import init_chat_model
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from cachetools import LRUCache
+from app.llm.factory import get_chat_model
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from langchain.agents import create_tool_calling_agent
 from langchain.agents import AgentExecutor
+from langchain_core.output_parsers import StrOutputParser
 from pydantic import BaseModel
-
-# Load environment variables
-if not os.environ.get("GOOGLE_API_KEY"):
-    os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
+from app.llm.singleflight import single_flight
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens
+from app.normalizer.deterministic import detect_sections
+from app.agents.streaming import astream_field
 
 # Initialize the Langchain model
-model = init_chat_model("gemini-2.5-flash-lite", model_provider="google_genai")
+model = get_chat_model("gemini-2.5-flash-lite")
 
 class SummarizationOutput(BaseModel):
     summary: str
@@ -61,18 +67,150 @@ agent_chain = AgentExecutor.from_agent_and_tools(
     verbose=True,
 )
 
+# -----------------------------
+# Long-document (map-reduce) mode
+# -----------------------------
+# Reports above this estimated token count are summarized section by section
+LONG_DOC_TOKEN_THRESHOLD = int(os.getenv("SUMMARIZER_LONG_DOC_TOKENS", "6000"))
+# Sections larger than this are cut into line groups before the map step
+SECTION_TOKEN_TARGET = int(os.getenv("SUMMARIZER_SECTION_TOKENS", "2500"))
+MAP_CONCURRENCY = int(os.getenv("SUMMARIZER_MAP_CONCURRENCY", "4"))
+SECTION_CACHE_SIZE = int(os.getenv("SUMMARIZER_SECTION_CACHE_SIZE", "512"))
+
+# Prompt for the map step: one section in, short factual notes out
+section_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system",
+         "You are an AI trained to summarize one section of a longer medical report. "
+         "Write short, factual notes covering every diagnosis, procedure, finding and test value in the section. "
+         "Do not add information that is not in the text, do not give advice, and note anything that is unclear or missing. "
+         "Return plain text notes only."),
+        ("human", "Section: {section_name}\n\n{section_text}"),
+    ]
+)
+section_chain = section_prompt | model | StrOutputParser()
+
+# Bump when section_prompt changes so cached notes are not reused
+SECTION_PROMPT_VERSION = "1"
+
+_section_cache: LRUCache = LRUCache(maxsize=SECTION_CACHE_SIZE)
+_section_cache_lock = threading.Lock()
+
+
+def is_long_document(medical_report: str) -> bool:
+    """True when the report should be summarized with the map-reduce mode."""
+    return estimate_tokens(medical_report) > LONG_DOC_TOKEN_THRESHOLD
+
+
+def _split_by_size(name: str, text: str) -> List[Tuple[str, str]]:
+    """Cut an oversized section into line groups of roughly SECTION_TOKEN_TARGET tokens."""
+    if estimate_tokens(text) <= SECTION_TOKEN_TARGET:
+        return [(name, text)]
+
+    parts: List[Tuple[str, str]] = []
+    current: List[str] = []
+    size = 0
+    for line in text.splitlines():
+        line_tokens = estimate_tokens(line)
+        if current and size + line_tokens > SECTION_TOKEN_TARGET:
+            parts.append((f"{name} (part {len(parts) + 1})", "\n".join(current)))
+            current, size = [], 0
+        current.append(line)
+        size += line_tokens
+    if current:
+        parts.append((f"{name} (part {len(parts) + 1})", "\n".join(current)))
+    return parts
+
+
+def split_report_sections(medical_report: str) -> List[Tuple[str, str]]:
+    """
+    Split a report into (section_name, text) pairs using detect_sections.
+    Lines not covered by any detected heading are kept in an "other" section
+    so nothing is dropped from the summary.
+    """
+    sections = detect_sections(medical_report)
+
+    covered = set()
+    for text in sections.values():
+        covered.update(line.strip() for line in text.splitlines())
+    leftover = [
+        line for line in medical_report.splitlines()
+        if line.strip() and line.strip() not in covered
+    ]
+    if leftover:
+        sections["other"] = "\n".join(leftover)
+
+    pairs: List[Tuple[str, str]] = []
+    for name, text in sections.items():
+        if text.strip():
+            pairs.extend(_split_by_size(name, text))
+    return pairs
+
+
+def _section_key(section_name: str, section_text: str) -> str:
+    payload = f"{SECTION_PROMPT_VERSION}\n{section_name}\n{section_text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@single_flight("summarizer_section")
+def _summarize_section(section_name: str, section_text: str) -> str:
+    """Map step for one section, cached by section hash."""
+    key = _section_key(section_name, section_text)
+    with _section_cache_lock:
+        cached = _section_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with gemini_limiter.lease(estimate_tokens(section_text)):
+        notes = section_chain.invoke({"section_name": section_name, "section_text": section_text})
+
+    with _section_cache_lock:
+        _section_cache[key] = notes
+    return notes
+
+
+def _summarize_long_report(medical_report: str) -> str:
+    """
+    Run the map step over all sections concurrently and return the
+    per-section notes, ready for the reduce step.
+    """
+    sections = split_report_sections(medical_report)
+    workers = max(1, min(MAP_CONCURRENCY, len(sections)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        notes = list(pool.map(lambda s: _summarize_section(*s), sections))
+
+    return "\n\n".join(
+        f"[{name}]\n{section_notes.strip()}" for (name, _), section_notes in zip(sections, notes)
+    )
+
+
 # Function to summarize the report
-def summarize_report(medical_report: str):
+@single_flight("summarizer")
+def summarize_report(medical_report: str, long_document: Optional[bool] = None):
     """
     Takes in the medical report as input and returns a summary.
     This function sends the medical report to the agent for summarization
     and parses the response.
+
+    Reports above LONG_DOC_TOKEN_THRESHOLD (or when long_document=True) are
+    summarized per section first and the final call only sees the section notes.
     """
+    if long_document is None:
+        long_document = is_long_document(medical_report)
+
     # Prepare the query with the loaded report content
-    query = f"Summarize the following medical report:\n\n{medical_report}"
+    if long_document:
+        section_notes = _summarize_long_report(medical_report)
+        query = (
+            "Summarize the following medical report. It was too long to process at once, "
+            f"so it is given as notes per report section:\n\n{section_notes}"
+        )
+    else:
+        query = f"Summarize the following medical report:\n\n{medical_report}"
 
     # Invoke the agent with the query
-    raw_response = agent_chain.invoke({"query": query})
+    with gemini_limiter.lease(estimate_tokens(query)):
+        raw_response = agent_chain.invoke({"query": query})
 
     # Check for the raw response to ensure there is no error
     if "output" not in raw_response:
@@ -83,3 +221,23 @@ def summarize_report(medical_report: str):
 
     # Return the summary, sources, and tools used
     return response.summary, response.sources, response.tools_used
+
+
+# Streaming variant of summarize_report for SSE endpoints
+async def astream_summary(medical_report: str) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Same prompt as summarize_report, but yields ("token", text) events as the
+    summary is generated and a final ("final", SummarizationOutput) event.
+    Long reports still run the (non-streamed) map step first.
+    """
+    if is_long_document(medical_report):
+        section_notes = await asyncio.to_thread(_summarize_long_report, medical_report)
+        query = (
+            "Summarize the following medical report. It was too long to process at once, "
+            f"so it is given as notes per report section:\n\n{section_notes}"
+        )
+    else:
+        query = f"Summarize the following medical report:\n\n{medical_report}"
+
+    async for event in astream_field(prompt, model, {"query": query}, SummarizationOutput, "summary"):
+        yield event
@@ -1,24 +1,22 @@
 # app/agents/tone_checker_agent.py
-from langchain.chat_models import init_chat_model
+from app.llm.factory import get_chat_model
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from langchain.agents import create_tool_calling_agent
 from langchain.agents import AgentExecutor
 from pydantic import BaseModel
+from app.llm.singleflight import single_flight
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens
+from app.agents.tone_checker.tone_gate import needs_tone_check
+from typing import Any, Dict, Tuple
 import os
-import getpass
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Access the GOOGLE_API_KEY environment variable
-google_api_key = os.getenv("GOOGLE_API_KEY")
-if not google_api_key:
-    os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
-
 # Initialize the Langchain model
-model = init_chat_model("gemini-2.5-flash-lite", model_provider="google_genai")
+model = get_chat_model("gemini-2.5-flash-lite")
 
 class ToneFeedback(BaseModel):
     toned_message: str  # Modify to directly return the toned message
@@ -61,6 +59,7 @@ tone_check_agent_chain = AgentExecutor.from_agent_and_tools(
 )
 
 # Function to get tone-neutralized message
+@single_flight("tone_checker")
 def check_message_tone(message: str) -> str:
     """
     Takes in a message, adjusts its tone to be more patient-friendly, and returns the adjusted message.
@@ -69,7 +68,8 @@ def check_message_tone(message: str) -> str:
     query = f"Please adjust the tone of the following message to be patient-friendly and clear:\n\n{message}"
 
     # Invoke the tone-checking agent with the query
-    raw_response = tone_check_agent_chain.invoke({"query": query})
+    with gemini_limiter.lease(estimate_tokens(query)):
+        raw_response = tone_check_agent_chain.invoke({"query": query})
 
     # Check for the raw response to ensure there is no error
     if "output" not in raw_response:
@@ -80,3 +80,15 @@ def check_message_tone(message: str) -> str:
 
     # Return the toned message (neutralized recommendations)
     return response.toned_message
+
+
+def check_message_tone_gated(message: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    check_message_tone behind the local tone gate. Messages that already
+    score as calm and plain are returned unchanged without an LLM call.
+    Returns (toned message, gate details).
+    """
+    needed, gate = needs_tone_check(message)
+    if not needed:
+        return message, gate
+    return check_message_tone(message), gate
@@ -0,0 +1,130 @@
+# app/agents/tone_checker/tone_gate.py
+"""
+Local tone scoring in front of check_message_tone.
+
+A message gets a score in [0, 1] from three signals:
+
+- urgency: alarming words/phrases per 100 words (lexicon below)
+- jargon: share of words that look like medical terms
+- readability: how far the Flesch reading ease falls below plain English
+
+Messages scoring below TONE_GATE_THRESHOLD are already calm and plain, so
+the tone LLM is skipped and the message is used as is. Tune the threshold
+offline with scripts/tune_tone_gate.py.
+"""
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+TONE_GATE_ENABLED = os.getenv("TONE_GATE_ENABLED", "true").lower() == "true"
+TONE_GATE_THRESHOLD = float(os.getenv("TONE_GATE_THRESHOLD", "0.35"))
+
+# Each signal is scaled to [0, 1] at these levels, then weighted
+URGENCY_PER_100_WORDS_MAX = 2.0
+JARGON_DENSITY_MAX = 0.12
+PLAIN_FLESCH = 60.0
+WEIGHTS = {"urgency": 0.5, "jargon": 0.3, "readability": 0.2}
+
+_URGENCY_TERMS = (
+    "urgent", "urgently", "immediately", "emergency", "critical", "critically", "dangerous",
+    "danger", "severe", "severely", "alarming", "life-threatening", "fatal", "deadly",
+    "serious", "seriously", "must", "asap", "right away", "at once", "warning", "abnormal",
+    "risk of death", "failure", "malignant", "cancer", "tumour", "tumor", "stroke",
+    "heart attack", "do not ignore", "without delay", "high risk",
+)
+_URGENCY = re.compile(r"\b(" + "|".join(re.escape(t) for t in _URGENCY_TERMS) + r")\b", re.I)
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]*")
+_SENTENCE_END = re.compile(r"[.!?]+|\n+")
+_ACRONYM = re.compile(r"^[A-Z][A-Z0-9]{1,5}$")
+_MEDICAL_WORD = re.compile(
+    r"(?:emia|aemia|itis|osis|ology|ectomy|plasty|cytes?|globin|penia|uria|pathy|"
+    r"algia|trophy|megaly|rubin|inine|ides|crit|phils?)$",
+    re.I,
+)
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+
+@dataclass
+class ToneScore:
+    score: float
+    urgency_hits: int
+    jargon_density: float
+    flesch_reading_ease: float
+    words: int
+
+
+def _syllables(word: str) -> int:
+    word = word.lower().strip("'-")
+    count = len(_VOWEL_GROUPS.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee")) and count > 1:
+        count -= 1
+    return max(1, count)
+
+
+def _flesch(words: list, sentences: int) -> float:
+    if not words:
+        return 100.0
+    syllables = sum(_syllables(w) for w in words)
+    return 206.835 - 1.015 * (len(words) / max(1, sentences)) - 84.6 * (syllables / len(words))
+
+
+def score_tone(text: str) -> ToneScore:
+    """Score how much a message needs softening/simplifying (0 = calm and plain)."""
+    words = _WORD.findall(text)
+    if not words:
+        return ToneScore(score=0.0, urgency_hits=0, jargon_density=0.0, flesch_reading_ease=100.0, words=0)
+
+    sentences = len([s for s in _SENTENCE_END.split(text) if _WORD.search(s)])
+    urgency_hits = len(_URGENCY.findall(text))
+    jargon = sum(1 for w in words if _ACRONYM.match(w) or _MEDICAL_WORD.search(w))
+    jargon_density = jargon / len(words)
+    flesch = _flesch(words, sentences)
+
+    parts = {
+        "urgency": min(1.0, (urgency_hits * 100 / len(words)) / URGENCY_PER_100_WORDS_MAX),
+        "jargon": min(1.0, jargon_density / JARGON_DENSITY_MAX),
+        "readability": min(1.0, max(0.0, (PLAIN_FLESCH - flesch) / PLAIN_FLESCH)),
+    }
+    score = sum(WEIGHTS[name] * value for name, value in parts.items())
+    return ToneScore(
+        score=round(score, 4),
+        urgency_hits=urgency_hits,
+        jargon_density=round(jargon_density, 4),
+        flesch_reading_ease=round(flesch, 2),
+        words=len(words),
+    )
+
+
+def needs_tone_check(text: str, threshold: Optional[float] = None) -> Tuple[bool, Dict[str, Any]]:
+    """(whether to call the tone LLM, gate details for processing_steps)."""
+    threshold = TONE_GATE_THRESHOLD if threshold is None else threshold
+    if not TONE_GATE_ENABLED:
+        return True, {"enabled": False}
+    result = score_tone(text)
+    needed = result.score >= threshold
+    record(checked=1, skipped=0 if needed else 1)
+    return needed, {"enabled": True, "threshold": threshold, "skipped_llm": not needed, **asdict(result)}
+
+
+# -----------------------------
+# Stats
+# -----------------------------
+_stats_lock = threading.Lock()
+_stats = {"checked": 0, "skipped": 0}
+
+
+def record(**counts: int) -> None:
+    with _stats_lock:
+        for key, value in counts.items():
+            _stats[key] += value
+
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot["enabled"] = TONE_GATE_ENABLED
+    snapshot["threshold"] = TONE_GATE_THRESHOLD
+    snapshot["skip_rate"] = round(snapshot["skipped"] / snapshot["checked"], 3) if snapshot["checked"] else 0.0
+    return snapshot
@@ -0,0 +1,142 @@
+# app/agents/translator/translation_memory.py
+"""
+Sentence/line-level English→Sinhala translation memory.
+
+Text is split into lines and sentences; numbers inside a segment are
+replaced with [[i]] placeholders so "LDL 160 mg/dL" and "LDL 172 mg/dL"
+share one memory entry. Entries live in the artifact store under the
+translator's segment prompt version.
+"""
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+from app.storage.artifacts_mongo import get_artifacts, put_artifacts
+
+TRANSLATION_MEMORY_ENABLED = os.getenv("TRANSLATION_MEMORY_ENABLED", "true").lower() == "true"
+TM_KIND = "translation_segment"
+
+_SENTENCE_SPLIT = re.compile(r"((?<=[.!?])\s+)(?=[A-Z0-9(\"'])")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_PLACEHOLDER = re.compile(r"\[\[(\d+)\]\]")
+_HAS_LETTERS = re.compile(r"[A-Za-z]")
+# Sentence splits after these are undone ("Dr. Perera", "e.g. LDL")
+_ABBREVIATIONS = ("dr.", "mr.", "mrs.", "ms.", "no.", "vs.", "e.g.", "i.e.", "approx.", "ref.")
+
+
+@dataclass
+class Segment:
+    text: str
+    template: str
+    values: List[str] = field(default_factory=list)
+
+
+def _make_segment(text: str) -> Segment:
+    values: List[str] = []
+
+    def placeholder(match: re.Match) -> str:
+        values.append(match.group(0))
+        return f"[[{len(values) - 1}]]"
+
+    return Segment(text=text, template=_NUMBER.sub(placeholder, text), values=values)
+
+
+def _split_sentences(line: str) -> List[str]:
+    parts = _SENTENCE_SPLIT.split(line)
+    merged: List[str] = [parts[0]]
+    for i in range(1, len(parts), 2):
+        separator, sentence = parts[i], parts[i + 1]
+        if merged[-1].rstrip().lower().endswith(_ABBREVIATIONS):
+            merged[-1] += separator + sentence
+        else:
+            merged.extend([separator, sentence])
+    return merged
+
+
+def segment_text(text: str) -> List[Union[str, Segment]]:
+    """
+    Split text into translatable Segments and verbatim strings (whitespace,
+    separators, lines without letters). Joining all parts, with each Segment
+    replaced by its text, gives back the input exactly.
+    """
+    parts: List[Union[str, Segment]] = []
+    for line_no, line in enumerate(text.split("\n")):
+        if line_no:
+            parts.append("\n")
+        stripped = line.strip()
+        if not _HAS_LETTERS.search(stripped):
+            parts.append(line)
+            continue
+        lead = line[: len(line) - len(line.lstrip())]
+        trail = line[len(line.rstrip()):]
+        if lead:
+            parts.append(lead)
+        for i, piece in enumerate(_split_sentences(stripped)):
+            parts.append(piece if i % 2 or not _HAS_LETTERS.search(piece) else _make_segment(piece))
+        if trail:
+            parts.append(trail)
+    return parts
+
+
+def fill_template(translated_template: str, values: List[str]) -> Optional[str]:
+    """Put numbers back into a translated template; None if placeholders were lost."""
+    found = {int(i) for i in _PLACEHOLDER.findall(translated_template)}
+    if found != set(range(len(values))):
+        return None
+    return _PLACEHOLDER.sub(lambda m: values[int(m.group(1))], translated_template)
+
+
+def placeholders_intact(template: str, translated: str) -> bool:
+    """True when the translation kept every [[i]] placeholder of the source template."""
+    return set(_PLACEHOLDER.findall(template)) == set(_PLACEHOLDER.findall(translated))
+
+
+def reassemble(parts: List[Union[str, Segment]], translations: Dict[str, str]) -> str:
+    """Rebuild the text in order; translations maps segment template → Sinhala template."""
+    out: List[str] = []
+    for part in parts:
+        if isinstance(part, str):
+            out.append(part)
+            continue
+        filled = fill_template(translations[part.template], part.values)
+        if filled is None:
+            raise ValueError(f"Translation lost placeholders for segment: {part.text!r}")
+        out.append(filled)
+    return "".join(out)
+
+
+# -----------------------------
+# Memory store + stats
+# -----------------------------
+_stats_lock = threading.Lock()
+_stats = {"segments": 0, "hits": 0, "misses": 0, "llm_batches": 0, "fallbacks": 0}
+
+
+def record(**counts: int) -> None:
+    with _stats_lock:
+        for key, value in counts.items():
+            _stats[key] += value
+
+
+def stats() -> Dict[str, object]:
+    with _stats_lock:
+        snapshot = dict(_stats)
+    looked_up = snapshot["hits"] + snapshot["misses"]
+    snapshot["enabled"] = TRANSLATION_MEMORY_ENABLED
+    snapshot["hit_rate"] = round(snapshot["hits"] / looked_up, 3) if looked_up else 0.0
+    return snapshot
+
+
+def lookup(templates: List[str], version: str) -> Dict[str, str]:
+    """Return {template: Sinhala template} for the templates already in memory."""
+    found = get_artifacts(TM_KIND, version, templates)
+    return {template: payload["target"] for template, payload in found.items()}
+
+
+def remember(translations: Dict[str, str], version: str) -> None:
+    put_artifacts(
+        TM_KIND,
+        version,
+        {template: {"source": template, "target": target} for template, target in translations.items()},
+    )
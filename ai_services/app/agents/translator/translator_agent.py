@@ -1,25 +1,25 @@
 # app/agents/translator/translator_agent.py
 import os
-import getpass
+import json
+import hashlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
+from app.llm.factory import get_chat_model
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from langchain.agents import create_tool_calling_agent
 from langchain.agents import AgentExecutor
 from pydantic import BaseModel
+from app.llm.singleflight import single_flight
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens
+from app.agents.streaming import astream_field
+from app.agents.translator import translation_memory as tm
 
 # Load environment variables from the .env file
 load_dotenv()
 
-# Access the GOOGLE_API_KEY environment variable
-google_api_key = os.getenv("GOOGLE_API_KEY")
-# Load environment variables
-if not os.environ.get("GOOGLE_API_KEY"):
-    os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
-
 # Initialize the Langchain model
-model = init_chat_model("gemini-2.5-flash-lite", model_provider="google_genai")
+model = get_chat_model("gemini-2.5-flash-lite")
 
 class TranslationResult(BaseModel):
     translation: str
@@ -66,18 +66,104 @@ agent_chain = AgentExecutor.from_agent_and_tools(
 
 AgentExecutor = AgentExecutor(agent=agent, tools=[], verbose=True)
 
+# -----------------------------
+# Segment translation (translation memory misses)
+# -----------------------------
+class SegmentTranslations(BaseModel):
+    translations: List[str]
+
+segment_parser = PydanticOutputParser(pydantic_object=SegmentTranslations)
+
+segment_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system",
+         "You are an AI trained to translate text into Sinhala. You will be given a JSON list of English segments "
+         "(sentences or lines) taken from a medical report. Translate each segment faithfully and fluently into Sinhala.\n\n"
+         "1. Return exactly one translation per segment, in the same order.\n"
+         "2. Keep placeholders such as [[0]] exactly as written; they stand for numbers.\n"
+         "3. Keep units, test abbreviations and reference ranges unchanged.\n"
+         "4. Do not merge, split or drop segments, and do not add any information.\n"
+         """
+            wrap the output in this format and provide no other text\n{format_instructions}
+         """),
+        ("human", "{segments}"),
+    ]
+).partial(format_instructions=segment_parser.get_format_instructions())
+
+# Memory entries are only reused with the prompt that produced them
+SEGMENT_PROMPT_VERSION = hashlib.sha256(
+    "\n".join(m.content for m in segment_prompt.format_messages(segments="")).encode("utf-8")
+).hexdigest()[:12]
+
+
+def _translate_segments(templates: List[str]) -> Optional[Dict[str, str]]:
+    """One LLM call for all missing segments; None if the answer does not line up."""
+    segments = json.dumps(templates, ensure_ascii=False)
+    messages = segment_prompt.format_messages(segments=segments)
+    with gemini_limiter.lease(estimate_tokens(segments)):
+        response = model.invoke(messages)
+    tm.record(llm_batches=1)
+
+    try:
+        translations = segment_parser.parse(response.content).translations
+    except Exception:
+        return None
+    if len(translations) != len(templates):
+        return None
+
+    result = dict(zip(templates, translations))
+    # A translation that dropped a placeholder can't be filled in later
+    if not all(tm.placeholders_intact(t, result[t]) for t in templates):
+        return None
+    return result
+
+
+def _translate_with_memory(medical_report: str) -> Optional[str]:
+    """
+    Translate via the translation memory: known segments are reused and
+    only the misses go to the LLM, in one batch. None means fall back to
+    translating the whole text.
+    """
+    parts = tm.segment_text(medical_report)
+    templates = list(dict.fromkeys(p.template for p in parts if isinstance(p, tm.Segment)))
+    if not templates:
+        return medical_report
+
+    known = tm.lookup(templates, SEGMENT_PROMPT_VERSION)
+    missing = [t for t in templates if t not in known]
+    tm.record(segments=len(templates), hits=len(templates) - len(missing), misses=len(missing))
+
+    if missing:
+        fresh = _translate_segments(missing)
+        if fresh is None:
+            tm.record(fallbacks=1)
+            return None
+        tm.remember(fresh, SEGMENT_PROMPT_VERSION)
+        known.update(fresh)
+
+    return tm.reassemble(parts, known)
+
+
 # Function to summarize the report
+@single_flight("translator")
 def translate_report(medical_report: str):
     """
     Takes in the medical report as input and returns a translation.
-    This function sends the medical report to the agent for translation
-    and parses the response.
+    Segments already in the translation memory are reused; the rest are
+    translated in one batched call. If that batch can't be lined up with
+    the input, the whole text is sent to the agent as before.
     """
+    if tm.TRANSLATION_MEMORY_ENABLED:
+        translation = _translate_with_memory(medical_report)
+        if translation is not None:
+            return translation
+
     # Prepare the query with the loaded report content
     query = f"Translate the following medical report:\n\n{medical_report}"
 
     # Invoke the agent with the query
-    raw_response = agent_chain.invoke({"query": query})
+    with gemini_limiter.lease(estimate_tokens(query)):
+        raw_response = agent_chain.invoke({"query": query})
 
     # Check for the raw response to ensure there is no error
     if "output" not in raw_response:
@@ -87,4 +173,16 @@ def translate_report(medical_report: str):
     response = parser.parse(raw_response["output"])
 
     # Return the summary, sources, and tools used
-    return response.translation
\ No newline at end of file
+    return response.translation
+
+
+# Streaming variant of translate_report for SSE endpoints
+async def astream_translation(medical_report: str) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Same prompt as translate_report, but yields ("token", text) events as the
+    Sinhala translation is generated and a final ("final", TranslationResult) event.
+    """
+    query = f"Translate the following medical report:\n\n{medical_report}"
+
+    async for event in astream_field(prompt, model, {"query": query}, TranslationResult, "translation"):
+        yield event
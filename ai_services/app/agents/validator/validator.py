@@ -1,19 +1,18 @@
 import os
-import getpass
-from langchain.chat_models import init_chat_model
+import hashlib
+from app.llm.factory import get_chat_model
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from langchain.agents import create_tool_calling_agent
 from langchain.agents import AgentExecutor
 from pydantic import BaseModel
-from typing import Dict, List
-
-# Load environment variables
-if not os.environ.get("GOOGLE_API_KEY"):
-    os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
+from app.llm.singleflight import single_flight
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens
+from app.storage.artifacts_mongo import get_artifact, put_artifact, tag_artifact
+from typing import Optional, Tuple
 
 # Initialize the Langchain model
-model = init_chat_model("gemini-2.5-flash-lite", model_provider="google_genai")
+model = get_chat_model("gemini-2.5-flash-lite")
 
 # Define the output model (cleaned text)
 class CleanedTextOutput(BaseModel):
@@ -41,6 +40,15 @@ prompt = ChatPromptTemplate.from_messages(
     ]
 ).partial(format_instructions=parser.get_format_instructions())
 
+# Validated text is stored as an artifact under this version; it changes
+# whenever the prompt (including format instructions) changes
+ARTIFACT_KIND = "validated_text"
+PROMPT_VERSION = os.getenv("VALIDATOR_PROMPT_VERSION") or hashlib.sha256(
+    "\n".join(
+        m.content for m in prompt.format_messages(query="", chat_history=[], agent_scratchpad=[])
+    ).encode("utf-8")
+).hexdigest()[:12]
+
 # Create the agent
 llm = model
 agent = create_tool_calling_agent(
@@ -57,6 +65,7 @@ agent_chain = AgentExecutor.from_agent_and_tools(
 )
 
 # Function to clean and preprocess the report (validation agent)
+@single_flight("validator")
 def validate_report(medical_report: str) -> CleanedTextOutput:
     """
     Takes in the raw medical report, cleans and standardizes values and units,
@@ -66,7 +75,8 @@ def validate_report(medical_report: str) -> CleanedTextOutput:
     query = f"Clean and preprocess the following medical report:\n\n{medical_report}"
 
     # Invoke the agent with the query
-    raw_response = agent_chain.invoke({"query": query})
+    with gemini_limiter.lease(estimate_tokens(query)):
+        raw_response = agent_chain.invoke({"query": query})
 
     # Check for the raw response to ensure there is no error
     if "output" not in raw_response:
@@ -76,4 +86,31 @@ def validate_report(medical_report: str) -> CleanedTextOutput:
     response = parser.parse(raw_response["output"])
 
     # Return the cleaned version of the medical report text
-    return response
\ No newline at end of file
+    return response
+
+
+def get_validated_report(medical_report: Optional[str] = None, case_id: Optional[str] = None) -> Optional[CleanedTextOutput]:
+    """Return the stored validated text for this report text (or case), if any."""
+    cached = get_artifact(ARTIFACT_KIND, PROMPT_VERSION, text=medical_report, case_id=case_id)
+    return CleanedTextOutput(**cached) if cached is not None else None
+
+
+def store_validated_report(medical_report: str, result: CleanedTextOutput, case_id: Optional[str] = None) -> None:
+    put_artifact(ARTIFACT_KIND, PROMPT_VERSION, medical_report, result.model_dump(), case_id=case_id)
+
+
+def validate_report_cached(medical_report: str, case_id: Optional[str] = None) -> Tuple[CleanedTextOutput, bool]:
+    """
+    validate_report, reusing the stored artifact when the same text was
+    already validated with the current prompt. Returns (result, cache_hit).
+    """
+    cached = get_validated_report(medical_report)
+    if cached is not None:
+        if case_id:
+            # Same text seen under another case (or none): make it findable by this case_id too
+            tag_artifact(ARTIFACT_KIND, PROMPT_VERSION, medical_report, case_id)
+        return cached, True
+
+    result = validate_report(medical_report)
+    store_validated_report(medical_report, result, case_id=case_id)
+    return result, False
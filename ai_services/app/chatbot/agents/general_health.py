@@ -1,5 +1,6 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from app.llm.factory import get_chat_model
+from app.llm.rate_limiter import LLMCapacityError, gemini_limiter, estimate_tokens
 
 class GeneralHealthAgent:
     """
@@ -8,9 +9,8 @@ class GeneralHealthAgent:
     """
 
     def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model=os.getenv("LLM_FALLBACK_MODEL", "gemini-1.5-flash"),
-            api_key=os.getenv("GOOGLE_API_KEY"),
+        self.llm = get_chat_model(
+            os.getenv("LLM_FALLBACK_MODEL", "gemini-1.5-flash"),
             temperature=0.5,   # slightly higher for richer responses
         )
 
@@ -25,8 +25,11 @@ class GeneralHealthAgent:
             f"Question: {query}"
         )
         try:
-            resp = self.llm.invoke(prompt)
+            with gemini_limiter.lease(estimate_tokens(prompt)):
+                resp = self.llm.invoke(prompt)
             state["response"] = resp.content
+        except LLMCapacityError:
+            raise
         except Exception as e:
             state["response"] = f"⚠️ General health answer unavailable ({e})"
         return state
@@ -1,7 +1,8 @@
 # ai_services/app/chatbot/agents/intent.py
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from app.llm.factory import get_chat_model
 from langchain_core.prompts import ChatPromptTemplate
+from app.llm.rate_limiter import LLMCapacityError, gemini_limiter, estimate_tokens
 
 class IntentClassifierAgent:
     """
@@ -11,9 +12,8 @@ class IntentClassifierAgent:
     """
 
     def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model=os.getenv("LLM_FALLBACK_MODEL", "gemini-1.5-flash"),
-            api_key=os.getenv("GOOGLE_API_KEY"),
+        self.llm = get_chat_model(
+            os.getenv("LLM_FALLBACK_MODEL", "gemini-1.5-flash"),
             temperature=0.0,
         )
         self.prompt = ChatPromptTemplate.from_messages([
@@ -28,10 +28,13 @@ class IntentClassifierAgent:
     def run(self, state: dict) -> dict:
         query = state["query"]
         try:
-            resp = self.llm.invoke(self.prompt.format(query=query))
+            with gemini_limiter.lease(estimate_tokens(query)):
+                resp = self.llm.invoke(self.prompt.format(query=query))
             intent = (resp.content or "").strip().lower()
             if intent not in ["report_question", "general_health"]:
                 intent = "report_question"  # fallback
+        except LLMCapacityError:
+            raise
         except Exception:
             intent = "report_question"
         state["intent"] = intent
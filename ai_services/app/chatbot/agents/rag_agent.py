@@ -8,16 +8,13 @@ from app.storage.mongo_client import get_cases_collection
 from app.storage.conversations_mongo import get_conversation_history
 from app.chatbot.utils.case_resolver import resolve_case
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+from app.llm.factory import get_chat_model
 from langchain_core.prompts import ChatPromptTemplate
+from app.llm.rate_limiter import LLMCapacityError, gemini_limiter, estimate_tokens
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    api_key=GOOGLE_API_KEY,
-    temperature=0.2,
-)
+llm = get_chat_model("gemini-1.5-flash", temperature=0.2)
 
 def _load_json_from_blob(blob_path: str) -> Dict[str, Any]:
     try:
@@ -97,7 +94,10 @@ def rag_answer(
 
     # 6️⃣ Call LLM
     try:
-        response = llm.invoke(formatted_prompt)
+        with gemini_limiter.lease(estimate_tokens(formatted_prompt)):
+            response = llm.invoke(formatted_prompt)
         return response.content, {"short_term": [formatted_history], "long_term": []}, case_ids
+    except LLMCapacityError:
+        raise
     except Exception as e:
         return f"⚠️ RAG error: {e}", {}, case_ids
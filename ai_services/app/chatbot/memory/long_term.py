@@ -4,6 +4,7 @@ from typing import List
 from datetime import datetime
 from app.storage.qdrant_client import qdrant_client, embeddings, get_or_create_collection
 from qdrant_client.http import models as qmodels
+from app.vector.collection import search_params
 
 class LongTermMemory:
     COLLECTION = "conversation_memory"
@@ -13,7 +14,7 @@ class LongTermMemory:
 
     def save_summary(self, user_id: str, case_id: str, summary: str, max_summaries: int = 20) -> None:
         """Save a summary and silently cleanup older ones beyond `max_summaries`."""
-        vector = embeddings.embed_query(summary)
+        vector = embeddings.embed_documents([summary])[0]
 
         qdrant_client.upsert(
             collection_name=self.COLLECTION,
@@ -56,7 +57,8 @@ class LongTermMemory:
             collection_name=self.COLLECTION,
             query_vector=vector,
             limit=top_k,
-            query_filter=query_filter
+            query_filter=query_filter,
+            search_params=search_params()
         )
         return [r.payload["summary"] for r in results]
 
@@ -3,12 +3,14 @@ from fastapi import APIRouter, HTTPException, Header
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from datetime import datetime, timezone
+import asyncio
 import uuid
 
 from app.chatbot.orchestrator.graph import build_chatbot_graph, inject_memory
 from app.chatbot.utils.intent_classifier import classify_intent
 from app.storage.conversations_mongo import save_conversation
 from app.storage.mongo_client import get_cases_collection
+from app.llm.rate_limiter import LLMCapacityError
 
 router = APIRouter(prefix="/rag", tags=["chatbot-rag"])
 
@@ -87,15 +89,17 @@ async def rag_chat(
             "user_id": x_user_id,
             "case_id": payload.case_id,
         }
-        state = inject_memory(state)
+        # Blocking pipeline (Qdrant, Mongo, LLM leases that may queue for
+        # capacity) runs off the event loop
+        state = await asyncio.to_thread(inject_memory, state)
 
-        final_state = chatbot_graph.invoke(state)
+        final_state = await asyncio.to_thread(chatbot_graph.invoke, state)
 
         answer = final_state.get("response", "⚠️ No answer generated.")
         case_ids = final_state.get("case_ids", [])
 
         # Save conversation turn
-        save_conversation({
+        await asyncio.to_thread(save_conversation, {
             "_id": str(uuid.uuid4()),
             "user_id": x_user_id,
             "case_ids": case_ids,
@@ -114,5 +118,7 @@ async def rag_chat(
             }
         }
 
+    except LLMCapacityError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RAG pipeline error: {str(e)}")
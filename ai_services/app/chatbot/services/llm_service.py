@@ -1,15 +1,21 @@
 # app/chatbot/services/llm_service.py
-from langchain_google_genai import ChatGoogleGenerativeAI
 import os
+from app.llm.factory import get_chat_model
+from app.llm.singleflight import SINGLE_FLIGHT_ENABLED, flights, input_hash
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens
 
 class LLMService:
     def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model=os.getenv("LLM_MODEL", "gemini-1.5-flash"),
-            api_key=os.getenv("GOOGLE_API_KEY"),
-            temperature=0.2,
-        )
+        self.model_name = os.getenv("LLM_MODEL", "gemini-1.5-flash")
+        self.llm = get_chat_model(self.model_name, temperature=0.2)
 
     def ask(self, prompt: str) -> str:
-        resp = self.llm.invoke(prompt)
+        # Identical prompts in flight at the same time share one Gemini call
+        if not SINGLE_FLIGHT_ENABLED:
+            return self._ask(prompt)
+        return flights.do("llm_service", input_hash(self.model_name, prompt), self._ask, prompt)
+
+    def _ask(self, prompt: str) -> str:
+        with gemini_limiter.lease(estimate_tokens(prompt)):
+            resp = self.llm.invoke(prompt)
         return resp.content if hasattr(resp, "content") else str(resp)
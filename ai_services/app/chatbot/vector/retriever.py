@@ -2,6 +2,7 @@
 from typing import Dict, Any, List
 from app.storage.qdrant_client import get_qdrant_vectorstore, qdrant_client, embeddings
 from qdrant_client.http import models as qmodels
+from app.vector.collection import search_params
 
 def retrieve_chunks(query: str, case_id: str, user_id: str, top_k: int = 5) -> Dict[str, Any]:
     """Retrieve semantically relevant chunks from Qdrant for a user (optionally filtered by case)."""
@@ -38,7 +39,8 @@ def retrieve_chunks(query: str, case_id: str, user_id: str, top_k: int = 5) -> D
         collection_name=collection_name,
         query_vector=query_vector,
         limit=top_k,
-        query_filter=query_filter
+        query_filter=query_filter,
+        search_params=search_params()
     )
 
     # Convert to simple dict list
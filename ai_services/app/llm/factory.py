@@ -0,0 +1,26 @@
+# app/llm/factory.py
+"""
+Single place where chat models are created.
+
+LLM_BACKEND=gemini (default) returns the Google GenAI chat model;
+LLM_BACKEND=fake returns the offline FakeChatModel, so the service runs
+without an API key (see scripts/loadgen.py).
+"""
+import os
+import getpass
+from langchain.chat_models import init_chat_model
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+
+
+def get_chat_model(model: str = "gemini-2.5-flash-lite", **kwargs):
+    """Return a chat model for `model`; kwargs (e.g. temperature) go to the provider."""
+    if LLM_BACKEND == "fake":
+        from app.llm.fake import FakeChatModel
+        return FakeChatModel(model_name=f"fake-{model}")
+
+    # Load environment variables
+    if not os.environ.get("GOOGLE_API_KEY"):
+        os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
+
+    return init_chat_model(model, model_provider="google_genai", **kwargs)
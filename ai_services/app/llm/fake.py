@@ -0,0 +1,266 @@
+# app/llm/fake.py
+"""
+Offline stand-in for Gemini, selected with LLM_BACKEND=fake.
+
+- Structured prompts (PydanticOutputParser format instructions) get JSON that
+  validates against the schema embedded in the instructions, so every agent
+  parses its output as usual.
+- Plain prompts get a deterministic paragraph; the chatbot intent prompt gets
+  a valid intent name.
+- Content depends only on the prompt and FAKE_LLM_SEED. Latency and injected
+  429s come from one seeded RNG, so a run with the same request order is
+  reproducible.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.utils.tokens import estimate_tokens
+
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "42"))
+# Latency is lognormal around the median, plus a per-output-token cost
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "800"))
+FAKE_LLM_LATENCY_SIGMA = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.35"))
+FAKE_LLM_MS_PER_TOKEN = float(os.getenv("FAKE_LLM_MS_PER_TOKEN", "2"))
+# Rough size of each response, shared across the schema's string fields
+FAKE_LLM_OUTPUT_TOKENS = int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "300"))
+# Fraction of calls that fail like a Gemini quota error
+FAKE_LLM_429_RATE = float(os.getenv("FAKE_LLM_429_RATE", "0"))
+
+_SCHEMA_BLOCK = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.S)
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9/%.-]{2,}")
+_FILLER = (
+    "the report shows values within the listed reference ranges and no further "
+    "findings are noted please discuss these results with your doctor"
+).split()
+
+_rng_lock = threading.Lock()
+_rng = random.Random(FAKE_LLM_SEED)
+
+
+class FakeRateLimitError(RuntimeError):
+    """Injected 429; status_code makes the limiter's is_rate_limit_error() handle it like Gemini's."""
+    status_code = 429
+
+
+def _content(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else json.dumps(message.content)
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(_content(m) for m in messages)
+
+
+def _human_text(messages: List[BaseMessage]) -> str:
+    """Text of the last user turn (prompts formatted to one string keep a 'Human:' prefix)."""
+    humans = [_content(m) for m in messages if m.type == "human"]
+    return (humans[-1] if humans else _prompt_text(messages)).rsplit("Human:", 1)[-1]
+
+
+def _find_schema(text: str) -> Optional[Dict[str, Any]]:
+    for block in reversed(_SCHEMA_BLOCK.findall(text)):
+        try:
+            schema = json.loads(block)
+        except ValueError:
+            continue
+        if isinstance(schema, dict) and "properties" in schema:
+            return schema
+    return None
+
+
+class _Generator:
+    """Builds schema-valid values from words of the prompt."""
+
+    def __init__(self, schema: Dict[str, Any], words: List[str], rng: random.Random, items: Optional[List[str]] = None):
+        self.defs = schema.get("$defs", schema.get("definitions", {}))
+        self.words = words or _FILLER
+        self.rng = rng
+        # Batched prompts send a JSON list; list fields answer item for item
+        self.items = items
+        self.string_tokens = max(8, FAKE_LLM_OUTPUT_TOKENS // max(1, _count_strings(schema)))
+
+    def _resolve(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        ref = node.get("$ref")
+        if ref:
+            return self.defs[ref.split("/")[-1]]
+        return node
+
+    def text(self, tokens: int) -> str:
+        picked = [self.rng.choice(self.words) for _ in range(max(1, tokens))]
+        return (" ".join(picked).capitalize() + ".")
+
+    def value(self, node: Dict[str, Any], depth: int = 0) -> Any:
+        node = self._resolve(node)
+        if "enum" in node:
+            return node["enum"][0]
+        if "anyOf" in node:
+            options = [o for o in node["anyOf"] if o.get("type") != "null"]
+            return self.value(options[0], depth) if options else None
+        kind = node.get("type", "object" if "properties" in node else "string")
+        if kind == "string":
+            return self.text(self.string_tokens if depth <= 1 else 8)
+        if kind == "integer":
+            return self.rng.randint(0, 100)
+        if kind == "number":
+            return round(self.rng.uniform(0, 100), 2)
+        if kind == "boolean":
+            return True
+        if kind == "array":
+            if self.items is not None and depth == 1:
+                return list(self.items)
+            return [self.value(node.get("items", {}), depth + 1) for _ in range(2)]
+        if kind == "object":
+            if "properties" in node:
+                return {name: self.value(prop, depth + 1) for name, prop in node["properties"].items()}
+            extra = node.get("additionalProperties")
+            if isinstance(extra, dict):
+                keys = sorted({w.title() for w in self.words})[:3] or ["Finding"]
+                return {k: self.value(extra, depth + 1) for k in keys}
+            return {}
+        return None
+
+
+def _count_strings(schema: Dict[str, Any]) -> int:
+    return sum(1 for p in schema.get("properties", {}).values() if p.get("type") == "string") or 1
+
+
+def _json_list(text: str) -> Optional[List[str]]:
+    try:
+        value = json.loads(text.strip())
+    except ValueError:
+        return None
+    return [str(v) for v in value] if isinstance(value, list) else None
+
+
+def _respond(messages: List[BaseMessage]) -> str:
+    text = _prompt_text(messages)
+    human = _human_text(messages)
+    seed = hashlib.sha256(f"{FAKE_LLM_SEED}:{text}".encode("utf-8")).hexdigest()
+    rng = random.Random(seed)
+    words = _WORD.findall(human)[:400]
+
+    schema = _find_schema(text)
+    if schema is not None:
+        return json.dumps(_Generator(schema, words, rng, _json_list(human)).value(schema), ensure_ascii=False)
+
+    if "report_question" in text and "general_health" in text:
+        lowered = human.lower()
+        personal = any(w in lowered for w in ("my ", "report", "result", "level", "value"))
+        return "report_question" if personal else "general_health"
+
+    tokens = FAKE_LLM_OUTPUT_TOKENS
+    picked = [rng.choice(words or _FILLER) for _ in range(tokens)]
+    return " ".join(picked).capitalize() + "."
+
+
+def _draw_latency(output_tokens: int) -> float:
+    with _rng_lock:
+        jitter = _rng.lognormvariate(0.0, FAKE_LLM_LATENCY_SIGMA)
+        throttled = _rng.random() < FAKE_LLM_429_RATE
+    if throttled:
+        raise FakeRateLimitError("429 RESOURCE_EXHAUSTED (fake backend)")
+    return (FAKE_LLM_LATENCY_MS * jitter + FAKE_LLM_MS_PER_TOKEN * output_tokens) / 1000.0
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic, schema-aware chat model for offline runs and load tests."""
+
+    model_name: str = "fake-gemini"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini"
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        # Agents are built with tools=[]; the fake never calls tools
+        return self
+
+    def _message(self, prompt: str, content: str) -> AIMessage:
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(content)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            response_metadata={"model_name": self.model_name},
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = _prompt_text(messages)
+        content = _respond(messages)
+        time.sleep(_draw_latency(estimate_tokens(content)))
+        return ChatResult(generations=[ChatGeneration(message=self._message(prompt, content))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = _prompt_text(messages)
+        content = _respond(messages)
+        await asyncio.sleep(_draw_latency(estimate_tokens(content)))
+        return ChatResult(generations=[ChatGeneration(message=self._message(prompt, content))])
+
+    def _pieces(self, content: str, latency: float):
+        # First chunk after ~30% of the latency, the rest spread evenly
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+        first = latency * 0.3
+        step = (latency - first) / max(1, len(pieces) - 1)
+        return pieces, first, step
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        content = _respond(messages)
+        pieces, first, step = self._pieces(content, _draw_latency(estimate_tokens(content)))
+        time.sleep(first)
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(step)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        content = _respond(messages)
+        pieces, first, step = self._pieces(content, _draw_latency(estimate_tokens(content)))
+        await asyncio.sleep(first)
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(step)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
@@ -0,0 +1,332 @@
+# app/llm/rate_limiter.py
+"""
+Global limiter for Gemini calls.
+
+- Requests-per-minute and tokens-per-minute token buckets, kept in a small
+  SQLite file so every worker process on the node draws from the same quota
+  (a local stand-in for a shared store such as Redis).
+- Per-process AIMD concurrency: the in-flight limit grows by one slot per
+  window of successful calls and is cut on 429s and on slow responses.
+- Callers queue for a slot until a deadline, then fail with LLMQueueTimeout
+  instead of piling onto Gemini.
+
+Use it around every LLM call:
+
+    with gemini_limiter.lease(estimate_tokens(prompt)):
+        model.invoke(...)
+"""
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+# Re-exported: callers size their leases with it
+from app.utils.tokens import estimate_tokens
+
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "250000"))
+LLM_LIMITER_DB = os.getenv(
+    "LLM_LIMITER_DB", os.path.join(tempfile.gettempdir(), "medscribe_llm_limiter.sqlite3")
+)
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+# Responses slower than this count as a congestion signal
+LLM_TARGET_LATENCY_SECONDS = float(os.getenv("LLM_TARGET_LATENCY_SECONDS", "20"))
+# Output tokens are not known up front; reserve this much per call
+LLM_OUTPUT_TOKEN_ALLOWANCE = int(os.getenv("LLM_OUTPUT_TOKEN_ALLOWANCE", "1024"))
+
+_POLL_SECONDS = 0.05
+
+
+# -----------------------------
+# Errors (mapped to HTTP responses in app.main)
+# -----------------------------
+class LLMCapacityError(RuntimeError):
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMQueueTimeout(LLMCapacityError):
+    """No LLM capacity became free before the caller's deadline."""
+    status_code = 503
+
+
+class LLMRateLimited(LLMCapacityError):
+    """Gemini rejected the call with a 429 / quota error."""
+    status_code = 429
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """
+    Typed 429 / RESOURCE_EXHAUSTED only (also when wrapped, via __cause__):
+    a match drains the shared buckets of every worker, so the message text
+    is never inspected.
+    """
+    try:
+        from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+        limit_types: tuple = (ResourceExhausted, TooManyRequests)
+    except ImportError:
+        limit_types = ()
+    seen = 0
+    while exc is not None and seen < 5:
+        if limit_types and isinstance(exc, limit_types):
+            return True
+        grpc_code = getattr(exc, "grpc_status_code", None)
+        if grpc_code is not None and getattr(grpc_code, "name", None) == "RESOURCE_EXHAUSTED":
+            return True
+        if getattr(exc, "status_code", None) == 429 and not isinstance(exc, LLMCapacityError):
+            return True
+        exc = exc.__cause__
+        seen += 1
+    return False
+
+
+# -----------------------------
+# Shared token buckets
+# -----------------------------
+class SQLiteBucketStore:
+    """Token buckets in a local SQLite file, updated atomically across processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def take(self, requests: Dict[str, Tuple[float, float, float]]) -> float:
+        """
+        requests: bucket name -> (cost, capacity, refill per second).
+        Takes from all buckets or none. Returns 0 on success, otherwise the
+        number of seconds until the request would fit.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            levels: Dict[str, float] = {}
+            wait = 0.0
+            for name, (cost, capacity, rate) in requests.items():
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+                levels[name] = tokens
+                # A single call bigger than the bucket could never fit; let it drain the bucket instead
+                needed = min(cost, capacity)
+                if tokens < needed:
+                    wait = max(wait, (needed - tokens) / rate)
+
+            if wait == 0.0:
+                for name, (cost, capacity, _) in requests.items():
+                    levels[name] -= min(cost, capacity)
+
+            for name, tokens in levels.items():
+                conn.execute(
+                    "INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    (name, tokens, now),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def drain(self, name: str) -> None:
+        """Empty a bucket so every worker backs off (used after a 429)."""
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO buckets (name, tokens, updated) VALUES (?, 0, ?) "
+            "ON CONFLICT(name) DO UPDATE SET tokens = 0, updated = excluded.updated",
+            (name, time.time()),
+        )
+
+    def levels(self) -> Dict[str, float]:
+        rows = self._conn().execute("SELECT name, tokens FROM buckets").fetchall()
+        return {name: round(tokens, 1) for name, tokens in rows}
+
+
+# -----------------------------
+# Adaptive concurrency (per process)
+# -----------------------------
+class AIMDConcurrency:
+    def __init__(self, minimum: int, maximum: int, target_latency: float):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.target_latency = target_latency
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, deadline: float) -> bool:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                # Multiplicative decrease on 429
+                self.limit = max(self.minimum, self.limit * 0.5)
+            elif latency is not None and latency > self.target_latency:
+                # Gentler decrease when Gemini is slow
+                self.limit = max(self.minimum, self.limit * 0.9)
+            elif latency is not None:
+                # Additive increase: about one slot per window of successes
+                self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+            self._cond.notify_all()
+
+
+# -----------------------------
+# Limiter
+# -----------------------------
+class GeminiLimiter:
+    def __init__(self):
+        self.store = SQLiteBucketStore(LLM_LIMITER_DB)
+        self.concurrency = AIMDConcurrency(LLM_MIN_CONCURRENCY, LLM_MAX_CONCURRENCY, LLM_TARGET_LATENCY_SECONDS)
+        self._stats_lock = threading.Lock()
+        self._stats = {"leases": 0, "queue_timeouts": 0, "rate_limited": 0, "queued_seconds": 0.0}
+
+    def _bump(self, key: str, amount: float = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _bucket_request(self, tokens: int) -> Dict[str, Tuple[float, float, float]]:
+        return {
+            "rpm": (1, GEMINI_RPM, GEMINI_RPM / 60.0),
+            "tpm": (tokens + LLM_OUTPUT_TOKEN_ALLOWANCE, GEMINI_TPM, GEMINI_TPM / 60.0),
+        }
+
+    def _timeout(self, waited: float) -> LLMQueueTimeout:
+        self._bump("queue_timeouts")
+        return LLMQueueTimeout(
+            f"LLM capacity not available after {waited:.1f}s, please retry",
+            retry_after=max(1.0, 60.0 / max(GEMINI_RPM, 1)),
+        )
+
+    def _on_error(self, exc: BaseException) -> Optional[LLMRateLimited]:
+        if not is_rate_limit_error(exc):
+            return None
+        self._bump("rate_limited")
+        self.store.drain("rpm")
+        return LLMRateLimited(f"Gemini rate limit reached: {exc}", retry_after=60.0 / max(GEMINI_RPM, 1) * 5)
+
+    @contextmanager
+    def lease(self, estimated_tokens: int, timeout: Optional[float] = None):
+        """Block until a concurrency slot and bucket capacity are available."""
+        started = time.monotonic()
+        deadline = started + (LLM_QUEUE_TIMEOUT_SECONDS if timeout is None else timeout)
+
+        if not self.concurrency.acquire(deadline):
+            raise self._timeout(time.monotonic() - started)
+        try:
+            while True:
+                wait = self.store.take(self._bucket_request(estimated_tokens))
+                if wait == 0.0:
+                    break
+                if time.monotonic() + wait > deadline:
+                    raise self._timeout(time.monotonic() - started)
+                time.sleep(wait)
+        except BaseException:
+            self.concurrency.release()
+            raise
+
+        self._bump("leases")
+        self._bump("queued_seconds", time.monotonic() - started)
+        call_start = time.monotonic()
+        throttled = False
+        try:
+            yield
+        except Exception as e:
+            limited = self._on_error(e)
+            if limited is not None:
+                throttled = True
+                raise limited from e
+            raise
+        finally:
+            latency = None if throttled else time.monotonic() - call_start
+            self.concurrency.release(latency=latency, throttled=throttled)
+
+    @asynccontextmanager
+    async def alease(self, estimated_tokens: int, timeout: Optional[float] = None):
+        """Async counterpart of lease(); waits without blocking the event loop."""
+        started = time.monotonic()
+        deadline = started + (LLM_QUEUE_TIMEOUT_SECONDS if timeout is None else timeout)
+
+        while not self.concurrency.try_acquire():
+            if time.monotonic() >= deadline:
+                raise self._timeout(time.monotonic() - started)
+            await asyncio.sleep(_POLL_SECONDS)
+        try:
+            while True:
+                wait = self.store.take(self._bucket_request(estimated_tokens))
+                if wait == 0.0:
+                    break
+                if time.monotonic() + wait > deadline:
+                    raise self._timeout(time.monotonic() - started)
+                await asyncio.sleep(wait)
+        except BaseException:
+            self.concurrency.release()
+            raise
+
+        self._bump("leases")
+        self._bump("queued_seconds", time.monotonic() - started)
+        call_start = time.monotonic()
+        throttled = False
+        try:
+            yield
+        except Exception as e:
+            limited = self._on_error(e)
+            if limited is not None:
+                throttled = True
+                raise limited from e
+            raise
+        finally:
+            latency = None if throttled else time.monotonic() - call_start
+            self.concurrency.release(latency=latency, throttled=throttled)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued_seconds"] = round(stats["queued_seconds"], 3)
+        stats.update({
+            "rpm_limit": GEMINI_RPM,
+            "tpm_limit": GEMINI_TPM,
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "buckets": self.store.levels(),
+        })
+        return stats
+
+
+# Shared by every LLM call site in this worker
+gemini_limiter = GeminiLimiter()
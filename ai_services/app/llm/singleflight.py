@@ -0,0 +1,127 @@
+# app/llm/singleflight.py
+"""
+In-process single-flight for LLM calls.
+
+Concurrent identical calls (same agent, same input) share one in-flight
+future instead of each going to Gemini. Only calls that overlap in time are
+coalesced; nothing is cached once the leader finishes.
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+
+def input_hash(*args: Any, **kwargs: Any) -> str:
+    """Stable hash of call arguments (falls back to repr for non-JSON values)."""
+    payload = json.dumps([args, kwargs], sort_keys=True, default=repr, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "executed": 0, "coalesced": 0}
+        )
+
+    def _join(self, agent: str, key: str):
+        """Return (flight_key, future, is_leader) for this call."""
+        flight_key = f"{agent}:{key}"
+        with self._lock:
+            stats = self._stats[agent]
+            stats["calls"] += 1
+            future = self._calls.get(flight_key)
+            if future is not None:
+                stats["coalesced"] += 1
+                return flight_key, future, False
+            future = Future()
+            self._calls[flight_key] = future
+            stats["executed"] += 1
+            return flight_key, future, True
+
+    def _finish(self, flight_key: str) -> None:
+        with self._lock:
+            self._calls.pop(flight_key, None)
+
+    def do(self, agent: str, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn once per (agent, key) among concurrent callers and share the result."""
+        flight_key, future, leader = self._join(agent, key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(flight_key)
+
+    async def ado(self, agent: str, key: str, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Async counterpart of do(); shares flights with sync callers of the same key."""
+        flight_key, future, leader = self._join(agent, key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(flight_key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_agent = {agent: dict(s) for agent, s in self._stats.items()}
+            in_flight = len(self._calls)
+        return {
+            "enabled": SINGLE_FLIGHT_ENABLED,
+            "in_flight": in_flight,
+            "calls": sum(s["calls"] for s in per_agent.values()),
+            "coalesced": sum(s["coalesced"] for s in per_agent.values()),
+            "agents": per_agent,
+        }
+
+
+# Shared by all agents in this worker
+flights = SingleFlight()
+
+
+def single_flight(agent: str):
+    """Decorator: coalesce concurrent identical calls to an agent function.
+
+    The key is taken from the arguments bound to fn's signature, defaults
+    applied, so f(report) and f(medical_report=report) share a flight.
+    """
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not SINGLE_FLIGHT_ENABLED:
+                return fn(*args, **kwargs)
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                return fn(*args, **kwargs)  # let fn raise its own argument error
+            bound.apply_defaults()
+            return flights.do(agent, input_hash(**bound.arguments), fn, *args, **kwargs)
+        return wrapper
+    return decorator
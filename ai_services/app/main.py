@@ -1,4 +1,5 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from app.routes.health import router as health_router
@@ -18,6 +19,8 @@ from app.routes.translate_adv_route import router as translate_advice_router
 from app.routes.translate_sum_route import router as translate_summary_router
 from app.routes.pipeline import router as pipeline_router
 from app.routes.validator import router as validator_router
+from app.routes.stream_route import router as stream_router
+from app.llm.rate_limiter import LLMCapacityError
 from app.vector.indexer import ensure_collection
 from dotenv import load_dotenv
 from app.routes.vector_cleanup import router as vector_cleanup_router
@@ -31,6 +34,16 @@ ensure_collection()
 app = FastAPI(title="ai_services")
 
 
+# Out of Gemini capacity: tell the client to back off instead of returning a 500
+@app.exception_handler(LLMCapacityError)
+async def llm_capacity_handler(request: Request, exc: LLMCapacityError):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+
 origins = [
     "http://localhost:5173",  
     "http://localhost:4000",  
@@ -63,4 +76,5 @@ app.include_router(advisor_router)
 app.include_router(explain_router)
 app.include_router(validator_router)
 app.include_router(pipeline_router)
+app.include_router(stream_router)
 app.include_router(vector_cleanup_router)  # Add this line to include the vector cleanup router
@@ -0,0 +1,103 @@
+# app/orchestrator/case_analysis.py
+"""
+Analyses addressed by case_id instead of an uploaded file.
+
+The input is the case's stored cleaned.json (already redacted by the
+ingest pipeline). Each analysis kind runs its agent chain once and is
+persisted at cases/{case_id}/analysis/{kind}.json, so later calls are
+blob/cache reads. Bump CASE_ANALYSIS_VERSION to invalidate stored analyses
+after changing the agents.
+"""
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from app.llm.singleflight import flights
+from app.orchestrator.chain_runner import ChainContext, Step, run_chain
+from app.orchestrator.chain_steps import (
+    classification_step,
+    explainer_step,
+    response_fields,
+    summarization_step,
+    tone_step,
+    translation_step,
+    validation_step,
+)
+from app.storage.case_store import load_analysis, load_cleaned_payload, save_analysis
+
+CASE_ANALYSIS_VERSION = os.getenv("CASE_ANALYSIS_VERSION", "1")
+
+# kind -> response fields kept in the stored analysis
+ANALYSIS_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "summary": ("summary", "sources", "tools_used", "toned_summary"),
+    "classification": ("classification",),
+    "explanation": ("explanations",),
+    "translation": ("translation",),
+}
+
+
+async def _steps_for(case: Dict[str, Any], kind: str) -> List[Step]:
+    if kind == "summary":
+        return [
+            validation_step(),
+            summarization_step(),
+            tone_step(
+                ("summarization", "summary"),
+                "toned_summary",
+                include=True,
+                length_keys=("original_summary_length", "toned_summary_length"),
+            ),
+        ]
+    if kind == "classification":
+        return [validation_step(), classification_step()]
+    if kind == "explanation":
+        return [validation_step(), explainer_step()]
+    if kind == "translation":
+        # Translate the (stored) patient-facing summary rather than re-summarizing
+        summary = (await get_case_analysis(case, "summary"))["result"]
+        return [
+            Step("summary", lambda ctx: summary, details=lambda ctx, r: {"status": "stored"}),
+            translation_step([("summary", "toned_summary"), ("summary", "summary")]),
+        ]
+    raise ValueError(f"Unknown analysis kind: {kind}")
+
+
+async def _run_analysis(case: Dict[str, Any], kind: str) -> Dict[str, Any]:
+    case_id = case["_id"]
+    cleaned = await asyncio.to_thread(load_cleaned_payload, case)
+    ctx = await run_chain(
+        f"case-{kind}",
+        await _steps_for(case, kind),
+        ChainContext(medical_report=cleaned["cleaned_text"], case_id=case_id),
+    )
+    result = response_fields(ctx, *ANALYSIS_FIELDS[kind])
+    ctx.raise_for_failure(result)
+
+    document = {
+        "case_id": case_id,
+        "kind": kind,
+        "version": CASE_ANALYSIS_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "result": result,
+        "processing_steps": ctx.processing_steps,
+    }
+    await asyncio.to_thread(save_analysis, case_id, kind, document)
+    return document
+
+
+async def get_case_analysis(case: Dict[str, Any], kind: str, refresh: bool = False) -> Dict[str, Any]:
+    """
+    Stored analysis of `kind` for the case, computing and persisting it on
+    a miss (or when refresh is set). Concurrent misses share one run.
+    """
+    if kind not in ANALYSIS_FIELDS:
+        raise ValueError(f"Unknown analysis kind: {kind}")
+
+    if not refresh:
+        stored = await asyncio.to_thread(load_analysis, case["_id"], kind)
+        if stored is not None and stored.get("version") == CASE_ANALYSIS_VERSION:
+            return {**stored, "cached": True}
+
+    document = await flights.ado("case_analysis", f"{case['_id']}:{kind}", _run_analysis, case, kind)
+    return {**document, "cached": False}
@@ -0,0 +1,196 @@
+# app/orchestrator/chain_runner.py
+"""
+Per-request agent chains as a small DAG of steps.
+
+Each request gets its own ChainContext (inputs, step results and
+processing_steps), so concurrent requests never share state. Steps are
+sync functions (the agents block on the LLM); each one runs in a worker
+thread as soon as the steps it depends on have finished, so independent
+steps run concurrently and the event loop stays free.
+
+    ctx = await run_chain("explain", [
+        Step("validation", validate),
+        Step("classification", classify, after=("validation",)),
+        Step("explainer", explain, after=("validation",)),
+    ], ChainContext(medical_report=text))
+    ctx.raise_for_failure(partial_response(ctx))
+
+Step outcomes recorded in ctx.processing_steps[name]["status"]:
+
+- completed / failed / timed_out
+- skipped: disabled for this request (Step.skip holds the reason)
+- not_run: a required step it depends on did not complete
+
+A failing optional step (required=False) does not fail the chain; its
+dependents still run and see ctx.get(name) is None.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+
+from app.llm.rate_limiter import LLMCapacityError
+
+logger = logging.getLogger(__name__)
+
+CHAIN_STEP_TIMEOUT_SECONDS = float(os.getenv("CHAIN_STEP_TIMEOUT_SECONDS", "180"))
+
+
+class ChainContext:
+    """State for one chain run. Never share between requests."""
+
+    def __init__(self, **inputs: Any):
+        self.inputs: Dict[str, Any] = inputs
+        self.results: Dict[str, Any] = {}
+        self.processing_steps: Dict[str, Dict[str, Any]] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.required_failures: List[str] = []
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.results.get(name, default)
+
+    @property
+    def failed(self) -> bool:
+        return bool(self.required_failures)
+
+    def raise_for_failure(self, partial: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Raise if a required step did not complete. Capacity errors propagate
+        as is (429/503); anything else becomes a 500 carrying the steps
+        that did finish and the partial response.
+        """
+        if not self.failed:
+            return
+        step = self.required_failures[0]
+        error = self.errors.get(step)
+        if isinstance(error, LLMCapacityError):
+            raise error
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "message": f"Agent chain processing failed at step '{step}': {error}",
+                "processing_steps": self.processing_steps,
+                "partial_results": partial or {},
+            },
+        )
+
+
+@dataclass
+class Step:
+    name: str
+    fn: Callable[[ChainContext], Any]
+    after: Sequence[str] = ()
+    # Extra processing_steps fields from (ctx, result); may override "status"
+    details: Optional[Callable[[ChainContext, Any], Dict[str, Any]]] = None
+    timeout: Optional[float] = None
+    required: bool = True
+    # Set to a reason to record the step as skipped for this request
+    skip: Optional[str] = None
+
+
+def _check_graph(steps: Sequence[Step]) -> None:
+    names = [s.name for s in steps]
+    if len(set(names)) != len(names) or "chain" in names:
+        raise ValueError(f"Step names must be unique and not 'chain': {names}")
+    for s in steps:
+        unknown = [d for d in s.after if d not in names]
+        if unknown:
+            raise ValueError(f"Step '{s.name}' depends on unknown steps {unknown}")
+
+
+async def _run_step(chain: str, step: Step, ctx: ChainContext, chain_start: float) -> None:
+    started = time.perf_counter()
+    timing: Dict[str, float] = {}
+
+    def call() -> Any:
+        # Timed inside the worker thread so thread-pool queueing is not counted
+        t0 = time.perf_counter()
+        try:
+            return step.fn(ctx)
+        finally:
+            timing["duration"] = time.perf_counter() - t0
+
+    timeout = step.timeout if step.timeout is not None else CHAIN_STEP_TIMEOUT_SECONDS
+    entry: Dict[str, Any] = {"started_at_seconds": round(started - chain_start, 4)}
+    logger.info(f"[{chain}] Starting {step.name} step…")
+    try:
+        result = await asyncio.wait_for(asyncio.to_thread(call), timeout=timeout)
+    except asyncio.TimeoutError:
+        # The worker thread cannot be interrupted; its result is discarded
+        ctx.errors[step.name] = TimeoutError(f"{step.name} timed out after {timeout}s")
+        entry.update(status="timed_out", timeout_seconds=timeout)
+    except Exception as e:
+        logger.error(f"[{chain}] {step.name} step failed: {str(e)}")
+        ctx.errors[step.name] = e
+        entry.update(status="failed", error=str(e))
+    else:
+        ctx.results[step.name] = result
+        entry["status"] = "completed"
+        if step.details is not None:
+            entry.update(step.details(ctx, result))
+
+    entry["duration_seconds"] = round(timing.get("duration", time.perf_counter() - started), 4)
+    if step.name in ctx.errors and step.required:
+        ctx.required_failures.append(step.name)
+    ctx.processing_steps[step.name] = entry
+
+
+async def run_chain(chain: str, steps: Sequence[Step], ctx: ChainContext) -> ChainContext:
+    """Run steps in dependency order, independent ones concurrently. Returns ctx."""
+    _check_graph(steps)
+    chain_start = time.perf_counter()
+    by_name = {s.name: s for s in steps}
+    pending = {s.name for s in steps}
+    done: set = set()
+    running: Dict[asyncio.Task, str] = {}
+
+    def blocked_by(step: Step) -> Optional[str]:
+        for dep in step.after:
+            dep_step = by_name[dep]
+            if dep_step.required and dep not in ctx.results and dep_step.skip is None:
+                return dep
+        return None
+
+    while pending or running:
+        progressed = False
+        for name in [s.name for s in steps if s.name in pending]:
+            step = by_name[name]
+            if not all(d in done for d in step.after):
+                continue
+            pending.discard(name)
+            progressed = True
+            blocker = blocked_by(step)
+            if step.skip is not None:
+                ctx.processing_steps[name] = {"status": "skipped", "reason": step.skip}
+                done.add(name)
+            elif blocker is not None:
+                ctx.processing_steps[name] = {"status": "not_run", "reason": f"depends on '{blocker}', which did not complete"}
+                if step.required:
+                    ctx.required_failures.append(name)
+                done.add(name)
+            else:
+                running[asyncio.create_task(_run_step(chain, step, ctx, chain_start))] = name
+
+        if not running:
+            if not progressed:
+                raise ValueError(f"Dependency cycle among steps {sorted(pending)}")
+            # Skipped / not_run steps may have unblocked others
+            continue
+
+        finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in finished:
+            done.add(running.pop(task))
+            task.result()
+
+    ctx.processing_steps["chain"] = {
+        "duration_seconds": round(time.perf_counter() - chain_start, 4),
+        "failed_steps": list(ctx.required_failures),
+    }
+    return ctx
@@ -0,0 +1,161 @@
+# app/orchestrator/chain_steps.py
+"""
+Agent steps shared by the chain routes. Every step returns a dict of
+response fields; later steps read them from ctx[step_name].
+"""
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.agents.validator.validator import validate_report_cached
+from app.agents.classifier.classifier import classify_report
+from app.agents.summarizer.summarizer import summarize_report
+from app.agents.advisor.medical_advisor_agent import get_report_recommendations
+from app.agents.explainer.plain_language_agent import process_medical_report as explain_medical_report
+from app.agents.tone_checker.tone_checker_agent import check_message_tone_gated
+from app.agents.translator.translator_agent import translate_report
+from app.orchestrator.chain_runner import ChainContext, Step
+
+
+def classification_payload(classification_result: Any) -> Any:
+    """Normalize the classifier response for the API schema."""
+    if hasattr(classification_result, "model_dump"):
+        return classification_result.model_dump()
+    if hasattr(classification_result, "dict"):
+        return classification_result.dict()
+    return classification_result
+
+
+def validation_step() -> Step:
+    def run(ctx: ChainContext) -> Dict[str, Any]:
+        validated_result, cache_hit = validate_report_cached(ctx.inputs["medical_report"], case_id=ctx.inputs.get("case_id"))
+        return {"validated_text": validated_result.cleaned_text, "cache_hit": cache_hit}
+
+    return Step(
+        "validation",
+        run,
+        details=lambda ctx, r: {
+            "cache_hit": r["cache_hit"],
+            "input_length": len(ctx.inputs["medical_report"]),
+            "output_length": len(r["validated_text"]),
+        },
+    )
+
+
+def summarization_step() -> Step:
+    def run(ctx: ChainContext) -> Dict[str, Any]:
+        summary, sources, tools_used = summarize_report(ctx["validation"]["validated_text"])
+        return {"summary": summary, "sources": sources, "tools_used": tools_used}
+
+    return Step(
+        "summarization",
+        run,
+        after=("validation",),
+        details=lambda ctx, r: {"sources_found": len(r["sources"]), "tools_used": r["tools_used"]},
+    )
+
+
+def classification_step() -> Step:
+    def run(ctx: ChainContext) -> Dict[str, Any]:
+        return {"classification": classification_payload(classify_report(ctx["validation"]["validated_text"]))}
+
+    def details(ctx: ChainContext, r: Dict[str, Any]) -> Dict[str, Any]:
+        domains = r["classification"].get("domains") if isinstance(r["classification"], dict) else None
+        return {"domain_count": len(domains) if isinstance(domains, dict) else 0}
+
+    return Step("classification", run, after=("validation",), details=details)
+
+
+def explainer_step() -> Step:
+    def run(ctx: ChainContext) -> Dict[str, Any]:
+        return {"explanations": explain_medical_report(ctx["validation"]["validated_text"])}
+
+    return Step(
+        "explainer",
+        run,
+        after=("validation",),
+        details=lambda ctx, r: {
+            "term_count": len(r["explanations"]) if isinstance(r["explanations"], dict) else 0,
+        },
+    )
+
+
+def advice_step() -> Step:
+    def run(ctx: ChainContext) -> Dict[str, Any]:
+        return {"recommendations": get_report_recommendations(ctx["summarization"]["summary"])}
+
+    return Step(
+        "advice",
+        run,
+        after=("summarization",),
+        details=lambda ctx, r: {"recommendation_length": len(r["recommendations"])},
+    )
+
+
+def tone_step(
+    source: Tuple[str, str],
+    output_field: str,
+    include: bool,
+    length_keys: Tuple[str, str] = ("original_length", "toned_length"),
+) -> Step:
+    """
+    Tone check of ctx[source[0]][source[1]] into output_field. Required when
+    included: a failure fails the chain (500) rather than silently serving
+    the untoned text.
+    """
+    source_step, source_field = source
+
+    def run(ctx: ChainContext) -> Dict[str, Any]:
+        toned, gate = check_message_tone_gated(ctx[source_step][source_field])
+        return {output_field: toned, "gate": gate}
+
+    return Step(
+        "tone_checking",
+        run,
+        after=(source_step,),
+        skip=None if include else "include_tone_check set to False",
+        details=lambda ctx, r: {
+            "status": "skipped_by_gate" if r["gate"].get("skipped_llm") else "completed",
+            "gate": r["gate"],
+            length_keys[0]: len(ctx[source_step][source_field]),
+            length_keys[1]: len(r[output_field] or ""),
+        },
+    )
+
+
+def translation_step(
+    sources: Sequence[Tuple[str, str]],
+    name: str = "translation",
+    output_field: str = "translation",
+    skip: Optional[str] = None,
+) -> Step:
+    """Translate the first available of sources (step, field), e.g. toned text, else the original."""
+
+    def text_to_translate(ctx: ChainContext) -> str:
+        for step_name, field in sources:
+            value = (ctx.get(step_name) or {}).get(field)
+            if value:
+                return value
+        raise ValueError(f"Nothing to translate for step '{name}'")
+
+    def run(ctx: ChainContext) -> Dict[str, Any]:
+        return {output_field: translate_report(text_to_translate(ctx))}
+
+    return Step(
+        name,
+        run,
+        after=tuple(dict.fromkeys(step_name for step_name, _ in sources)),
+        skip=skip,
+        details=lambda ctx, r: {
+            "input_length": len(text_to_translate(ctx)),
+            "output_length": len(r[output_field]),
+        },
+    )
+
+
+def response_fields(ctx: ChainContext, *fields: str) -> Dict[str, Any]:
+    """Collect response fields from all finished steps (None when a step did not finish)."""
+    found: Dict[str, Any] = {field: None for field in fields}
+    for result in ctx.results.values():
+        for field in fields:
+            if isinstance(result, dict) and field in result:
+                found[field] = result[field]
+    return found
@@ -0,0 +1,156 @@
+# app/orchestrator/precompute.py
+"""
+Post-ingest precomputation of case analyses.
+
+After /ingest/process the user almost always opens the summary, the
+classification and the translation next. This stage runs them in the
+background for the new case and stores them with it (see case_analysis),
+so those requests become storage reads.
+
+Work per case is bounded by a budget in agent calls. The per-plan budgets
+are a policy of this service, not derived from the plan allowances in
+backend/config/planConfig.js: the backend charges every upload a flat 5
+agent calls (casesController.createCase), so by default precompute spends
+at most that, except on PremiumCare whose allowance is unlimited. The
+user's remaining allowance, when the backend sends it (X-Agent-Budget),
+caps the budget further. Analyses are taken in PRECOMPUTE_KINDS order
+while they fit.
+
+Progress is kept on the case document under "precompute", including the
+agent calls planned and actually made (analyses already stored cost
+nothing), so the backend can reconcile its flat charge.
+"""
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.orchestrator.case_analysis import get_case_analysis
+from app.storage.cases_mongo import get_case_by_id, update_precompute_status
+
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "true").lower() == "true"
+PRECOMPUTE_KINDS = [k.strip() for k in os.getenv("PRECOMPUTE_KINDS", "summary,classification,translation").split(",") if k.strip()]
+# Cases precomputed at once per worker, so ingest bursts do not starve interactive requests
+PRECOMPUTE_MAX_CONCURRENT = int(os.getenv("PRECOMPUTE_MAX_CONCURRENT", "2"))
+
+# Upper bound of agent calls per analysis chain (case_analysis._steps_for), excluding
+# validation, used for planning: summary = summarizer + tone checker, although the tone
+# gate often skips the tone call. The calls actually made come from processing_steps.
+ANALYSIS_AGENT_COSTS = {"summary": 2, "classification": 1, "explanation": 1, "translation": 1}
+# The validation agent runs once per case and is shared by the analyses that need it
+VALIDATION_AGENT_COST = 1
+# Free: validation + summary + classification (4); HealthPro: + translation,
+# the 5 calls charged per upload; PremiumCare: + explanation (if in PRECOMPUTE_KINDS)
+PLAN_PRECOMPUTE_BUDGETS: Dict[str, int] = json.loads(
+    os.getenv("PRECOMPUTE_PLAN_BUDGETS", '{"Free": 4, "HealthPro": 5, "PremiumCare": 6}')
+)
+
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def plan_budget(plan: Optional[str], remaining_agents: Optional[int] = None) -> int:
+    """Agent-call budget for one case; unknown plans get the Free budget."""
+    budget = PLAN_PRECOMPUTE_BUDGETS.get(plan or "Free", PLAN_PRECOMPUTE_BUDGETS.get("Free", 0))
+    if remaining_agents is not None:
+        budget = min(budget, max(0, remaining_agents))
+    return budget
+
+
+def agent_calls(kinds: Iterable[str]) -> int:
+    """Most agent calls needed to compute these analyses for one case."""
+    kinds = set(kinds)
+    calls = sum(ANALYSIS_AGENT_COSTS.get(kind, 1) for kind in kinds)
+    if kinds - {"translation"}:
+        calls += VALIDATION_AGENT_COST
+    return calls
+
+
+def plan_kinds(budget: int) -> List[str]:
+    """Analyses to precompute, in priority order, within the budget."""
+    kinds: List[str] = []
+    computed: Set[str] = set()  # kinds plus the summary a translation is made from
+    for kind in PRECOMPUTE_KINDS:
+        needed = computed | {kind} | ({"summary"} if kind == "translation" else set())
+        if agent_calls(needed) <= budget:
+            kinds.append(kind)
+            computed = needed
+    return kinds
+
+
+def calls_made(processing_steps: Dict[str, Dict[str, Any]], validated: bool = False) -> int:
+    """Agent calls a chain actually made, from its processing_steps.
+
+    Only completed steps count: gate skips ("skipped_by_gate"), stored
+    inputs ("stored") and validation cache hits made no call. validated
+    is True when another analysis of the case already counted validation.
+    """
+    calls = 0
+    for name, entry in processing_steps.items():
+        if name == "chain" or entry.get("status") != "completed" or entry.get("cache_hit"):
+            continue
+        if name == "validation" and validated:
+            continue
+        calls += 1
+    return calls
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def precompute_case(case_id: str, plan: Optional[str] = None, remaining_agents: Optional[int] = None) -> None:
+    """Background task: run and store the planned analyses for a freshly ingested case."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(PRECOMPUTE_MAX_CONCURRENT)
+
+    budget = plan_budget(plan, remaining_agents)
+    kinds = plan_kinds(budget)
+    planned = agent_calls(kinds + (["summary"] if "translation" in kinds else []))
+    await asyncio.to_thread(update_precompute_status, case_id, {
+        "status": "queued" if kinds else "skipped",
+        "plan": plan or "Free",
+        "budget": budget,
+        "kinds": kinds,
+        "planned_agent_calls": planned,
+        "agent_calls": 0,
+        "completed": [],
+        "failed": {},
+        "queued_at": _now(),
+    })
+    if not kinds:
+        return
+
+    async with _semaphore:
+        case = await asyncio.to_thread(get_case_by_id, case_id)
+        if not case:
+            return
+        await asyncio.to_thread(update_precompute_status, case_id, {"status": "running", "started_at": _now()})
+
+        calls = {"agents": 0, "validated": False}
+
+        async def run(kind: str) -> bool:
+            try:
+                analysis = await get_case_analysis(case, kind)
+            except Exception as e:
+                print(f"⚠️ Precompute {kind} failed for case {case_id}: {e}")
+                await asyncio.to_thread(update_precompute_status, case_id, {f"failed.{kind}": str(e)})
+                return False
+            if not analysis.get("cached"):
+                # Concurrent analyses share one validation run (single-flight), count it once
+                steps = analysis.get("processing_steps") or {}
+                calls["agents"] += calls_made(steps, calls["validated"])
+                calls["validated"] |= steps.get("validation", {}).get("status") == "completed"
+            await asyncio.to_thread(update_precompute_status, case_id, {}, completed=kind)
+            return True
+
+        # translation reuses the summary run (single-flight), so all kinds can start together
+        results = await asyncio.gather(*(run(kind) for kind in kinds))
+
+    # Failed analyses are not counted, although they may have made some calls
+    await asyncio.to_thread(update_precompute_status, case_id, {
+        "status": "completed" if all(results) else "partial",
+        "agent_calls": calls["agents"],
+        "finished_at": _now(),
+    })
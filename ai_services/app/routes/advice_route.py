@@ -1,14 +1,15 @@
 from fastapi import APIRouter, HTTPException, status, UploadFile, File
 from pydantic import BaseModel
 from typing import Dict, Any, Optional, List
+import asyncio
 import logging
 from datetime import datetime
 
 # Import the agents
-from app.agents.validator.validator import validate_report, CleanedTextOutput
-from app.agents.summarizer.summarizer import summarize_report
-from app.agents.advisor.medical_advisor_agent import get_report_recommendations
-from app.agents.tone_checker.tone_checker_agent import check_message_tone
+from app.agents.validator.validator import validate_report_cached
+from app.orchestrator.chain_runner import ChainContext, run_chain
+from app.orchestrator.chain_steps import advice_step, response_fields, summarization_step, tone_step, validation_step
+from app.llm.rate_limiter import LLMCapacityError
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -42,88 +43,29 @@ class AgentChainOrchestrator:
 	2. Summarizer Agent -> Create summary from validated text
 	3. Advisor Agent -> Generate recommendations from summary/content
 	4. Tone Checker Agent -> Patient-friendly recommendations
+
+	Each call runs in its own ChainContext, so concurrent requests never share step state.
 	"""
 
-	def __init__(self):
-		self.processing_steps = {}
-
-	def process_medical_report(self, medical_report: str) -> Dict[str, Any]:
-		try:
-			# Step 1: Validate and clean the report
-			logger.info("[advice] Starting validation step…")
-			validation_start = datetime.now()
-
-			validated_result: CleanedTextOutput = validate_report(medical_report)
-			validated_text = validated_result.cleaned_text
-
-			validation_end = datetime.now()
-			self.processing_steps["validation"] = {
-				"status": "completed",
-				"duration_seconds": (validation_end - validation_start).total_seconds(),
-				"input_length": len(medical_report),
-				"output_length": len(validated_text),
-			}
-
-			# Step 2: Summarize the validated report
-			logger.info("[advice] Starting summarization step…")
-			summary_start = datetime.now()
-
-			summary, sources, tools_used = summarize_report(validated_text)
-
-			summary_end = datetime.now()
-			self.processing_steps["summarization"] = {
-				"status": "completed",
-				"duration_seconds": (summary_end - summary_start).total_seconds(),
-				"sources_found": len(sources),
-				"tools_used": tools_used,
-			}
-
-			# Step 3: Advisor recommendations based on the summary/content
-			logger.info("[advice] Starting advisor step…")
-			advisor_start = datetime.now()
-
-			# Pass the summary to advisor for focused recommendations
-			recommendations = get_report_recommendations(summary)
-
-			advisor_end = datetime.now()
-			self.processing_steps["advice"] = {
-				"status": "completed",
-				"duration_seconds": (advisor_end - advisor_start).total_seconds(),
-				"recommendation_length": len(recommendations),
-			}
-
-			# Step 4: Tone check the recommendations
-			logger.info("[advice] Starting tone checking step…")
-			tone_start = datetime.now()
-
-			toned_recommendations = check_message_tone(recommendations)
-
-			tone_end = datetime.now()
-			self.processing_steps["tone_checking"] = {
-				"status": "completed",
-				"duration_seconds": (tone_end - tone_start).total_seconds(),
-				"original_length": len(recommendations),
-				"toned_length": len(toned_recommendations or ""),
-			}
-
-			return {
-				"original_text": medical_report,
-				"validated_text": validated_text,
-				"summary": summary,
-				"sources": sources,
-				"tools_used": tools_used,
-				"recommendations": recommendations,
-				"toned_recommendations": toned_recommendations,
-				"processing_steps": self.processing_steps,
-				"timestamp": datetime.now().isoformat(),
-			}
-
-		except Exception as e:
-			logger.error(f"Error in advice agent chain: {str(e)}")
-			raise HTTPException(
-				status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-				detail=f"Agent chain processing failed: {str(e)}",
-			)
+	async def process_medical_report(self, medical_report: str) -> Dict[str, Any]:
+		steps = [
+			validation_step(),
+			summarization_step(),
+			advice_step(),
+			tone_step(("advice", "recommendations"), "toned_recommendations", include=True),
+		]
+		ctx = await run_chain("advice", steps, ChainContext(medical_report=medical_report))
+
+		result = {
+			"original_text": medical_report,
+			**response_fields(
+				ctx, "validated_text", "summary", "sources", "tools_used", "recommendations", "toned_recommendations"
+			),
+			"processing_steps": ctx.processing_steps,
+			"timestamp": datetime.now().isoformat(),
+		}
+		ctx.raise_for_failure(result)
+		return result
 
 
 # Initialize the orchestrator
@@ -147,13 +89,13 @@ async def process_medical_report(file: UploadFile = File(...)):
 
 		logger.info(f"[advice] Processing medical report of length: {len(medical_report)}")
 
-		result = orchestrator.process_medical_report(medical_report=medical_report)
+		result = await orchestrator.process_medical_report(medical_report=medical_report)
 
 		logger.info("[advice] Agent chain processing completed successfully")
 
 		return AdviceResponse(**result)
 
-	except HTTPException:
+	except (HTTPException, LLMCapacityError):
 		raise
 	except Exception as e:
 		logger.error(f"Unexpected error in process_medical_report: {str(e)}")
@@ -180,10 +122,12 @@ async def validate_medical_report(file: UploadFile = File(...)):
 
 		logger.info(f"[advice] Validating medical report of length: {len(medical_report)}")
 
-		validated_result: CleanedTextOutput = validate_report(medical_report)
+		validated_result, _ = await asyncio.to_thread(validate_report_cached, medical_report)
 
 		return ValidationResponse(cleaned_text=validated_result.cleaned_text)
 
+	except LLMCapacityError:
+		raise
 	except Exception as e:
 		logger.error(f"Error in validate_medical_report: {str(e)}")
 		raise HTTPException(
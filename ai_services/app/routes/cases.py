@@ -6,6 +6,8 @@ from app.storage.azure_client import container_client
 
 from app.storage.mongo_client import get_cases_collection
 from app.storage.azure_client import get_sas_url
+from app.storage.case_store import forget_case
+from app.orchestrator.case_analysis import get_case_analysis
 from fastapi.responses import StreamingResponse
 router = APIRouter(prefix="/cases", tags=["cases"])
 
@@ -118,6 +120,69 @@ async def stream_case_file(case_id: str, file_type: str, x_user_id: Optional[str
     return StreamingResponse(stream, media_type="application/json") 
 
 
+async def _case_analysis(case_id: str, kind: str, refresh: bool, x_user_id: Optional[str]):
+    case = get_cases_collection().find_one({"_id": case_id})
+    if not case:
+        raise HTTPException(status_code=404, detail="Case not found")
+
+    _require_owner(x_user_id, case.get("user_id", ""))
+
+    try:
+        return await get_case_analysis(case, kind, refresh=refresh)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/{case_id}/summary")
+async def get_case_summary(case_id: str, refresh: bool = False, x_user_id: Optional[str] = Header(default=None, alias="X-User-Id")):
+    """
+    Summary (and patient-friendly toned summary) of the case's stored cleaned report.
+    Computed once and stored with the case; refresh=true recomputes it.
+    """
+    return await _case_analysis(case_id, "summary", refresh, x_user_id)
+
+
+@router.get("/{case_id}/classification")
+async def get_case_classification(case_id: str, refresh: bool = False, x_user_id: Optional[str] = Header(default=None, alias="X-User-Id")):
+    """
+    Health-domain classification of the case's stored cleaned report.
+    """
+    return await _case_analysis(case_id, "classification", refresh, x_user_id)
+
+
+@router.get("/{case_id}/explanation")
+async def get_case_explanation(case_id: str, refresh: bool = False, x_user_id: Optional[str] = Header(default=None, alias="X-User-Id")):
+    """
+    Plain-language explanations of the medical terms in the case's report.
+    """
+    return await _case_analysis(case_id, "explanation", refresh, x_user_id)
+
+
+@router.get("/{case_id}/translation")
+async def get_case_translation(case_id: str, refresh: bool = False, x_user_id: Optional[str] = Header(default=None, alias="X-User-Id")):
+    """
+    Sinhala translation of the case summary (the stored summary is reused).
+    """
+    return await _case_analysis(case_id, "translation", refresh, x_user_id)
+
+
+@router.get("/{case_id}/precompute")
+def get_precompute_status(case_id: str, x_user_id: Optional[str] = Header(default=None, alias="X-User-Id")):
+    """
+    Progress of the post-ingest precomputation for the case.
+    """
+    case = get_cases_collection().find_one({"_id": case_id}, {"user_id": 1, "precompute": 1, "analysis_paths": 1})
+    if not case:
+        raise HTTPException(status_code=404, detail="Case not found")
+
+    _require_owner(x_user_id, case.get("user_id", ""))
+    return {
+        "case_id": case_id,
+        "precompute": case.get("precompute") or {"status": "not_scheduled"},
+        "available": sorted((case.get("analysis_paths") or {}).keys()),
+    }
+
+
 @router.delete("/{case_id}/delete-files")
 async def delete_case_files(case_id: str):
     """
@@ -138,6 +203,7 @@ async def delete_case_files(case_id: str):
         for name in blob_names:
             blob_client = container_client.get_blob_client(name)
             blob_client.delete_blob()
+        forget_case(case_id)
 
         return {
             "message": f"✅ Deleted {len(blob_names)} blobs for case {case_id}",
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, HTTPException, status, UploadFile, File
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
+import asyncio
 import logging
 from datetime import datetime
 
 # Import the agents
-from app.agents.validator.validator import validate_report, CleanedTextOutput
-from app.agents.classifier.classifier import classify_report
+from app.agents.validator.validator import validate_report_cached
+from app.orchestrator.chain_runner import ChainContext, run_chain
+from app.orchestrator.chain_steps import classification_step, response_fields, validation_step
+from app.llm.rate_limiter import LLMCapacityError
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -37,67 +40,20 @@ class ClassifyResponse(BaseModel):
     timestamp: str
 
 class AgentChainOrchestrator:
-    def __init__(self):
-        self.processing_steps = {}
-
-    def process_medical_report(self, medical_report: str) -> Dict[str, Any]:
-        try:
-            # Step 1: Validate and clean the report
-            logger.info("[classify] Starting validation step…")
-            validation_start = datetime.now()
-
-            validated_result: CleanedTextOutput = validate_report(medical_report)
-            validated_text = validated_result.cleaned_text
-
-            validation_end = datetime.now()
-            self.processing_steps["validation"] = {
-                "status": "completed",
-                "duration_seconds": (validation_end - validation_start).total_seconds(),
-                "input_length": len(medical_report),
-                "output_length": len(validated_text),
-            }
-
-            # Step 2: Classify the validated report
-            logger.info("[classify] Starting classification step…")
-            classify_start = datetime.now()
-
-            classification_result = classify_report(validated_text)
-
-            classify_end = datetime.now()
-
-            # Normalize the classifier response for the API schema
-            if hasattr(classification_result, "model_dump"):
-                classification_payload = classification_result.model_dump()
-            elif hasattr(classification_result, "dict"):
-                classification_payload = classification_result.dict()
-            else:
-                classification_payload = classification_result
-
-            domain_count = 0
-            domains = classification_payload.get("domains") if isinstance(classification_payload, dict) else None
-            if isinstance(domains, dict):
-                domain_count = len(domains)
-
-            self.processing_steps["classification"] = {
-                "status": "completed",
-                "duration_seconds": (classify_end - classify_start).total_seconds(),
-                "domain_count": domain_count,
-            }
-
-            return {
-                "original_text": medical_report,
-                "validated_text": validated_text,
-                "classification": classification_payload,
-                "processing_steps": self.processing_steps,
-                "timestamp": datetime.now().isoformat(),
-            }
-
-        except Exception as e:
-            logger.error(f"Error in classification agent chain: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Agent chain processing failed: {str(e)}",
-            )
+    """Validator -> classifier chain; each call runs in its own ChainContext."""
+
+    async def process_medical_report(self, medical_report: str) -> Dict[str, Any]:
+        steps = [validation_step(), classification_step()]
+        ctx = await run_chain("classify", steps, ChainContext(medical_report=medical_report))
+
+        result = {
+            "original_text": medical_report,
+            **response_fields(ctx, "validated_text", "classification"),
+            "processing_steps": ctx.processing_steps,
+            "timestamp": datetime.now().isoformat(),
+        }
+        ctx.raise_for_failure(result)
+        return result
 
 
 # Initialize the orchestrator
@@ -123,13 +79,13 @@ async def process_medical_report(file: UploadFile = File(...)):
         logger.info(f"[classify] Processing medical report of length: {len(medical_report)}")
 
         # Process through the agent chain
-        result = orchestrator.process_medical_report(medical_report=medical_report)
+        result = await orchestrator.process_medical_report(medical_report=medical_report)
 
         logger.info("[classify] Agent chain processing completed successfully")
 
         return ClassifyResponse(**result)
 
-    except HTTPException:
+    except (HTTPException, LLMCapacityError):
         raise
     except Exception as e:
         logger.error(f"Unexpected error in process_medical_report: {str(e)}")
@@ -158,10 +114,12 @@ async def validate_medical_report(file: UploadFile = File(...)):
         logger.info(f"[classify] Validating medical report of length: {len(medical_report)}")
 
         # Run only the validation step
-        validated_result: CleanedTextOutput = validate_report(medical_report)
+        validated_result, _ = await asyncio.to_thread(validate_report_cached, medical_report)
 
         return ValidationResponse(cleaned_text=validated_result.cleaned_text)
 
+    except LLMCapacityError:
+        raise
     except Exception as e:
         logger.error(f"Error in validate_medical_report: {str(e)}")
         raise HTTPException(
@@ -1,15 +1,20 @@
 from fastapi import APIRouter, HTTPException, status, UploadFile, File
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
+import asyncio
 import logging
 from datetime import datetime
 
 # Import the agents
-from app.agents.validator.validator import validate_report, CleanedTextOutput
-from app.agents.classifier.classifier import classify_report
-from app.agents.explainer.plain_language_agent import (
-	process_medical_report as explain_medical_report,
+from app.agents.validator.validator import validate_report_cached, CleanedTextOutput, get_validated_report, store_validated_report
+from app.orchestrator.chain_runner import ChainContext, run_chain
+from app.orchestrator.chain_steps import classification_step, explainer_step, response_fields, validation_step
+from app.agents.fused.fused_agent import (
+	FUSED_ANALYSIS_DEFAULT,
+	classification_payload as fused_classification_payload,
+	run_fused_analysis,
 )
+from app.llm.rate_limiter import LLMCapacityError
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -52,92 +57,98 @@ class AgentChainOrchestrator:
 	1. Validator Agent -> Cleans and standardizes the medical report
 	2. Classifier Agent -> Classifies the cleaned text across health domains
 	3. Explainer Agent -> Extracts medical terms and explains them in plain language
-	"""
 
-	def __init__(self):
-		self.processing_steps = {}
+	Each call runs in its own ChainContext, so concurrent requests never share step state.
+	"""
 
-	def process_medical_report(self, medical_report: str) -> Dict[str, Any]:
+	async def process_medical_report(self, medical_report: str, fused: bool = False) -> Dict[str, Any]:
 		"""
 		Chains the validator, classifier, and explainer agents to process a medical report.
+		Classification and explanation both only need the validated text, so they run concurrently.
 
 		Args:
 			medical_report (str): Raw medical report text
+			fused (bool): Run all three agents' tasks in one LLM call
 
 		Returns:
 			Dict containing all processing results and metadata
 		"""
-		try:
-			# Step 1: Validate and clean the report
-			logger.info("[explain] Starting validation step…")
-			validation_start = datetime.now()
+		if fused:
+			return await asyncio.to_thread(self.process_fused, medical_report)
 
-			validated_result: CleanedTextOutput = validate_report(medical_report)
-			validated_text = validated_result.cleaned_text
+		steps = [validation_step(), classification_step(), explainer_step()]
+		ctx = await run_chain("explain", steps, ChainContext(medical_report=medical_report))
 
-			validation_end = datetime.now()
-			self.processing_steps["validation"] = {
-				"status": "completed",
-				"duration_seconds": (validation_end - validation_start).total_seconds(),
-				"input_length": len(medical_report),
-				"output_length": len(validated_text),
-			}
-
-			# Step 2: Classify the validated report
-			logger.info("[explain] Starting classification step…")
-			classify_start = datetime.now()
-
-			classification_result = classify_report(validated_text)
+		result = {
+			"original_text": medical_report,
+			**response_fields(ctx, "validated_text", "classification", "explanations"),
+			"processing_steps": ctx.processing_steps,
+			"timestamp": datetime.now().isoformat(),
+		}
+		ctx.raise_for_failure(result)
+		return result
 
-			classify_end = datetime.now()
 
-			# Normalize the classifier response for the API schema
-			if hasattr(classification_result, "model_dump"):
-				classification_payload = classification_result.model_dump()
-			elif hasattr(classification_result, "dict"):
-				classification_payload = classification_result.dict()
+	def process_fused(self, medical_report: str) -> Dict[str, Any]:
+		"""
+		Fused mode: validation, classification and term explanations come from
+		a single structured LLM call and are split into the usual response fields.
+		"""
+		processing_steps: Dict[str, Any] = {}
+		try:
+			logger.info("[explain] Starting fused analysis step…")
+			fused_start = datetime.now()
+
+			# Reuse stored validated text when available and drop validation from the call
+			cached = get_validated_report(medical_report)
+			if cached is not None:
+				result = run_fused_analysis(cached.cleaned_text, ("classification", "explanations"))
+				validated_text = cached.cleaned_text
 			else:
-				classification_payload = classification_result
+				result = run_fused_analysis(medical_report, ("cleaned_text", "classification", "explanations"))
+				validated_text = result.cleaned_text
+				store_validated_report(medical_report, CleanedTextOutput(cleaned_text=validated_text))
 
-			# Compute domain count if available
-			domain_count = 0
+			fused_end = datetime.now()
+			classification_payload = fused_classification_payload(result)
 			domains = classification_payload.get("domains") if isinstance(classification_payload, dict) else None
-			if isinstance(domains, dict):
-				domain_count = len(domains)
 
-			self.processing_steps["classification"] = {
+			processing_steps["fused_analysis"] = {
 				"status": "completed",
-				"duration_seconds": (classify_end - classify_start).total_seconds(),
-				"domain_count": domain_count,
+				"duration_seconds": (fused_end - fused_start).total_seconds(),
+				"tasks": ["classification", "explainer"] if cached is not None else ["validation", "classification", "explainer"],
 			}
-
-			# Step 3: Explain medical terms from the validated text
-			logger.info("[explain] Starting explainer step…")
-			explain_start = datetime.now()
-
-			explanations = explain_medical_report(validated_text)
-
-			explain_end = datetime.now()
-			self.processing_steps["explainer"] = {
-				"status": "completed",
-				"duration_seconds": (explain_end - explain_start).total_seconds(),
-				"term_count": len(explanations) if isinstance(explanations, dict) else 0,
+			processing_steps["validation"] = {
+				"status": "fused" if cached is None else "completed",
+				"cache_hit": cached is not None,
+				"input_length": len(medical_report),
+				"output_length": len(validated_text),
+			}
+			processing_steps["classification"] = {
+				"status": "fused",
+				"domain_count": len(domains) if isinstance(domains, dict) else 0,
+			}
+			processing_steps["explainer"] = {
+				"status": "fused",
+				"term_count": len(result.explanations),
 			}
 
 			return {
 				"original_text": medical_report,
 				"validated_text": validated_text,
 				"classification": classification_payload,
-				"explanations": explanations,
-				"processing_steps": self.processing_steps,
+				"explanations": result.explanations,
+				"processing_steps": processing_steps,
 				"timestamp": datetime.now().isoformat(),
 			}
 
+		except LLMCapacityError:
+			raise
 		except Exception as e:
-			logger.error(f"Error in explainer agent chain: {str(e)}")
+			logger.error(f"Error in fused explainer analysis: {str(e)}")
 			raise HTTPException(
 				status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-				detail=f"Agent chain processing failed: {str(e)}",
+				detail=f"Fused analysis failed: {str(e)}",
 			)
 
 
@@ -146,12 +157,13 @@ orchestrator = AgentChainOrchestrator()
 
 
 @router.post("/process", response_model=ExplainResponse)
-async def process_medical_report(file: UploadFile = File(...)):
+async def process_medical_report(file: UploadFile = File(...), fused: Optional[bool] = None):
 	"""
 	Main API endpoint that chains validator -> classifier -> explainer agents using a file upload.
 
 	Args:
 		file: The medical report file (txt)
+		fused: Make one combined LLM call instead of three (defaults to FUSED_ANALYSIS_DEFAULT)
 
 	Returns:
 		ExplainResponse with all processing results and metadata
@@ -170,13 +182,16 @@ async def process_medical_report(file: UploadFile = File(...)):
 		logger.info(f"[explain] Processing medical report of length: {len(medical_report)}")
 
 		# Process through the agent chain
-		result = orchestrator.process_medical_report(medical_report=medical_report)
+		result = await orchestrator.process_medical_report(
+			medical_report=medical_report,
+			fused=FUSED_ANALYSIS_DEFAULT if fused is None else fused,
+		)
 
 		logger.info("[explain] Agent chain processing completed successfully")
 
 		return ExplainResponse(**result)
 
-	except HTTPException:
+	except (HTTPException, LLMCapacityError):
 		raise
 	except Exception as e:
 		logger.error(f"Unexpected error in process_medical_report: {str(e)}")
@@ -211,10 +226,12 @@ async def validate_medical_report(file: UploadFile = File(...)):
 		logger.info(f"[explain] Validating medical report of length: {len(medical_report)}")
 
 		# Run only the validation step
-		validated_result: CleanedTextOutput = validate_report(medical_report)
+		validated_result, _ = await asyncio.to_thread(validate_report_cached, medical_report)
 
 		return ValidationResponse(cleaned_text=validated_result.cleaned_text)
 
+	except LLMCapacityError:
+		raise
 	except Exception as e:
 		logger.error(f"Error in validate_medical_report: {str(e)}")
 		raise HTTPException(
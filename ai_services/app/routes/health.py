@@ -1,8 +1,28 @@
 # app/routes/health.py
 from fastapi import APIRouter
+from app.llm.singleflight import flights
+from app.llm.rate_limiter import gemini_limiter
+from app.agents.translator import translation_memory
+from app.agents.explainer.glossary import glossary
+from app.agents.tone_checker import tone_gate
+from app.vector import embedding_cache
+from app.vector.embedding_service import embedding_service
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 @router.get("/")
 def health_check():
     return {"status": "ok"}
+
+@router.get("/metrics")
+def metrics():
+    """In-process counters for this worker."""
+    return {
+        "single_flight": flights.stats(),
+        "rate_limiter": gemini_limiter.stats(),
+        "translation_memory": translation_memory.stats(),
+        "glossary": glossary.stats(),
+        "tone_gate": tone_gate.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_service": embedding_service.stats(),
+    }
@@ -1,10 +1,12 @@
 # app/routes/ingest.py
 from __future__ import annotations
+from typing import Optional
 from fastapi import APIRouter, UploadFile, HTTPException, Header, BackgroundTasks
 
 from app.orchestrator.graph import run_pipeline
 from app.models.io import ProcessResponse, IngestStats
 from app.vector.indexer import index_case   # ✅ corrected
+from app.orchestrator.precompute import PRECOMPUTE_ENABLED, precompute_case
 
 router = APIRouter(prefix="/ingest", tags=["process"])
 
@@ -13,6 +15,9 @@ async def process(
     file: UploadFile,
     background_tasks: BackgroundTasks,
     x_user_id: str | None = Header(default=None, alias="X-User-Id"),
+    x_user_plan: str | None = Header(default=None, alias="X-User-Plan"),
+    x_agent_budget: int | None = Header(default=None, alias="X-Agent-Budget"),
+    precompute: Optional[bool] = None,
 ):
     if file.content_type not in {"application/pdf", "image/png", "image/jpeg"}:
         raise HTTPException(status_code=400, detail="Please upload a PDF or image")
@@ -25,9 +30,15 @@ async def process(
     # 🧩 Schedule background indexing into Qdrant
     background_tasks.add_task(index_case, state["case_id"])
 
+    # 🧠 Precompute summary/classification/translation within the plan's budget
+    message = "Processed, saved to Azure+Mongo, indexing scheduled in Qdrant."
+    if PRECOMPUTE_ENABLED if precompute is None else precompute:
+        background_tasks.add_task(precompute_case, state["case_id"], x_user_plan, x_agent_budget)
+        message += " Analyses precomputing (see /cases/{case_id}/precompute)."
+
     return ProcessResponse(
         case_id=state["case_id"],
         panels=state["panels"],
         ingest_stats=IngestStats(pages=state["pages"], ocr_used=state["ocr_used"]),
-        message="Processed, saved to Azure+Mongo, indexing scheduled in Qdrant.",
+        message=message,
     )
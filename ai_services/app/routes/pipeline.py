@@ -35,11 +35,11 @@ async def run_pipeline(payload: PipelineRequest):
         yield f"data: {json.dumps({'agent': 'classifier', 'output': output})}\n\n"
 
         # 3️⃣ Explainer
-        explanation, sources, tools = process_medical_report(medical_report)
+        explanation = process_medical_report(medical_report)
         yield f"data: {json.dumps({'agent': 'explainer', 'output': explanation})}\n\n"
 
         # 4️⃣ Translator
-        translation, sources, tools = translate_report(medical_report)
+        translation = translate_report(medical_report)
         yield f"data: {json.dumps({'agent': 'translator', 'output': translation})}\n\n"
 
     return StreamingResponse(event_stream(), media_type="text/event-stream")
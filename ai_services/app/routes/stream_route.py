@@ -0,0 +1,85 @@
+from fastapi import APIRouter, HTTPException, status, UploadFile, File, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Tuple
+import json
+import logging
+
+# Import the streaming agents
+from app.agents.summarizer.summarizer import astream_summary
+from app.agents.translator.translator_agent import astream_translation
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter(prefix="/stream", tags=["stream"])
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # keep proxies from buffering the stream
+}
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _read_report(file: UploadFile) -> str:
+    file_content = await file.read()
+    medical_report = file_content.decode("utf-8")
+
+    if not medical_report.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Medical report file cannot be empty",
+        )
+    return medical_report
+
+
+def _event_stream(request: Request, agent: str, events: AsyncIterator[Tuple[str, Any]]):
+    """
+    Relay agent events as SSE:
+      event: token  -> {"delta": "..."}
+      event: final  -> the agent's structured output
+      event: error  -> {"detail": "..."}
+    Stops pulling from the model as soon as the client goes away.
+    """
+    async def stream():
+        try:
+            async for kind, payload in events:
+                if await request.is_disconnected():
+                    logger.info(f"[stream:{agent}] Client disconnected, cancelling generation")
+                    break
+                if kind == "token":
+                    yield _sse("token", {"delta": payload})
+                else:
+                    yield _sse("final", payload.model_dump())
+        except Exception as e:
+            logger.error(f"[stream:{agent}] Streaming failed: {str(e)}")
+            yield _sse("error", {"detail": f"{agent} streaming failed: {str(e)}"})
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/summary")
+async def stream_summary(request: Request, file: UploadFile = File(...)):
+    """
+    Stream summarizer tokens over SSE; the final event carries
+    {"summary", "sources", "tools_used"}.
+    """
+    medical_report = await _read_report(file)
+    logger.info(f"[stream:summary] Streaming summary for report of length: {len(medical_report)}")
+    return _event_stream(request, "summarizer", astream_summary(medical_report))
+
+
+@router.post("/translation")
+async def stream_translation(request: Request, file: UploadFile = File(...)):
+    """
+    Stream the Sinhala translation over SSE; the final event carries {"translation"}.
+    """
+    medical_report = await _read_report(file)
+    logger.info(f"[stream:translation] Streaming translation for text of length: {len(medical_report)}")
+    return _event_stream(request, "translator", astream_translation(medical_report))
@@ -1,13 +1,15 @@
 from fastapi import APIRouter, HTTPException, status, UploadFile, File
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
+import asyncio
 import logging
 from datetime import datetime
 
 # Import the agents
-from app.agents.validator.validator import validate_report, CleanedTextOutput
-from app.agents.summarizer.summarizer import summarize_report
-from app.agents.tone_checker.tone_checker_agent import check_message_tone
+from app.agents.validator.validator import validate_report_cached
+from app.orchestrator.chain_runner import ChainContext, run_chain
+from app.orchestrator.chain_steps import response_fields, summarization_step, tone_step, validation_step
+from app.llm.rate_limiter import LLMCapacityError
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -39,12 +41,11 @@ class AgentChainOrchestrator:
     1. Validator Agent -> Cleans and standardizes the medical report
     2. Summarizer Agent -> Creates summary from validated text
     3. Tone Checker Agent -> Adjusts tone for patient-friendly output
+
+    Each call runs in its own ChainContext, so concurrent requests never share step state.
     """
-    
-    def __init__(self):
-        self.processing_steps = {}
-        
-    def process_medical_report(self, medical_report: str, include_tone_check: bool = True) -> Dict[str, Any]:
+
+    async def process_medical_report(self, medical_report: str, include_tone_check: bool = True) -> Dict[str, Any]:
         """
         Chains the agents to process a medical report through validation, summarization, and tone checking.
         
@@ -55,74 +56,26 @@ class AgentChainOrchestrator:
         Returns:
             Dict containing all processing results and metadata
         """
-        try:
-            # Step 1: Validate and clean the report
-            logger.info("Starting validation step...")
-            validation_start = datetime.now()
-            
-            validated_result: CleanedTextOutput = validate_report(medical_report)
-            validated_text = validated_result.cleaned_text
-            
-            validation_end = datetime.now()
-            self.processing_steps["validation"] = {
-                "status": "completed",
-                "duration_seconds": (validation_end - validation_start).total_seconds(),
-                "input_length": len(medical_report),
-                "output_length": len(validated_text)
-            }
-            
-            # Step 2: Summarize the validated report
-            logger.info("Starting summarization step...")
-            summary_start = datetime.now()
-            
-            summary, sources, tools_used = summarize_report(validated_text)
-            
-            summary_end = datetime.now()
-            self.processing_steps["summarization"] = {
-                "status": "completed",
-                "duration_seconds": (summary_end - summary_start).total_seconds(),
-                "sources_found": len(sources),
-                "tools_used": tools_used
-            }
-            
-            # Step 3: Tone check (optional)
-            toned_summary = None
-            if include_tone_check:
-                logger.info("Starting tone checking step...")
-                tone_start = datetime.now()
-                
-                toned_summary = check_message_tone(summary)
-                
-                tone_end = datetime.now()
-                self.processing_steps["tone_checking"] = {
-                    "status": "completed",
-                    "duration_seconds": (tone_end - tone_start).total_seconds(),
-                    "original_summary_length": len(summary),
-                    "toned_summary_length": len(toned_summary)
-                }
-            else:
-                self.processing_steps["tone_checking"] = {
-                    "status": "skipped",
-                    "reason": "include_tone_check set to False"
-                }
-            
-            return {
-                "original_text": medical_report,
-                "validated_text": validated_text,
-                "summary": summary,
-                "sources": sources,
-                "tools_used": tools_used,
-                "toned_summary": toned_summary,
-                "processing_steps": self.processing_steps,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-        except Exception as e:
-            logger.error(f"Error in agent chain processing: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Agent chain processing failed: {str(e)}"
-            )
+        steps = [
+            validation_step(),
+            summarization_step(),
+            tone_step(
+                ("summarization", "summary"),
+                "toned_summary",
+                include_tone_check,
+                length_keys=("original_summary_length", "toned_summary_length"),
+            ),
+        ]
+        ctx = await run_chain("summary", steps, ChainContext(medical_report=medical_report))
+
+        result = {
+            "original_text": medical_report,
+            **response_fields(ctx, "validated_text", "summary", "sources", "tools_used", "toned_summary"),
+            "processing_steps": ctx.processing_steps,
+            "timestamp": datetime.now().isoformat(),
+        }
+        ctx.raise_for_failure(result)
+        return result
 
 # Initialize the orchestrator
 orchestrator = AgentChainOrchestrator()
@@ -153,7 +106,7 @@ async def process_medical_report(file: UploadFile = File(...), include_tone_chec
         logger.info(f"Processing medical report of length: {len(medical_report)}")
         
         # Process through the agent chain
-        result = orchestrator.process_medical_report(
+        result = await orchestrator.process_medical_report(
             medical_report=medical_report,
             include_tone_check=include_tone_check
         )
@@ -162,7 +115,7 @@ async def process_medical_report(file: UploadFile = File(...), include_tone_chec
         
         return SummaryResponse(**result)
         
-    except HTTPException:
+    except (HTTPException, LLMCapacityError):
         raise
     except Exception as e:
         logger.error(f"Unexpected error in process_medical_report: {str(e)}")
@@ -196,10 +149,12 @@ async def validate_medical_report(file: UploadFile = File(...)):
         logger.info(f"Validating medical report of length: {len(medical_report)}")
         
         # Run only the validation step
-        validated_result: CleanedTextOutput = validate_report(medical_report)
+        validated_result, _ = await asyncio.to_thread(validate_report_cached, medical_report)
         
         return ValidationResponse(cleaned_text=validated_result.cleaned_text)
         
+    except LLMCapacityError:
+        raise
     except Exception as e:
         logger.error(f"Error in validate_medical_report: {str(e)}")
         raise HTTPException(
@@ -1,15 +1,23 @@
 from fastapi import APIRouter, HTTPException, status, UploadFile, File
 from pydantic import BaseModel
 from typing import Dict, Any, Optional, List
+import asyncio
 import logging
 from datetime import datetime
 
 # Import the agents
-from app.agents.validator.validator import validate_report, CleanedTextOutput
-from app.agents.summarizer.summarizer import summarize_report
-from app.agents.advisor.medical_advisor_agent import get_report_recommendations
-from app.agents.tone_checker.tone_checker_agent import check_message_tone
-from app.agents.translator.translator_agent import translate_report
+from app.agents.validator.validator import validate_report_cached, CleanedTextOutput, get_validated_report, store_validated_report
+from app.orchestrator.chain_runner import ChainContext, run_chain
+from app.orchestrator.chain_steps import (
+	advice_step,
+	response_fields,
+	summarization_step,
+	tone_step,
+	translation_step,
+	validation_step,
+)
+from app.agents.fused.fused_agent import FUSED_ANALYSIS_DEFAULT, run_fused_analysis
+from app.llm.rate_limiter import LLMCapacityError
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -37,6 +45,7 @@ class TranslateAdviceResponse(BaseModel):
 	recommendations: str
 	toned_recommendations: Optional[str] = None
 	translation: str
+	summary_translation: Optional[str] = None
 	processing_steps: Dict[str, Any]
 	timestamp: str
 
@@ -49,109 +58,152 @@ class AgentChainOrchestrator:
 	3) Advisor -> generate recommendations from summary
 	4) Tone checker (optional) -> patient-friendly recommendations
 	5) Translator -> translate final recommendations to Sinhala
-	"""
 
-	def __init__(self):
-		self.processing_steps = {}
+	Optionally the summary is translated as well, concurrently with steps 3-5.
+	Each call runs in its own ChainContext, so concurrent requests never share step state.
+	"""
 
-	def process_medical_report(self, medical_report: str, include_tone_check: bool = True) -> Dict[str, Any]:
+	async def process_medical_report(
+		self,
+		medical_report: str,
+		include_tone_check: bool = True,
+		fused: bool = False,
+		include_summary_translation: bool = False,
+	) -> Dict[str, Any]:
+		if fused:
+			return await asyncio.to_thread(self.process_fused, medical_report, include_tone_check, include_summary_translation)
+
+		steps = [
+			validation_step(),
+			summarization_step(),
+			advice_step(),
+			tone_step(("advice", "recommendations"), "toned_recommendations", include_tone_check),
+			# Translate toned recommendations if available, else the original recommendations
+			translation_step([("tone_checking", "toned_recommendations"), ("advice", "recommendations")]),
+			translation_step(
+				[("summarization", "summary")],
+				name="summary_translation",
+				output_field="summary_translation",
+				skip=None if include_summary_translation else "include_summary_translation set to False",
+			),
+		]
+		ctx = await run_chain("translate-advice", steps, ChainContext(medical_report=medical_report))
+
+		result = {
+			"original_text": medical_report,
+			**response_fields(
+				ctx,
+				"validated_text",
+				"summary",
+				"sources",
+				"tools_used",
+				"recommendations",
+				"toned_recommendations",
+				"translation",
+				"summary_translation",
+			),
+			"processing_steps": ctx.processing_steps,
+			"timestamp": datetime.now().isoformat(),
+		}
+		ctx.raise_for_failure(result)
+		return result
+
+
+	def process_fused(
+		self, medical_report: str, include_tone_check: bool = True, include_summary_translation: bool = False
+	) -> Dict[str, Any]:
+		"""
+		Fused mode: all five agents' tasks run in one structured LLM call and the
+		result is split into the usual response fields.
+		"""
+		processing_steps: Dict[str, Any] = {}
 		try:
-			# Step 1: Validate
-			logger.info("[translate-advice] Starting validation step…")
-			validation_start = datetime.now()
-
-			validated_result: CleanedTextOutput = validate_report(medical_report)
-			validated_text = validated_result.cleaned_text
+			logger.info("[translate-advice] Starting fused analysis step…")
+			fused_start = datetime.now()
+
+			# Reuse stored validated text when available and drop validation from the call
+			cached = get_validated_report(medical_report)
+			tasks = ["summary", "recommendations"]
+			fused_steps = ["summarization", "advice"]
+			if cached is None:
+				tasks.insert(0, "cleaned_text")
+				fused_steps.insert(0, "validation")
+			if include_tone_check:
+				tasks.append("toned_recommendations")
+				fused_steps.append("tone_checking")
+			tasks.append("translation")
+			fused_steps.append("translation")
+
+			if cached is not None:
+				result = run_fused_analysis(cached.cleaned_text, tuple(tasks))
+				validated_text = cached.cleaned_text
+			else:
+				result = run_fused_analysis(medical_report, tuple(tasks))
+				validated_text = result.cleaned_text
+				store_validated_report(medical_report, CleanedTextOutput(cleaned_text=validated_text))
 
-			validation_end = datetime.now()
-			self.processing_steps["validation"] = {
+			fused_end = datetime.now()
+			processing_steps["fused_analysis"] = {
 				"status": "completed",
-				"duration_seconds": (validation_end - validation_start).total_seconds(),
+				"duration_seconds": (fused_end - fused_start).total_seconds(),
+				"tasks": fused_steps,
+			}
+			processing_steps["validation"] = {
+				"status": "fused" if cached is None else "completed",
+				"cache_hit": cached is not None,
 				"input_length": len(medical_report),
 				"output_length": len(validated_text),
 			}
-
-			# Step 2: Summarize
-			logger.info("[translate-advice] Starting summarization step…")
-			summary_start = datetime.now()
-
-			summary, sources, tools_used = summarize_report(validated_text)
-
-			summary_end = datetime.now()
-			self.processing_steps["summarization"] = {
-				"status": "completed",
-				"duration_seconds": (summary_end - summary_start).total_seconds(),
-				"sources_found": len(sources),
-				"tools_used": tools_used,
+			processing_steps["summarization"] = {
+				"status": "fused",
+				"sources_found": len(result.sources),
+				"tools_used": result.tools_used,
 			}
-
-			# Step 3: Advisor
-			logger.info("[translate-advice] Starting advisor step…")
-			advice_start = datetime.now()
-
-			recommendations = get_report_recommendations(summary)
-
-			advice_end = datetime.now()
-			self.processing_steps["advice"] = {
-				"status": "completed",
-				"duration_seconds": (advice_end - advice_start).total_seconds(),
-				"recommendation_length": len(recommendations),
+			processing_steps["advice"] = {
+				"status": "fused",
+				"recommendation_length": len(result.recommendations),
 			}
-
-			# Step 4: Tone (optional)
-			toned_recommendations = None
 			if include_tone_check:
-				logger.info("[translate-advice] Starting tone checking step…")
-				tone_start = datetime.now()
-
-				toned_recommendations = check_message_tone(recommendations)
-
-				tone_end = datetime.now()
-				self.processing_steps["tone_checking"] = {
-					"status": "completed",
-					"duration_seconds": (tone_end - tone_start).total_seconds(),
-					"original_length": len(recommendations),
-					"toned_length": len(toned_recommendations or ""),
+				processing_steps["tone_checking"] = {
+					"status": "fused",
+					"original_length": len(result.recommendations),
+					"toned_length": len(result.toned_recommendations or ""),
 				}
 			else:
-				self.processing_steps["tone_checking"] = {
+				processing_steps["tone_checking"] = {
 					"status": "skipped",
 					"reason": "include_tone_check set to False",
 				}
-
-			# Step 5: Translate (toned if available else original recommendations)
-			logger.info("[translate-advice] Starting translation step…")
-			translate_start = datetime.now()
-
-			final_text_for_translation = toned_recommendations if toned_recommendations else recommendations
-			translation = translate_report(final_text_for_translation)
-
-			translate_end = datetime.now()
-			self.processing_steps["translation"] = {
-				"status": "completed",
-				"duration_seconds": (translate_end - translate_start).total_seconds(),
-				"input_length": len(final_text_for_translation),
-				"output_length": len(translation),
+			processing_steps["translation"] = {
+				"status": "fused",
+				"output_length": len(result.translation),
 			}
+			if include_summary_translation:
+				processing_steps["summary_translation"] = {
+					"status": "skipped",
+					"reason": "not available in fused mode",
+				}
 
 			return {
 				"original_text": medical_report,
 				"validated_text": validated_text,
-				"summary": summary,
-				"sources": sources,
-				"tools_used": tools_used,
-				"recommendations": recommendations,
-				"toned_recommendations": toned_recommendations,
-				"translation": translation,
-				"processing_steps": self.processing_steps,
+				"summary": result.summary,
+				"sources": result.sources,
+				"tools_used": result.tools_used,
+				"recommendations": result.recommendations,
+				"toned_recommendations": result.toned_recommendations if include_tone_check else None,
+				"translation": result.translation,
+				"processing_steps": processing_steps,
 				"timestamp": datetime.now().isoformat(),
 			}
 
+		except LLMCapacityError:
+			raise
 		except Exception as e:
-			logger.error(f"Error in translate-advice agent chain: {str(e)}")
+			logger.error(f"Error in fused translate-advice analysis: {str(e)}")
 			raise HTTPException(
 				status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-				detail=f"Agent chain processing failed: {str(e)}",
+				detail=f"Fused analysis failed: {str(e)}",
 			)
 
 
@@ -160,9 +212,16 @@ orchestrator = AgentChainOrchestrator()
 
 
 @router.post("/process", response_model=TranslateAdviceResponse)
-async def process_medical_report(file: UploadFile = File(...), include_tone_check: Optional[bool] = True):
+async def process_medical_report(
+	file: UploadFile = File(...),
+	include_tone_check: Optional[bool] = True,
+	fused: Optional[bool] = None,
+	include_summary_translation: Optional[bool] = False,
+):
 	"""
 	Endpoint that chains validator -> summarizer -> advisor -> tone checker (optional) -> translator using a file upload.
+	With fused=true (or FUSED_ANALYSIS_DEFAULT) all steps run in one combined LLM call.
+	With include_summary_translation=true the summary is also translated, alongside the advice steps.
 	"""
 	try:
 		file_content = await file.read()
@@ -176,16 +235,18 @@ async def process_medical_report(file: UploadFile = File(...), include_tone_chec
 
 		logger.info(f"[translate-advice] Processing medical report of length: {len(medical_report)}")
 
-		result = orchestrator.process_medical_report(
+		result = await orchestrator.process_medical_report(
 			medical_report=medical_report,
 			include_tone_check=include_tone_check,
+			fused=FUSED_ANALYSIS_DEFAULT if fused is None else fused,
+			include_summary_translation=include_summary_translation,
 		)
 
 		logger.info("[translate-advice] Agent chain processing completed successfully")
 
 		return TranslateAdviceResponse(**result)
 
-	except HTTPException:
+	except (HTTPException, LLMCapacityError):
 		raise
 	except Exception as e:
 		logger.error(f"Unexpected error in process_medical_report: {str(e)}")
@@ -212,10 +273,12 @@ async def validate_medical_report(file: UploadFile = File(...)):
 
 		logger.info(f"[translate-advice] Validating medical report of length: {len(medical_report)}")
 
-		validated_result: CleanedTextOutput = validate_report(medical_report)
+		validated_result, _ = await asyncio.to_thread(validate_report_cached, medical_report)
 
 		return ValidationResponse(cleaned_text=validated_result.cleaned_text)
 
+	except LLMCapacityError:
+		raise
 	except Exception as e:
 		logger.error(f"Error in validate_medical_report: {str(e)}")
 		raise HTTPException(
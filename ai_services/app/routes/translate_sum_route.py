@@ -1,14 +1,15 @@
 from fastapi import APIRouter, HTTPException, status, UploadFile, File
 from pydantic import BaseModel
 from typing import Dict, Any, Optional, List
+import asyncio
 import logging
 from datetime import datetime
 
 # Import the agents
-from app.agents.validator.validator import validate_report, CleanedTextOutput
-from app.agents.summarizer.summarizer import summarize_report
-from app.agents.tone_checker.tone_checker_agent import check_message_tone
-from app.agents.translator.translator_agent import translate_report
+from app.agents.validator.validator import validate_report_cached
+from app.orchestrator.chain_runner import ChainContext, run_chain
+from app.orchestrator.chain_steps import response_fields, summarization_step, tone_step, translation_step, validation_step
+from app.llm.rate_limiter import LLMCapacityError
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -46,96 +47,33 @@ class AgentChainOrchestrator:
 	2) Summarizer -> create summary, sources, tools
 	3) Tone checker (optional) -> patient-friendly summary
 	4) Translator -> translate final summary to Sinhala
+
+	Each call runs in its own ChainContext, so concurrent requests never share step state.
 	"""
 
-	def __init__(self):
-		self.processing_steps = {}
-
-	def process_medical_report(self, medical_report: str, include_tone_check: bool = True) -> Dict[str, Any]:
-		try:
-			# Step 1: Validate
-			logger.info("[translate-summary] Starting validation step…")
-			validation_start = datetime.now()
-
-			validated_result: CleanedTextOutput = validate_report(medical_report)
-			validated_text = validated_result.cleaned_text
-
-			validation_end = datetime.now()
-			self.processing_steps["validation"] = {
-				"status": "completed",
-				"duration_seconds": (validation_end - validation_start).total_seconds(),
-				"input_length": len(medical_report),
-				"output_length": len(validated_text),
-			}
-
-			# Step 2: Summarize
-			logger.info("[translate-summary] Starting summarization step…")
-			summary_start = datetime.now()
-
-			summary, sources, tools_used = summarize_report(validated_text)
-
-			summary_end = datetime.now()
-			self.processing_steps["summarization"] = {
-				"status": "completed",
-				"duration_seconds": (summary_end - summary_start).total_seconds(),
-				"sources_found": len(sources),
-				"tools_used": tools_used,
-			}
-
-			# Step 3: Tone check (optional)
-			toned_summary = None
-			if include_tone_check:
-				logger.info("[translate-summary] Starting tone checking step…")
-				tone_start = datetime.now()
-
-				toned_summary = check_message_tone(summary)
-
-				tone_end = datetime.now()
-				self.processing_steps["tone_checking"] = {
-					"status": "completed",
-					"duration_seconds": (tone_end - tone_start).total_seconds(),
-					"original_summary_length": len(summary),
-					"toned_summary_length": len(toned_summary),
-				}
-			else:
-				self.processing_steps["tone_checking"] = {
-					"status": "skipped",
-					"reason": "include_tone_check set to False",
-				}
-
-			# Step 4: Translate final summary (toned if available, else original summary)
-			logger.info("[translate-summary] Starting translation step…")
-			translate_start = datetime.now()
-
-			final_summary_for_translation = toned_summary if toned_summary else summary
-			translation = translate_report(final_summary_for_translation)
-
-			translate_end = datetime.now()
-			self.processing_steps["translation"] = {
-				"status": "completed",
-				"duration_seconds": (translate_end - translate_start).total_seconds(),
-				"input_length": len(final_summary_for_translation),
-				"output_length": len(translation),
-			}
-
-			return {
-				"original_text": medical_report,
-				"validated_text": validated_text,
-				"summary": summary,
-				"sources": sources,
-				"tools_used": tools_used,
-				"toned_summary": toned_summary,
-				"translation": translation,
-				"processing_steps": self.processing_steps,
-				"timestamp": datetime.now().isoformat(),
-			}
-
-		except Exception as e:
-			logger.error(f"Error in translate-summary agent chain: {str(e)}")
-			raise HTTPException(
-				status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-				detail=f"Agent chain processing failed: {str(e)}",
-			)
+	async def process_medical_report(self, medical_report: str, include_tone_check: bool = True) -> Dict[str, Any]:
+		steps = [
+			validation_step(),
+			summarization_step(),
+			tone_step(
+				("summarization", "summary"),
+				"toned_summary",
+				include_tone_check,
+				length_keys=("original_summary_length", "toned_summary_length"),
+			),
+			# Translate final summary (toned if available, else original summary)
+			translation_step([("tone_checking", "toned_summary"), ("summarization", "summary")]),
+		]
+		ctx = await run_chain("translate-summary", steps, ChainContext(medical_report=medical_report))
+
+		result = {
+			"original_text": medical_report,
+			**response_fields(ctx, "validated_text", "summary", "sources", "tools_used", "toned_summary", "translation"),
+			"processing_steps": ctx.processing_steps,
+			"timestamp": datetime.now().isoformat(),
+		}
+		ctx.raise_for_failure(result)
+		return result
 
 
 # Initialize the orchestrator
@@ -159,7 +97,7 @@ async def process_medical_report(file: UploadFile = File(...), include_tone_chec
 
 		logger.info(f"[translate-summary] Processing medical report of length: {len(medical_report)}")
 
-		result = orchestrator.process_medical_report(
+		result = await orchestrator.process_medical_report(
 			medical_report=medical_report,
 			include_tone_check=include_tone_check,
 		)
@@ -168,7 +106,7 @@ async def process_medical_report(file: UploadFile = File(...), include_tone_chec
 
 		return TranslateSummaryResponse(**result)
 
-	except HTTPException:
+	except (HTTPException, LLMCapacityError):
 		raise
 	except Exception as e:
 		logger.error(f"Unexpected error in process_medical_report: {str(e)}")
@@ -195,10 +133,12 @@ async def validate_medical_report(file: UploadFile = File(...)):
 
 		logger.info(f"[translate-summary] Validating medical report of length: {len(medical_report)}")
 
-		validated_result: CleanedTextOutput = validate_report(medical_report)
+		validated_result, _ = await asyncio.to_thread(validate_report_cached, medical_report)
 
 		return ValidationResponse(cleaned_text=validated_result.cleaned_text)
 
+	except LLMCapacityError:
+		raise
 	except Exception as e:
 		logger.error(f"Error in validate_medical_report: {str(e)}")
 		raise HTTPException(
@@ -0,0 +1,192 @@
+# app/storage/artifacts_mongo.py
+"""
+Derived artifacts (e.g. validated text) shared across routes.
+
+Each artifact is stored under (kind, version, content hash) and optionally
+tagged with a case_id. `version` is the producing prompt's version, so
+changing the prompt invalidates old artifacts without deleting anything.
+A process-local LRU sits in front of MongoDB.
+"""
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+import pymongo
+from pymongo import UpdateOne
+from cachetools import LRUCache
+from app.storage.mongo_client import get_artifacts_collection
+
+ARTIFACT_CACHE_SIZE = int(os.getenv("ARTIFACT_CACHE_SIZE", "4096"))
+# After a MongoDB error, serve from memory only for this long
+ARTIFACT_MONGO_RETRY_SECONDS = float(os.getenv("ARTIFACT_MONGO_RETRY_SECONDS", "60"))
+# Lookups sit on the request path; never wait long for MongoDB
+ARTIFACT_MONGO_TIMEOUT_SECONDS = float(os.getenv("ARTIFACT_MONGO_TIMEOUT_SECONDS", "2"))
+
+_cache: LRUCache = LRUCache(maxsize=ARTIFACT_CACHE_SIZE)
+# (artifact_id, case_id) pairs already tagged by this process
+_tagged: LRUCache = LRUCache(maxsize=ARTIFACT_CACHE_SIZE)
+# Guards the caches above and the MongoDB state below (shared by request threads)
+_lock = threading.Lock()
+_mongo_down_until = 0.0
+_indexed = False
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _artifact_id(kind: str, version: str, digest: str) -> str:
+    return f"{kind}:{version}:{digest}"
+
+
+def _mongo_available() -> bool:
+    with _lock:
+        return time.monotonic() >= _mongo_down_until
+
+
+def _collection():
+    global _indexed
+    collection = get_artifacts_collection()
+    with _lock:
+        needs_index = not _indexed
+    if needs_index:
+        collection.create_index([("kind", 1), ("version", 1), ("case_ids", 1)])
+        with _lock:
+            _indexed = True
+    return collection
+
+
+def _mongo_failed(e: Exception) -> None:
+    global _mongo_down_until
+    with _lock:
+        _mongo_down_until = time.monotonic() + ARTIFACT_MONGO_RETRY_SECONDS
+    print(f"⚠️ Artifact store unavailable, using memory only: {e}")
+
+
+def get_artifact(kind: str, version: str, *, text: Optional[str] = None, case_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Look up an artifact by the text it was derived from, or by case_id."""
+    if text is None and case_id is None:
+        raise ValueError("get_artifact needs text or case_id")
+
+    artifact_id = _artifact_id(kind, version, content_hash(text)) if text is not None else None
+    if artifact_id:
+        with _lock:
+            cached = _cache.get(artifact_id)
+        if cached is not None:
+            return cached
+
+    if not _mongo_available():
+        return None
+    try:
+        query = {"_id": artifact_id} if artifact_id else {"kind": kind, "version": version, "case_ids": case_id}
+        with pymongo.timeout(ARTIFACT_MONGO_TIMEOUT_SECONDS):
+            doc = _collection().find_one(query)
+    except Exception as e:
+        _mongo_failed(e)
+        return None
+    if not doc:
+        return None
+
+    with _lock:
+        _cache[doc["_id"]] = doc["payload"]
+    return doc["payload"]
+
+
+def put_artifact(kind: str, version: str, text: str, payload: Dict[str, Any], case_id: Optional[str] = None) -> None:
+    """Store an artifact derived from `text`; a case_id is added to the artifact's cases."""
+    artifact_id = _artifact_id(kind, version, content_hash(text))
+    with _lock:
+        _cache[artifact_id] = payload
+
+    if not _mongo_available():
+        return
+    update: Dict[str, Any] = {
+        "$set": {"payload": payload, "updated_at": datetime.now(timezone.utc).isoformat()},
+        "$setOnInsert": {"kind": kind, "version": version, "content_hash": content_hash(text)},
+    }
+    if case_id:
+        update["$addToSet"] = {"case_ids": case_id}
+    try:
+        with pymongo.timeout(ARTIFACT_MONGO_TIMEOUT_SECONDS):
+            _collection().update_one({"_id": artifact_id}, update, upsert=True)
+    except Exception as e:
+        _mongo_failed(e)
+        return
+    if case_id:
+        with _lock:
+            _tagged[(artifact_id, case_id)] = True
+
+
+def tag_artifact(kind: str, version: str, text: str, case_id: str) -> None:
+    """Add case_id to an existing artifact, so later lookups by case_id find it."""
+    artifact_id = _artifact_id(kind, version, content_hash(text))
+    with _lock:
+        if (artifact_id, case_id) in _tagged:
+            return
+    if not _mongo_available():
+        return
+    try:
+        with pymongo.timeout(ARTIFACT_MONGO_TIMEOUT_SECONDS):
+            _collection().update_one({"_id": artifact_id}, {"$addToSet": {"case_ids": case_id}})
+    except Exception as e:
+        _mongo_failed(e)
+        return
+    with _lock:
+        _tagged[(artifact_id, case_id)] = True
+
+
+def get_artifacts(kind: str, version: str, texts: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Batch lookup by source text. Returns {text: payload} for the texts found."""
+    ids = {_artifact_id(kind, version, content_hash(t)): t for t in set(texts)}
+    found: Dict[str, Dict[str, Any]] = {}
+    with _lock:
+        for artifact_id, text in ids.items():
+            cached = _cache.get(artifact_id)
+            if cached is not None:
+                found[text] = cached
+
+    missing = [artifact_id for artifact_id, text in ids.items() if text not in found]
+    if not missing or not _mongo_available():
+        return found
+    try:
+        with pymongo.timeout(ARTIFACT_MONGO_TIMEOUT_SECONDS):
+            docs = list(_collection().find({"_id": {"$in": missing}}))
+    except Exception as e:
+        _mongo_failed(e)
+        return found
+
+    with _lock:
+        for doc in docs:
+            _cache[doc["_id"]] = doc["payload"]
+            found[ids[doc["_id"]]] = doc["payload"]
+    return found
+
+
+def put_artifacts(kind: str, version: str, items: Dict[str, Dict[str, Any]]) -> None:
+    """Batch store {source text: payload} in one round trip."""
+    if not items:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    ops = []
+    with _lock:
+        for text, payload in items.items():
+            artifact_id = _artifact_id(kind, version, content_hash(text))
+            _cache[artifact_id] = payload
+            ops.append(UpdateOne(
+                {"_id": artifact_id},
+                {
+                    "$set": {"payload": payload, "updated_at": now},
+                    "$setOnInsert": {"kind": kind, "version": version, "content_hash": content_hash(text)},
+                },
+                upsert=True,
+            ))
+
+    if not _mongo_available():
+        return
+    try:
+        with pymongo.timeout(ARTIFACT_MONGO_TIMEOUT_SECONDS):
+            _collection().bulk_write(ops, ordered=False)
+    except Exception as e:
+        _mongo_failed(e)
@@ -30,6 +30,15 @@ def upload_file(blob_path: str, content: bytes, content_type: str = "application
     return blob_path
 
 
+def download_file(blob_path: str) -> bytes:
+    """
+    Download a blob's content. Raises azure.core.exceptions.ResourceNotFoundError
+    if it does not exist.
+    """
+    blob_client = container_client.get_blob_client(blob_path)
+    return blob_client.download_blob().readall()
+
+
 def get_sas_url(blob_path: str) -> str:
     """
     Return a full SAS URL for accessing the blob.
@@ -0,0 +1,80 @@
+# app/storage/case_store.py
+"""
+Read-through access to a case's blobs.
+
+- cleaned.json (written once by the ingest pipeline) is cached per path.
+- Analysis results live next to the case at cases/{case_id}/analysis/{kind}.json;
+  their blob paths are also recorded on the case document (analysis_paths.{kind}).
+
+A process-local LRU sits in front of Azure Blob for both.
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from azure.core.exceptions import ResourceNotFoundError
+from cachetools import LRUCache
+from app.storage.azure_client import download_file, upload_file
+from app.storage.mongo_client import get_cases_collection
+
+CASE_BLOB_CACHE_SIZE = int(os.getenv("CASE_BLOB_CACHE_SIZE", "512"))
+
+_cache: LRUCache = LRUCache(maxsize=CASE_BLOB_CACHE_SIZE)
+_lock = threading.Lock()
+
+
+def analysis_path(case_id: str, kind: str) -> str:
+    return f"cases/{case_id}/analysis/{kind}.json"
+
+
+def _read_json(blob_path: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        cached = _cache.get(blob_path)
+    if cached is not None:
+        return cached
+    try:
+        payload = json.loads(download_file(blob_path))
+    except ResourceNotFoundError:
+        return None
+    with _lock:
+        _cache[blob_path] = payload
+    return payload
+
+
+def load_cleaned_payload(case: Dict[str, Any]) -> Dict[str, Any]:
+    """The case's cleaned.json (CleanedPayload fields). Raises LookupError if missing."""
+    cleaned_path = case.get("cleaned_path")
+    payload = _read_json(cleaned_path) if cleaned_path else None
+    if payload is None:
+        raise LookupError(f"cleaned payload not found for case {case.get('_id')}")
+    return payload
+
+
+def load_analysis(case_id: str, kind: str) -> Optional[Dict[str, Any]]:
+    """Stored analysis of this kind for the case, or None."""
+    return _read_json(analysis_path(case_id, kind))
+
+
+def save_analysis(case_id: str, kind: str, document: Dict[str, Any]) -> str:
+    """Write an analysis next to the case and record its path on the case document."""
+    blob_path = analysis_path(case_id, kind)
+    upload_file(blob_path, json.dumps(document, indent=2, ensure_ascii=False).encode("utf-8"), content_type="application/json")
+    with _lock:
+        _cache[blob_path] = document
+    get_cases_collection().update_one(
+        {"_id": case_id},
+        {"$set": {
+            f"analysis_paths.{kind}": blob_path,
+            f"analysis_updated_at.{kind}": datetime.now(timezone.utc).isoformat(),
+        }},
+    )
+    return blob_path
+
+
+def forget_case(case_id: str) -> None:
+    """Drop cached blobs of a case (e.g. after its files were deleted)."""
+    prefix = f"cases/{case_id}/"
+    with _lock:
+        for blob_path in [p for p in _cache.keys() if p.startswith(prefix)]:
+            _cache.pop(blob_path, None)
@@ -1,4 +1,5 @@
 # app/storage/cases_mongo.py
+from datetime import datetime, timezone
 from app.storage.mongo_client import get_cases_collection
 
 def save_case_mongo(case: dict):
@@ -23,3 +24,20 @@ def get_case_by_id(case_id: str):
     """Fetch a case by case_id"""
     cases = get_cases_collection()
     return cases.find_one({"_id": case_id})
+
+def update_precompute_status(case_id: str, fields: dict, completed: str = None):
+    """Update the case's precompute progress (fields are relative to "precompute")"""
+    update = {}
+    if fields:
+        update["$set"] = {f"precompute.{k}": v for k, v in fields.items()}
+    if completed:
+        update["$addToSet"] = {"precompute.completed": completed}
+    if update:
+        get_cases_collection().update_one({"_id": case_id}, update)
+
+def mark_case_indexed(case_id: str, chunker_version: str):
+    """Record which chunker version the case's vectors were built with"""
+    get_cases_collection().update_one(
+        {"_id": case_id},
+        {"$set": {"index_chunker_version": chunker_version, "indexed_at": datetime.now(timezone.utc).isoformat()}},
+    )
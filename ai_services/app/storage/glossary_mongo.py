@@ -0,0 +1,36 @@
+# app/storage/glossary_mongo.py
+"""
+Persistent medical glossary, one document per canonical term:
+
+    {_id: "hdl", term: "HDL", explanation: "...", is_term: true, source: "llm", updated_at}
+
+is_term=false marks candidates the LLM said are not medical terms, so
+they are not asked about again.
+"""
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import pymongo
+from pymongo import UpdateOne
+from app.storage.mongo_client import get_glossary_collection
+
+GLOSSARY_MONGO_TIMEOUT_SECONDS = float(os.getenv("GLOSSARY_MONGO_TIMEOUT_SECONDS", "2"))
+
+
+def load_glossary() -> List[Dict[str, Any]]:
+    """All glossary entries (small: one row per distinct term ever seen)."""
+    with pymongo.timeout(GLOSSARY_MONGO_TIMEOUT_SECONDS):
+        return list(get_glossary_collection().find({}))
+
+
+def upsert_terms(entries: List[Dict[str, Any]]) -> None:
+    """Insert or update entries keyed by their canonical _id."""
+    if not entries:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    ops = [
+        UpdateOne({"_id": e["_id"]}, {"$set": {**{k: v for k, v in e.items() if k != "_id"}, "updated_at": now}}, upsert=True)
+        for e in entries
+    ]
+    with pymongo.timeout(GLOSSARY_MONGO_TIMEOUT_SECONDS):
+        get_glossary_collection().bulk_write(ops, ordered=False)
@@ -26,3 +26,9 @@ def get_cases_collection():
 
 def get_conversations_collection():
     return db["conversations"]
+
+def get_artifacts_collection():
+    return db["artifacts"]
+
+def get_glossary_collection():
+    return db["medical_glossary"]
@@ -1,43 +1,89 @@
 # app/storage/qdrant_client.py
+import functools
 import os
+import threading
+from typing import Optional
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Qdrant   # ✅ use community version
+from app.vector.collection import collection_verified, create_collection, is_missing_collection_error, mark_verified
+from app.vector.embedding_service import ServiceEmbeddings, embedding_service
 
-# Load env vars
-QDRANT_URL = os.getenv("QDRANT_URL")
+# Load env vars (embedding model: HF_EMBED_MODEL / EMBED_MODEL, see embedding_service)
+QDRANT_URL = os.getenv("QDRANT_URL")  # e.g. https://xxx.qdrant.cloud
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
-EMBED_MODEL = os.getenv("HF_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# server: QDRANT_URL | local: embedded, persisted under QDRANT_PATH | memory: embedded, in-process only
+QDRANT_MODE = os.getenv("QDRANT_MODE", "server").lower()
+QDRANT_PATH = os.getenv("QDRANT_PATH", "qdrant_data")
+
+QDRANT_MODES = ("server", "local", "memory")
+
+
+class LocalQdrantClient(QdrantClient):
+    """
+    Embedded (local/memory) client. The embedded engine is not thread-safe,
+    so every call is serialized; it also locks QDRANT_PATH to one process,
+    so run a single worker in this mode.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._call_lock = threading.RLock()
+        super().__init__(*args, **kwargs)
+
+
+def _serialized(method):
+    @functools.wraps(method)
+    def call(self, *args, **kwargs):
+        with self._call_lock:
+            return method(self, *args, **kwargs)
+    return call
+
+
+for _name, _attr in list(vars(QdrantClient).items()):
+    if not _name.startswith("_") and callable(_attr):
+        setattr(LocalQdrantClient, _name, _serialized(_attr))
+
+_client: Optional[QdrantClient] = None
+_client_lock = threading.Lock()
+
+
+def get_qdrant_client() -> QdrantClient:
+    """The process-wide Qdrant client (indexer, retriever and chatbot share it)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if QDRANT_MODE not in QDRANT_MODES:
+                raise ValueError(f"Unknown QDRANT_MODE '{QDRANT_MODE}' (expected one of {QDRANT_MODES})")
+            if QDRANT_MODE == "memory":
+                _client = LocalQdrantClient(location=":memory:")
+            elif QDRANT_MODE == "local":
+                _client = LocalQdrantClient(path=QDRANT_PATH)
+            else:
+                _client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+            if QDRANT_MODE != "server":
+                print(f"✅ Using embedded Qdrant ({QDRANT_MODE}{': ' + QDRANT_PATH if QDRANT_MODE == 'local' else ''})")
+        return _client
+
 
 # Init client + embeddings
-qdrant_client = QdrantClient(
-    url=QDRANT_URL,
-    api_key=QDRANT_API_KEY,
-)
+qdrant_client = get_qdrant_client()
 
-embeddings = HuggingFaceEmbeddings(model_name=EMBED_MODEL)
+# Same in-process model as indexing/retrieval
+embeddings = ServiceEmbeddings(embedding_service)
 
 def get_or_create_collection(name: str):
-    """Ensure collection exists in Qdrant"""
+    """Ensure collection exists in Qdrant (same quantized/on-disk layout as the case index)"""
+    # Checked once per process / TTL, not on every chat query
+    if collection_verified(qdrant_client, name):
+        return
     try:
         qdrant_client.get_collection(name)
-    except Exception:
-        qdrant_client.create_collection(
-            collection_name=name,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-        )
-        # ✅ add payload indexes for filtering
-        qdrant_client.create_payload_index(
-            collection_name=name,
-            field_name="user_id",
-            field_schema="keyword"
-        )
-        qdrant_client.create_payload_index(
-            collection_name=name,
-            field_name="case_id",
-            field_schema="keyword"
-        )
+    except Exception as e:
+        # Transient errors must not create a second collection
+        if not is_missing_collection_error(e):
+            raise
+        # ✅ add payload indexes for filtering (dense only: LangChain store, no hybrid search)
+        create_collection(qdrant_client, name, index_fields=("user_id", "case_id"), sparse_vectors_config=None)
+    mark_verified(qdrant_client, name)
 
 
 def get_qdrant_vectorstore(collection_name: str):
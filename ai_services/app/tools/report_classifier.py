@@ -2,6 +2,8 @@
 from __future__ import annotations
 import os, re
 from typing import Optional, Tuple
+from app.llm.rate_limiter import gemini_limiter, estimate_tokens
+from app.llm.factory import LLM_BACKEND
 
 # ---------------------------
 # Deterministic patterns
@@ -99,7 +101,7 @@ def classify_by_llm(header: str) -> Optional[str]:
     if os.getenv("USE_LLM_FALLBACK", "false").lower() != "true":
         return None
     api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
+    if not api_key or LLM_BACKEND == "fake":
         return None
 
     model_name = os.getenv("LLM_FALLBACK_MODEL", "gemini-1.5-flash")
@@ -122,14 +124,15 @@ def classify_by_llm(header: str) -> Optional[str]:
     "If uncertain, output exactly: Unknown Report.\n\n"
     f"Snippet:\n{_safe_header_summary(header)}"
         )
-        resp = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.0,
-                "max_output_tokens": 8,
-            },
-            safety_settings=[],
-        )
+        with gemini_limiter.lease(estimate_tokens(prompt)):
+            resp = model.generate_content(
+                prompt,
+                generation_config={
+                    "temperature": 0.0,
+                    "max_output_tokens": 8,
+                },
+                safety_settings=[],
+            )
         text = (resp.text or "").strip()
         text = re.sub(r"[\r\n]+", " ", text)
         if not text or text.lower().startswith("unknown"):
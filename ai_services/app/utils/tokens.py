@@ -0,0 +1,7 @@
+# app/utils/tokens.py
+"""Token estimates shared by the LLM limiter and the chunker (no model or tokenizer needed)."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return len(text) // 4 + 1
@@ -0,0 +1,150 @@
+# app/vector/chunker.py
+"""
+Chunking of a case for the vector index.
+
+Version 2 (default):
+- sections: lines are grouped up to CHUNK_TARGET_TOKENS without crossing
+  a section boundary; each chunk starts with its section name and repeats
+  the last lines of the previous chunk (up to CHUNK_OVERLAP_TOKENS) so a
+  finding split across chunks keeps its context.
+- panels: one chunk per panel table ("LIPID PROFILE: LDL 162 mg/dL
+  (ref: < 130); ..."), split only above CHUNK_MAX_TOKENS (the model's
+  input limit), with the panel title repeated.
+
+Version 1 is the previous layout (one chunk per section line and per lab
+item), kept so an index built with it can still be diffed.
+
+The version is stored with every point and on the case document
+(index_chunker_version). Changing the strategy means bumping
+CHUNKER_VERSION; `scripts/reindex_cases.py --stale-only` then re-chunks
+just the cases indexed with another version, and the content-derived
+point IDs let it keep chunks that did not change.
+"""
+import os
+import re
+from typing import Any, Dict, Iterable, List
+
+from app.utils.tokens import estimate_tokens
+
+CHUNKER_VERSION = os.getenv("CHUNKER_VERSION", "2")
+CHUNK_TARGET_TOKENS = int(os.getenv("CHUNK_TARGET_TOKENS", "96"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "16"))
+# all-MiniLM-L6-v2 truncates its input at 256 word pieces
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+
+_SENTENCE_END = re.compile(r"(?<=[.;!?])\s+")
+
+
+def _split_long_line(line: str, limit: int) -> List[str]:
+    """Break a line above the limit at sentence ends, then at spaces."""
+    if estimate_tokens(line) <= limit:
+        return [line]
+    parts: List[str] = []
+    current = ""
+    for piece in _SENTENCE_END.split(line):
+        words = piece.split(" ") if estimate_tokens(piece) > limit else [piece]
+        for word in words:
+            candidate = f"{current} {word}".strip()
+            if current and estimate_tokens(candidate) > limit:
+                parts.append(current)
+                current = word
+            else:
+                current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_section(name: str, text: str) -> List[str]:
+    """Group a section's lines into chunks of ~CHUNK_TARGET_TOKENS with line overlap."""
+    header = f"{name.upper()}:"
+    lines: List[str] = []
+    for raw in text.split("\n"):
+        if raw.strip():
+            lines.extend(_split_long_line(raw.strip(), CHUNK_TARGET_TOKENS))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    fresh = 0  # lines in current that are not overlap from the previous chunk
+    for line in lines:
+        if fresh and estimate_tokens("\n".join([header, *current, line])) > CHUNK_TARGET_TOKENS:
+            chunks.append("\n".join([header, *current]))
+            overlap: List[str] = []
+            for previous in reversed(current):
+                if estimate_tokens("\n".join([previous, *overlap])) > CHUNK_OVERLAP_TOKENS:
+                    break
+                overlap.insert(0, previous)
+            current, fresh = overlap, 0
+        current.append(line)
+        fresh += 1
+    if fresh:
+        chunks.append("\n".join([header, *current]))
+    return chunks
+
+
+def _item_text(item: Dict[str, Any]) -> str:
+    text = f"{item.get('name')}: {item.get('result')}"
+    if item.get("unit"):
+        text += f" {item['unit']}"
+    if item.get("ref_text"):
+        text += f" (ref: {item['ref_text']})"
+    if item.get("flag"):
+        text += f" [{item['flag']}]"
+    return text
+
+
+def chunk_panel(panel: Dict[str, Any]) -> List[str]:
+    """One chunk per panel table, split only when it would exceed CHUNK_MAX_TOKENS."""
+    title = f"{(panel.get('title') or 'LAB RESULTS').upper()}:"
+    items = [
+        _item_text(item) for item in panel.get("items", [])
+        if item.get("name") and item.get("result") is not None
+    ]
+    chunks: List[str] = []
+    current: List[str] = []
+    for item in items:
+        if current and estimate_tokens(" ".join([title, *current, item])) > CHUNK_MAX_TOKENS:
+            chunks.append(f"{title} " + "; ".join(current))
+            current = []
+        current.append(item)
+    if current:
+        chunks.append(f"{title} " + "; ".join(current))
+    return chunks
+
+
+def _chunk_case_v1(cleaned: Dict[str, Any], panels: Iterable[Dict[str, Any]]) -> List[str]:
+    chunks = []
+    for key, val in cleaned.get("sections", {}).items():
+        if isinstance(val, str) and val.strip():
+            for part in val.split("\n"):
+                if part.strip():
+                    chunks.append(f"{key.upper()}: {part.strip()}")
+    for p in panels:
+        for item in p.get("items", []):
+            name = item.get("name")
+            result = item.get("result")
+            unit = item.get("unit", "")
+            ref = item.get("ref_text", "")
+            if name and result is not None:
+                chunks.append(f"{name}: {result} {unit} (ref: {ref})")
+    return chunks
+
+
+def _chunk_case_v2(cleaned: Dict[str, Any], panels: Iterable[Dict[str, Any]]) -> List[str]:
+    chunks = []
+    for key, val in cleaned.get("sections", {}).items():
+        if isinstance(val, str) and val.strip():
+            chunks.extend(chunk_section(key, val))
+    for panel in panels:
+        chunks.extend(chunk_panel(panel))
+    return chunks
+
+
+CHUNKERS = {"1": _chunk_case_v1, "2": _chunk_case_v2}
+
+
+def chunk_case(cleaned: Dict[str, Any], panels: Iterable[Dict[str, Any]], version: str = CHUNKER_VERSION) -> List[str]:
+    """Chunk texts for a case from its cleaned.json and panels.json contents."""
+    if version not in CHUNKERS:
+        raise ValueError(f"Unknown CHUNKER_VERSION '{version}' (expected one of {sorted(CHUNKERS)})")
+    return CHUNKERS[version](cleaned, panels or [])
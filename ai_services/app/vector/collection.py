@@ -0,0 +1,343 @@
+# app/vector/collection.py
+"""
+Qdrant collection layout shared by the indexer, the retriever and the
+chatbot stores.
+
+- Vectors: int8 scalar quantization by default (QDRANT_QUANTIZATION=scalar),
+  4x smaller than float32 and kept in RAM, while the original vectors and
+  the payloads live on disk. Searches over-fetch on the quantized vectors
+  and rescore the candidates with the originals.
+  "binary" (32x smaller) only holds recall on models with >= 1024 dims;
+  "none" keeps the old full-float32 layout.
+- HNSW: QDRANT_HNSW_M / QDRANT_HNSW_EF_CONSTRUCT at build time,
+  QDRANT_SEARCH_HNSW_EF at query time.
+- Sparse: next to the unnamed dense vector, the case index stores a BM25
+  sparse vector (SPARSE_VECTOR_NAME, see sparse.py) for hybrid retrieval
+  (QDRANT_SPARSE_VECTORS). has_sparse_vectors() tells callers whether a
+  collection has it; one created before it is upgraded by
+  migrate_collection(), which computes the sparse vectors from the stored
+  chunk text while copying.
+
+ensure_collection() verifies a collection (and its payload indexes) once
+per process and then every QDRANT_COLLECTION_CHECK_TTL_SECONDS (0 = once
+per process); in between it costs no round trip. If the collection
+disappears anyway, the failing call is detected by with_collection(),
+which re-verifies and retries once.
+
+Collections are served through an alias (the QDRANT_COLLECTION name) so a
+layout change is applied by migrate_collection(): build a new physical
+collection, copy the points, and switch the alias atomically. Compare
+settings on real data with scripts/bench_qdrant_config.py before changing
+the defaults.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from app.vector import sparse
+from app.vector.embedding_service import EMBED_DIM
+
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "scalar").lower()  # scalar | binary | none
+QDRANT_QUANTIZATION_QUANTILE = float(os.getenv("QDRANT_QUANTIZATION_QUANTILE", "0.99"))
+QDRANT_ON_DISK_VECTORS = os.getenv("QDRANT_ON_DISK_VECTORS", "true").lower() == "true"
+QDRANT_ON_DISK_PAYLOAD = os.getenv("QDRANT_ON_DISK_PAYLOAD", "true").lower() == "true"
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", "16"))
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100"))
+QDRANT_SEARCH_HNSW_EF = int(os.getenv("QDRANT_SEARCH_HNSW_EF", "128"))
+QDRANT_RESCORE = os.getenv("QDRANT_RESCORE", "true").lower() == "true"
+QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))
+QDRANT_SPARSE_VECTORS = os.getenv("QDRANT_SPARSE_VECTORS", "true").lower() == "true"
+QDRANT_COLLECTION_CHECK_TTL_SECONDS = float(os.getenv("QDRANT_COLLECTION_CHECK_TTL_SECONDS", "600"))
+
+QUANTIZATION_MODES = ("scalar", "binary", "none")
+# Filter fields of the case index (all keyword)
+CASE_INDEX_FIELDS = ("case_id", "user_id", "report_name", "doctor", "hospital")
+SPARSE_VECTOR_NAME = "bm25"
+
+
+def quantization_config(mode: str = QDRANT_QUANTIZATION) -> Optional[models.QuantizationConfig]:
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown QDRANT_QUANTIZATION '{mode}' (expected one of {QUANTIZATION_MODES})")
+    if mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=QDRANT_QUANTIZATION_QUANTILE,
+                always_ram=True,
+            )
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def collection_params(
+    quantization: str = QDRANT_QUANTIZATION,
+    on_disk_vectors: bool = QDRANT_ON_DISK_VECTORS,
+    on_disk_payload: bool = QDRANT_ON_DISK_PAYLOAD,
+    hnsw_m: int = QDRANT_HNSW_M,
+    hnsw_ef_construct: int = QDRANT_HNSW_EF_CONSTRUCT,
+    sparse_vectors: bool = QDRANT_SPARSE_VECTORS,
+) -> Dict[str, object]:
+    """create_collection kwargs for the configured layout."""
+    sparse_config = None
+    if sparse_vectors:
+        sparse_config = {
+            SPARSE_VECTOR_NAME: models.SparseVectorParams(
+                index=models.SparseIndexParams(on_disk=on_disk_vectors),
+                modifier=models.Modifier.IDF,
+            )
+        }
+    return {
+        "vectors_config": models.VectorParams(size=EMBED_DIM, distance=models.Distance.COSINE, on_disk=on_disk_vectors),
+        "sparse_vectors_config": sparse_config,
+        "quantization_config": quantization_config(quantization),
+        "hnsw_config": models.HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct),
+        "on_disk_payload": on_disk_payload,
+        # One shard: indexer.wait_for_writes() relies on a single WAL per
+        # collection (its barrier is routed to the shard owning one point ID)
+        "shard_number": 1,
+    }
+
+
+def search_params(hnsw_ef: int = QDRANT_SEARCH_HNSW_EF, exact: bool = False) -> models.SearchParams:
+    """Query-time parameters matching the collection layout."""
+    quantization = None
+    if QDRANT_QUANTIZATION != "none":
+        quantization = models.QuantizationSearchParams(
+            ignore=False, rescore=QDRANT_RESCORE, oversampling=QDRANT_OVERSAMPLING
+        )
+    return models.SearchParams(hnsw_ef=hnsw_ef, exact=exact, quantization=quantization)
+
+
+def create_collection(
+    client: QdrantClient,
+    name: str,
+    index_fields: Iterable[str] = CASE_INDEX_FIELDS,
+    **overrides: object,
+) -> None:
+    client.create_collection(collection_name=name, **{**collection_params(), **overrides})
+    for field in index_fields:
+        client.create_payload_index(collection_name=name, field_name=field, field_schema="keyword")
+
+
+# -----------------------------
+# Verification cache
+# -----------------------------
+T = TypeVar("T")
+
+_verified: Dict[Tuple[int, str], float] = {}
+# Whether a verified collection has the sparse (BM25) vector
+_sparse: Dict[Tuple[int, str], bool] = {}
+_verified_lock = threading.Lock()
+
+
+def collection_verified(client: QdrantClient, name: str) -> bool:
+    """True if `name` was verified on this client within the TTL."""
+    with _verified_lock:
+        checked_at = _verified.get((id(client), name))
+    if checked_at is None:
+        return False
+    return QDRANT_COLLECTION_CHECK_TTL_SECONDS <= 0 or time.monotonic() - checked_at < QDRANT_COLLECTION_CHECK_TTL_SECONDS
+
+
+def mark_verified(client: QdrantClient, name: str, sparse_vectors: Optional[bool] = None) -> None:
+    with _verified_lock:
+        _verified[(id(client), name)] = time.monotonic()
+        if sparse_vectors is not None:
+            _sparse[(id(client), name)] = sparse_vectors
+
+
+def invalidate(client: QdrantClient, name: str) -> None:
+    with _verified_lock:
+        _verified.pop((id(client), name), None)
+        _sparse.pop((id(client), name), None)
+
+
+def has_sparse_vectors(client: QdrantClient, name: str, index_fields: Iterable[str] = CASE_INDEX_FIELDS) -> bool:
+    """True if `name` stores SPARSE_VECTOR_NAME (collections created before hybrid retrieval do not)."""
+    ensure_collection(client, name, index_fields)
+    with _verified_lock:
+        return _sparse.get((id(client), name), False)
+
+
+def is_missing_collection_error(exc: BaseException) -> bool:
+    if isinstance(exc, UnexpectedResponse) and exc.status_code == 404:
+        return True
+    # Embedded mode raises ValueError("Collection ... not found")
+    text = str(exc).lower()
+    return "collection" in text and "not found" in text
+
+
+def with_collection(
+    client: QdrantClient,
+    name: str,
+    fn: Callable[..., T],
+    *args: Any,
+    index_fields: Iterable[str] = CASE_INDEX_FIELDS,
+    **kwargs: Any,
+) -> T:
+    """Run fn against a verified collection; if it turns out to be gone, recreate it and retry once."""
+    ensure_collection(client, name, index_fields)
+    try:
+        return fn(*args, **kwargs)
+    except Exception as e:
+        if not is_missing_collection_error(e):
+            raise
+        print(f"⚠️ Qdrant collection {name} missing, re-creating: {e}")
+        invalidate(client, name)
+        ensure_collection(client, name, index_fields)
+        return fn(*args, **kwargs)
+
+
+def ensure_collection(client: QdrantClient, name: str, index_fields: Iterable[str] = CASE_INDEX_FIELDS) -> bool:
+    """
+    Make sure `name` (an alias or a collection) exists with its payload
+    indexes. New collections are created as {name}_{timestamp} behind the
+    alias `name`. Returns True if it had to be created. Cached per process,
+    see QDRANT_COLLECTION_CHECK_TTL_SECONDS.
+    """
+    if collection_verified(client, name):
+        return False
+
+    index_fields = tuple(index_fields)
+    try:
+        info = client.get_collection(name)
+    except Exception as e:
+        # Only a definite "not found" may create: after a timeout or 5xx the
+        # collection probably exists, and creating would orphan a new one or
+        # repoint the alias
+        if not is_missing_collection_error(e):
+            raise
+        info = None
+
+    if info is not None:
+        missing = set(index_fields) - set((info.payload_schema or {}).keys())
+        for field in missing:
+            client.create_payload_index(collection_name=name, field_name=field, field_schema="keyword")
+            print(f"✅ Added missing index: {field}")
+        if (info.config.params.shard_number or 1) > 1:
+            print(f"⚠️ Qdrant collection {name} has {info.config.params.shard_number} shards: "
+                  f"indexer.wait_for_writes() only covers one, migrate it with scripts/migrate_collection.py")
+        mark_verified(client, name, SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {}))
+        return False
+
+    physical = f"{name}_{int(time.time())}"
+    create_collection(client, physical, index_fields)
+    client.update_collection_aliases(change_aliases_operations=[
+        models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=physical, alias_name=name))
+    ])
+    print(f"✅ Created Qdrant collection {physical} (alias {name}, quantization={QDRANT_QUANTIZATION})")
+    mark_verified(client, name, QDRANT_SPARSE_VECTORS)
+    return True
+
+
+# -----------------------------
+# Migration
+# -----------------------------
+def resolve_alias(client: QdrantClient, name: str) -> Optional[str]:
+    """Physical collection behind alias `name`, or None if `name` is not an alias."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return None
+
+
+def _copied_vector(point: models.Record, with_sparse: bool) -> models.VectorStruct:
+    """Dense vector of a scrolled point, plus its sparse vector (recomputed from the chunk) if the target has one."""
+    dense = point.vector.get("") if isinstance(point.vector, dict) else point.vector
+    if not with_sparse:
+        return dense
+    return {"": dense, SPARSE_VECTOR_NAME: sparse.document_vector((point.payload or {}).get("chunk") or "")}
+
+
+def _copy_points(
+    client: QdrantClient,
+    source: str,
+    target: str,
+    batch_size: int,
+    only_missing: bool = False,
+    with_sparse: bool = False,
+) -> int:
+    copied = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source, limit=batch_size, offset=offset, with_payload=True, with_vectors=True
+        )
+        if only_missing and points:
+            present = {p.id for p in client.retrieve(target, ids=[p.id for p in points], with_payload=False)}
+            points = [p for p in points if p.id not in present]
+        if points:
+            client.upsert(
+                collection_name=target,
+                points=[models.PointStruct(id=p.id, vector=_copied_vector(p, with_sparse), payload=p.payload) for p in points],
+                wait=True,
+            )
+            copied += len(points)
+        if offset is None:
+            return copied
+
+
+def migrate_collection(
+    client: QdrantClient,
+    name: str,
+    index_fields: Iterable[str] = CASE_INDEX_FIELDS,
+    batch_size: int = 256,
+    keep_old: bool = False,
+    **overrides: object,
+) -> Dict[str, Union[str, int]]:
+    """
+    Rebuild the collection behind `name` with the current layout (plus
+    overrides) while it keeps serving:
+
+    1. create {name}_{timestamp} and copy all points into it
+    2. copy points added to the old collection during step 1
+    3. point the alias `name` at the new collection (atomic), then drop
+       the old one unless keep_old
+
+    A legacy deployment where `name` is a plain collection rather than an
+    alias has to drop it before the alias can take its name; queries in
+    that instant fail and are retried by callers. Deletions made during
+    the copy are not replayed: run scripts/reindex_cases.py afterwards to
+    reconcile (it is incremental and cheap when nothing changed).
+    """
+    index_fields = tuple(index_fields)
+    source = resolve_alias(client, name) or name
+    target = f"{name}_{int(time.time())}"
+    if target == source:
+        target = f"{target}_1"
+
+    started = time.perf_counter()
+    create_collection(client, target, index_fields, **overrides)
+    with_sparse = bool({**collection_params(), **overrides}.get("sparse_vectors_config"))
+    copied = _copy_points(client, source, target, batch_size, with_sparse=with_sparse)
+    caught_up = _copy_points(client, source, target, batch_size, only_missing=True, with_sparse=with_sparse)
+
+    operations: List[models.AliasOperations] = []
+    if source != name:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=name)))
+    else:
+        client.delete_collection(name)
+    operations.append(models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=target, alias_name=name)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+    if source != name and not keep_old:
+        client.delete_collection(source)
+    invalidate(client, name)
+
+    stats = {
+        "alias": name,
+        "source": source,
+        "target": target,
+        "copied": copied + caught_up,
+        "caught_up": caught_up,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+    print(f"✅ Migrated {name}: {stats}")
+    return stats
@@ -0,0 +1,228 @@
+# app/vector/embedding_cache.py
+"""
+Content-addressed cache of chunk/query embeddings.
+
+Many chunks are identical across cases and users (section headings,
+"TESTS: - Hemoglobin: ..." lines), so vectors are keyed by model name +
+sha256 of the text and encoded once.
+
+- Disk: per model, a memory-mapped float32 matrix (vectors.f32, grown in
+  place) plus a SQLite index {text hash -> row}. Worker processes on the
+  node share it; SQLite serializes row allocation.
+- Memory: an LRU of recently used vectors in front of the disk store.
+
+Use encode() instead of calling the model directly:
+
+    vectors = get_embedding_cache(EMBED_MODEL, 384).encode(texts, encoder_fn)
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from cachetools import LRUCache
+
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "medscribe", "embeddings"))
+EMBED_CACHE_LRU_SIZE = int(os.getenv("EMBED_CACHE_LRU_SIZE", "20000"))
+# Rows the memmap grows by at a time
+EMBED_CACHE_GROW_ROWS = int(os.getenv("EMBED_CACHE_GROW_ROWS", "65536"))
+
+EncodeFn = Callable[[List[str]], List[List[float]]]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, dim: int, cache_dir: str = EMBED_CACHE_DIR):
+        self.model_name = model_name
+        self.dim = dim
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)[-60:]
+        self.path = os.path.join(cache_dir, f"{slug}-{text_hash(model_name)[:8]}-{dim}")
+        os.makedirs(self.path, exist_ok=True)
+        self._vectors_path = os.path.join(self.path, "vectors.f32")
+        self._db_path = os.path.join(self.path, "index.sqlite3")
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._lru: LRUCache = LRUCache(maxsize=EMBED_CACHE_LRU_SIZE)
+        self._mmap: Optional[np.memmap] = None
+        self._stats = {
+            "lookups": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "encoded": 0, "encode_seconds": 0.0,
+        }
+
+        with self._db() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS vectors (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('model', ?)", (model_name,))
+        if not os.path.exists(self._vectors_path):
+            open(self._vectors_path, "ab").close()
+
+    # -----------------------------
+    # Storage
+    # -----------------------------
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _capacity(self) -> int:
+        return os.path.getsize(self._vectors_path) // (4 * self.dim)
+
+    def _matrix(self, min_rows: int) -> np.memmap:
+        """Memmap covering at least min_rows rows (remapped if the file grew)."""
+        if self._mmap is None or self._mmap.shape[0] < min_rows:
+            rows = self._capacity()
+            if rows < min_rows:
+                raise LookupError(f"embedding cache row {min_rows - 1} beyond {self._vectors_path}")
+            self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+        return self._mmap
+
+    def _grow(self, min_rows: int) -> None:
+        rows = self._capacity()
+        if rows >= min_rows:
+            return
+        rows = max(min_rows, rows + EMBED_CACHE_GROW_ROWS)
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(rows * 4 * self.dim)
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vector per text, or None."""
+        keys = [text_hash(t) for t in texts]
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is not None:
+                    found[key] = vector
+        in_memory = set(found)
+
+        missing = list({k for k in keys if k not in found})
+        if missing:
+            rows: Dict[str, int] = {}
+            db = self._db()
+            for start in range(0, len(missing), 500):
+                part = missing[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows.update(db.execute(f"SELECT hash, row FROM vectors WHERE hash IN ({placeholders})", part).fetchall())
+            if rows:
+                with self._lock:
+                    matrix = self._matrix(max(rows.values()) + 1)
+                    for key, row in rows.items():
+                        vector = matrix[row].tolist()
+                        found[key] = vector
+                        self._lru[key] = vector
+
+        with self._lock:
+            self._stats["lookups"] += len(keys)
+            for key in keys:
+                if key in in_memory:
+                    self._stats["memory_hits"] += 1
+                elif key in found:
+                    self._stats["disk_hits"] += 1
+                else:
+                    self._stats["misses"] += 1
+        return [found.get(key) for key in keys]
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        entries = {text_hash(t): v for t, v in zip(texts, vectors)}
+        if not entries:
+            return
+        db = self._db()
+        # BEGIN IMMEDIATE takes the write lock: row allocation and the vector
+        # writes are serialized across processes, and rows only become
+        # visible once their vectors are on disk.
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            placeholders = ",".join("?" * len(entries))
+            known = {h for (h,) in db.execute(f"SELECT hash FROM vectors WHERE hash IN ({placeholders})", list(entries))}
+            new = [key for key in entries if key not in known]
+            if new:
+                next_row = db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()[0]
+                self._grow(next_row + len(new))
+                with self._lock:
+                    matrix = self._matrix(next_row + len(new))
+                    for i, key in enumerate(new):
+                        matrix[next_row + i] = np.asarray(entries[key], dtype=np.float32)
+                    matrix.flush()
+                db.executemany(
+                    "INSERT INTO vectors (hash, row) VALUES (?, ?)",
+                    [(key, next_row + i) for i, key in enumerate(new)],
+                )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        with self._lock:
+            for key, vector in entries.items():
+                self._lru[key] = list(vector)
+
+    def encode(self, texts: Sequence[str], encode_fn: EncodeFn) -> List[List[float]]:
+        """Vectors for texts; only texts not cached yet (deduplicated) go to encode_fn."""
+        if not EMBED_CACHE_ENABLED:
+            return [list(v) for v in encode_fn(list(texts))]
+
+        vectors = self.get_many(texts)
+        todo = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if todo:
+            started = time.perf_counter()
+            encoded = [list(v) for v in encode_fn(todo)]
+            self.record_encoded(len(todo), time.perf_counter() - started)
+            self.put_many(todo, encoded)
+            by_text = dict(zip(todo, encoded))
+            vectors = [v if v is not None else by_text[t] for t, v in zip(texts, vectors)]
+        return vectors
+
+    # -----------------------------
+    # Stats
+    # -----------------------------
+    def record_encoded(self, count: int, seconds: float) -> None:
+        """Count texts encoded after a miss (also used by callers that encode elsewhere)."""
+        with self._lock:
+            self._stats["encoded"] += count
+            self._stats["encode_seconds"] += seconds
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            s = dict(self._stats)
+            s["memory_entries"] = len(self._lru)
+        hits = s["memory_hits"] + s["disk_hits"]
+        per_text = s["encode_seconds"] / s["encoded"] if s["encoded"] else 0.0
+        s["hit_rate"] = round(hits / s["lookups"], 4) if s["lookups"] else 0.0
+        s["encode_seconds"] = round(s["encode_seconds"], 3)
+        # Model time not spent (cache hits and repeats within a batch), at the observed per-text cost
+        s["encode_seconds_saved"] = round(max(0, s["lookups"] - s["encoded"]) * per_text, 3)
+        s["model"] = self.model_name
+        return s
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str, dim: int) -> EmbeddingCache:
+    """One cache per model and process."""
+    key = f"{model_name}:{dim}"
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(model_name, dim)
+        return _caches[key]
+
+
+def stats() -> Dict[str, object]:
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {"enabled": EMBED_CACHE_ENABLED, "models": [c.stats() for c in caches]}
@@ -0,0 +1,314 @@
+# app/vector/embedding_service.py
+"""
+The one sentence-embedding model of a worker process.
+
+Indexing, case retrieval and the chatbot's LangChain vector stores all
+encode through `embedding_service`, so the model is loaded once, on first
+use, instead of once per module at import time.
+
+- encode(texts) / aencode(texts): batched, through the embedding cache.
+- encode_query(text) / aencode_query(text): query vectors are kept in a
+  TTL LRU keyed by the normalized query (unicode, whitespace, case,
+  trailing punctuation),
+  and concurrent callers with the same query share one encode, so a chat
+  turn (long-term memory search + case retrieval per case) encodes its
+  query once. Misses from concurrent requests are collected for up to
+  EMBED_MICROBATCH_WAIT_MS and encoded in one forward pass.
+- EMBED_THREADS caps the torch intra-op threads used by the model.
+
+EMBED_BACKEND selects the runtime: "torch" (default) or "onnx", an int8
+dynamically quantized ONNX export of the same model run by ONNX Runtime
+(needs requirements-onnx.txt). The export is taken from the model
+repo (EMBED_ONNX_FILE) or, if it has none, quantized locally on first
+load. Vectors stay within ~0.99 cosine of the torch ones (see
+scripts/bench_embeddings.py), so an existing index keeps
+working; cached vectors are kept apart per backend.
+"""
+import asyncio
+import os
+import queue
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cachetools import TTLCache
+from langchain_core.embeddings import Embeddings
+
+from app.vector.embedding_cache import EMBED_CACHE_ENABLED, EmbeddingCache, get_embedding_cache
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", os.getenv("HF_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+EMBED_DIM = int(os.getenv("EMBED_DIM", "384"))
+# 0 = leave torch's default (all cores)
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_MICROBATCH_WAIT_MS = float(os.getenv("EMBED_MICROBATCH_WAIT_MS", "5"))
+EMBED_MICROBATCH_MAX = int(os.getenv("EMBED_MICROBATCH_MAX", "64"))
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "4096"))
+QUERY_EMBED_CACHE_TTL_SECONDS = float(os.getenv("QUERY_EMBED_CACHE_TTL_SECONDS", "1800"))
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+# Quantized export shipped in the model repo (MiniLM has qint8 avx512_vnni / quint8 avx2 / arm64 variants)
+EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+# Used when the repo has no such file: quantize the plain ONNX export for this CPU family
+EMBED_ONNX_QUANTIZATION = os.getenv("EMBED_ONNX_QUANTIZATION", "avx2")
+EMBED_ONNX_DIR = os.getenv("EMBED_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "medscribe", "onnx"))
+
+BACKENDS = ("torch", "onnx")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key of a query (the model still encodes the original text). With
+    the default uncased MiniLM, case does not change the embedding and
+    trailing "?"/"!"/"." barely do.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE.sub(" ", text).strip().rstrip("?!. ").lower()
+
+
+def _load_torch_model(model_name: str) -> Any:
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def _load_onnx_model(model_name: str) -> Any:
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": EMBED_ONNX_FILE})
+    except Exception as e:
+        print(f"⚠️ {EMBED_ONNX_FILE} not available for {model_name} ({e}); quantizing locally")
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    local_dir = os.path.join(EMBED_ONNX_DIR, model_name.replace("/", "__"))
+    quantized = f"model_qint8_{EMBED_ONNX_QUANTIZATION}.onnx"
+    if not os.path.exists(os.path.join(local_dir, "onnx", quantized)):
+        SentenceTransformer(model_name, backend="onnx").save_pretrained(local_dir)
+        export_dynamic_quantized_onnx_model(
+            SentenceTransformer(local_dir, backend="onnx"), EMBED_ONNX_QUANTIZATION, local_dir
+        )
+    return SentenceTransformer(local_dir, backend="onnx", model_kwargs={"file_name": f"onnx/{quantized}"})
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        model_name: str = EMBED_MODEL,
+        dim: int = EMBED_DIM,
+        threads: int = EMBED_THREADS,
+        use_cache: bool = True,
+        backend: str = EMBED_BACKEND,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown EMBED_BACKEND '{backend}' (expected one of {BACKENDS})")
+        self.model_name = model_name
+        self.dim = dim
+        self.threads = threads
+        self.backend = backend
+        # Quantized vectors differ slightly from torch ones: cache them separately
+        cache_key = model_name if backend == "torch" else f"{model_name}#{backend}"
+        self.cache: Optional[EmbeddingCache] = get_embedding_cache(cache_key, dim) if use_cache else None
+
+        self._model: Any = None
+        self._load_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._batcher: Optional[threading.Thread] = None
+        self._query_cache: TTLCache = TTLCache(maxsize=QUERY_EMBED_CACHE_SIZE, ttl=QUERY_EMBED_CACHE_TTL_SECONDS)
+        self._query_inflight: Dict[str, Future] = {}
+        self._query_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "model_load_seconds": None, "encode_calls": 0, "texts_encoded": 0,
+            "query_lookups": 0, "query_cache_hits": 0, "query_inflight_joins": 0,
+            "queries": 0, "query_batches": 0, "largest_query_batch": 0,
+        }
+
+    # -----------------------------
+    # Model
+    # -----------------------------
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    started = time.perf_counter()
+                    if self.threads > 0:
+                        # ONNX Runtime reads OMP_NUM_THREADS when its session is created
+                        os.environ.setdefault("OMP_NUM_THREADS", str(self.threads))
+                        import torch
+                        torch.set_num_threads(self.threads)
+                    if self.backend == "onnx":
+                        self._model = _load_onnx_model(self.model_name)
+                    else:
+                        self._model = _load_torch_model(self.model_name)
+                    self._stats["model_load_seconds"] = round(time.perf_counter() - started, 3)
+                    print(f"✅ Loaded embedding model {self.model_name} ({self.backend})")
+        return self._model
+
+    def encode_uncached(self, texts: Sequence[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+        """Straight model call, no cache."""
+        if not texts:
+            return []
+        vectors = self.model.encode(list(texts), batch_size=batch_size, show_progress_bar=False).tolist()
+        with self._stats_lock:
+            self._stats["encode_calls"] += 1
+            self._stats["texts_encoded"] += len(texts)
+        return vectors
+
+    # -----------------------------
+    # Batched encodes
+    # -----------------------------
+    def encode(self, texts: Sequence[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self.encode_uncached(texts)
+        return self.cache.encode(texts, self.encode_uncached)
+
+    async def aencode(self, texts: Sequence[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.encode, texts)
+
+    # -----------------------------
+    # Query encodes (cached, de-duplicated, micro-batched)
+    # -----------------------------
+    def _submit_query(self, text: str) -> Future:
+        key = normalize_query(text) or text
+        counter = None
+        with self._query_lock:
+            cached = self._query_cache.get(key)
+            joined = self._query_inflight.get(key) if cached is None else None
+            if cached is not None:
+                counter = "query_cache_hits"
+            elif joined is not None:
+                counter = "query_inflight_joins"
+            else:
+                future = self._query_inflight[key] = Future()
+        with self._stats_lock:
+            self._stats["query_lookups"] += 1
+            if counter:
+                self._stats[counter] += 1
+
+        if cached is not None:
+            done: Future = Future()
+            done.set_result(cached)
+            return done
+        if joined is not None:
+            return joined
+
+        def remember(finished: Future) -> None:
+            with self._query_lock:
+                self._query_inflight.pop(key, None)
+                if finished.exception() is None:
+                    self._query_cache[key] = finished.result()
+
+        future.add_done_callback(remember)
+        # Outside _query_lock: the disk cache read must not serialize other lookups.
+        # The original text is encoded, the normalized one is only the key.
+        self._encode_query(text, future)
+        return future
+
+    def _encode_query(self, text: str, future: Future) -> None:
+        if self.cache is not None and EMBED_CACHE_ENABLED:
+            try:
+                cached = self.cache.get_many([text])[0]
+            except Exception as e:
+                future.set_exception(e)
+                return
+            if cached is not None:
+                future.set_result(cached)
+                return
+        if self._batcher is None:
+            with self._load_lock:
+                if self._batcher is None:
+                    self._batcher = threading.Thread(target=self._run_batcher, name="embed-batcher", daemon=True)
+                    self._batcher.start()
+        self._queue.put((text, future))
+
+    def _run_batcher(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + EMBED_MICROBATCH_WAIT_MS / 1000
+            while len(batch) < EMBED_MICROBATCH_MAX:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                started = time.perf_counter()
+                vectors = dict(zip(texts, self.encode_uncached(texts)))
+                if self.cache is not None and EMBED_CACHE_ENABLED:
+                    self.cache.record_encoded(len(texts), time.perf_counter() - started)
+                    self.cache.put_many(texts, [vectors[t] for t in texts])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._stats_lock:
+                self._stats["queries"] += len(batch)
+                self._stats["query_batches"] += 1
+                self._stats["largest_query_batch"] = max(self._stats["largest_query_batch"], len(batch))
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+    def encode_query(self, text: str) -> List[float]:
+        return self._submit_query(text).result()
+
+    async def aencode_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self._submit_query(text))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            s = dict(self._stats)
+        batches = s["query_batches"]
+        s["avg_query_batch"] = round(s["queries"] / batches, 2) if batches else 0.0
+        s["query_cache_entries"] = len(self._query_cache)
+        s["loaded"] = self._model is not None
+        s["model"] = self.model_name
+        s["backend"] = self.backend
+        s["threads"] = self.threads or None
+        return s
+
+
+def cosine_parity(reference: Sequence[Sequence[float]], candidate: Sequence[Sequence[float]]) -> Dict[str, float]:
+    """Row-wise cosine similarity of two backends' vectors for the same texts."""
+    import numpy as np
+
+    a = np.asarray(reference, dtype=np.float32)
+    b = np.asarray(candidate, dtype=np.float32)
+    cosine = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1) + 1e-12)
+    return {
+        "texts": len(a),
+        "min_cosine": round(float(cosine.min()), 5),
+        "mean_cosine": round(float(cosine.mean()), 5),
+    }
+
+
+class ServiceEmbeddings(Embeddings):
+    """LangChain Embeddings backed by an EmbeddingService (for vector stores)."""
+
+    def __init__(self, service: EmbeddingService):
+        self.service = service
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.service.encode(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.service.encode_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.service.aencode(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.service.aencode_query(text)
+
+
+embedding_service = EmbeddingService()
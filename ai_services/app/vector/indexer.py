@@ -1,141 +1,299 @@
 # ai_services/app/vector/indexer.py
 import os
 import json
-from qdrant_client import QdrantClient
+import uuid
+import hashlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Tuple, Union
+from azure.core.exceptions import ResourceNotFoundError
 from qdrant_client.http import models
-from sentence_transformers import SentenceTransformer
 from app.storage.azure_client import container_client
 from app.storage.mongo_client import get_cases_collection
+from app.storage.qdrant_client import get_qdrant_client
+from app.storage.cases_mongo import mark_case_indexed
+from app.vector import collection, sparse
+from app.vector.chunker import CHUNKER_VERSION, chunk_case
+from app.vector.embedding_service import embedding_service
 
 # -----------------------------
 # ENV config
 # -----------------------------
-QDRANT_URL = os.getenv("QDRANT_URL")  # e.g. https://xxx.qdrant.cloud
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 COLLECTION = os.getenv("QDRANT_COLLECTION", "medscribe_cases")
 
+# Namespace for content-derived point IDs (never change: IDs would all move)
+POINT_ID_NAMESPACE = uuid.UUID("6f1d2c4e-8b1a-5f0e-9c3d-2a7b4e6f8d10")
+# Case-level payload fields; a change is applied with set_payload, no re-embedding
+CASE_META_FIELDS = ("user_id", "report_name", "doctor", "hospital")
+# Points per upsert request, and upsert requests in flight while the next batch embeds
+INDEX_UPSERT_BATCH_SIZE = int(os.getenv("INDEX_UPSERT_BATCH_SIZE", "128"))
+INDEX_UPSERT_PARALLELISM = int(os.getenv("INDEX_UPSERT_PARALLELISM", "2"))
+# Never stored: deleting it with wait=True is the write barrier (see wait_for_writes)
+BARRIER_POINT_ID = str(uuid.uuid5(POINT_ID_NAMESPACE, "write-barrier"))
+
 # -----------------------------
 # Init clients
 # -----------------------------
-qdrant = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
-encoder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+qdrant = get_qdrant_client()
+_upsert_pool = ThreadPoolExecutor(max_workers=INDEX_UPSERT_PARALLELISM, thread_name_prefix="qdrant-upsert")
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Chunk embeddings; identical texts (across cases) are encoded once, see embedding_cache."""
+    return embedding_service.encode(texts)
 
 # -----------------------------
 # Ensure collection exists
 # -----------------------------
 def ensure_collection():
-    """Create collection with vector config + payload indexes if not exists."""
-    try:
-        qdrant.get_collection(COLLECTION)
-        return
-    except Exception:
-        pass
-
-    # Create vector collection
-    qdrant.recreate_collection(
-        collection_name=COLLECTION,
-        vectors_config=models.VectorParams(size=384, distance=models.Distance.COSINE),
-    )
-
-    # Add payload indexes (for filtering/search)
-    qdrant.create_payload_index(
-        collection_name=COLLECTION,
-        field_name="case_id",
-        field_schema="keyword",
-    )
-    qdrant.create_payload_index(
-        collection_name=COLLECTION,
-        field_name="report_name",
-        field_schema="keyword",
-    )
-    qdrant.create_payload_index(
-        collection_name=COLLECTION,
-        field_name="doctor",
-        field_schema="keyword",
-    )
-    qdrant.create_payload_index(
-        collection_name=COLLECTION,
-        field_name="hospital",
-        field_schema="keyword",
-    )
-
-    print(f"✅ Created Qdrant collection with indexes: {COLLECTION}")
+    """Create collection (alias + quantized layout, see collection.py) with payload indexes if not exists."""
+    collection.ensure_collection(qdrant, COLLECTION)
 
 # -----------------------------
-# Index a case into Qdrant
+# Point IDs + diffing
 # -----------------------------
-def index_case(case_id: str) -> int:
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id(case_id: str, text: str, occurrence: int = 0) -> str:
     """
-    Load cleaned.json + panels.json for a case (from Azure),
-    embed, and store in Qdrant.
-    Returns number of chunks indexed.
+    Stable point ID for a chunk of a case: uuid5 of case_id + chunk hash.
+    occurrence tells apart identical chunks within the same case.
     """
-    ensure_collection()
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{case_id}:{chunk_hash(text)}:{occurrence}"))
+
+
+def case_meta(case: dict) -> Dict[str, str]:
+    meta = {field: case.get(field) for field in CASE_META_FIELDS}
+    meta["meta_hash"] = chunk_hash(json.dumps(meta, sort_keys=True, default=str))
+    return meta
 
-    # --- find case in Mongo ---
-    cases = get_cases_collection()
-    case = cases.find_one({"_id": case_id})
-    if not case:
-        raise ValueError(f"❌ Case {case_id} not found in Mongo")
 
-    chunks = []
+def existing_points(case_id: str) -> Dict[Union[str, int], str]:
+    """{point_id: meta_hash} of the points currently stored for a case."""
+    found: Dict[str, str] = {}
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=COLLECTION,
+            scroll_filter=models.Filter(
+                must=[models.FieldCondition(key="case_id", match=models.MatchValue(value=case_id))]
+            ),
+            with_payload=["meta_hash"],
+            with_vectors=False,
+            limit=256,
+            offset=offset,
+        )
+        for p in points:
+            found[p.id] = (p.payload or {}).get("meta_hash")
+        if offset is None:
+            return found
+
+
+# -----------------------------
+# Load case chunks
+# -----------------------------
+def load_case_chunks(case: dict) -> List[str]:
+    """Chunk texts for a case from cleaned.json + panels.json (Azure), see chunker."""
+    case_id = case["_id"]
 
     # --- download cleaned.json from Azure ---
     cleaned_blob = container_client.get_blob_client(case["cleaned_path"])
     cleaned_text = cleaned_blob.download_blob().readall().decode("utf-8")
     cleaned = json.loads(cleaned_text)
 
-    # Extract structured sections
-    for key, val in cleaned.get("sections", {}).items():
-        if isinstance(val, str) and val.strip():
-            for part in val.split("\n"):
-                if part.strip():
-                    chunks.append(f"{key.upper()}: {part.strip()}")
-
     # --- download panels.json from Azure ---
-    try:
-        panels_blob = container_client.get_blob_client(case["panels_path"])
-        panels_text = panels_blob.download_blob().readall().decode("utf-8")
-        panels = json.loads(panels_text)
-        for p in panels:
-            for item in p.get("items", []):
-                name = item.get("name")
-                result = item.get("result")
-                unit = item.get("unit", "")
-                ref = item.get("ref_text", "")
-                if name and result is not None:
-                    chunks.append(f"{name}: {result} {unit} (ref: {ref})")
-    except Exception:
+    # Only a missing blob means "no panels": any other failure must abort,
+    # since chunks missing from the result are deleted from the index.
+    panels = []
+    if case.get("panels_path"):
+        try:
+            panels_blob = container_client.get_blob_client(case["panels_path"])
+            panels_text = panels_blob.download_blob().readall().decode("utf-8")
+            panels = json.loads(panels_text)
+        except ResourceNotFoundError:
+            print(f"⚠️ No panels.json found for case {case_id}")
+    else:
         print(f"⚠️ No panels.json found for case {case_id}")
 
-    if not chunks:
-        print(f"⚠️ No content to index for case {case_id}")
-        return 0
+    return chunk_case(cleaned, panels)
+
+
+def identify_chunks(case_id: str, chunks: List[str]) -> List[Tuple[str, str]]:
+    """[(point_id, text)] with identical chunks numbered by occurrence."""
+    seen: Dict[str, int] = {}
+    identified = []
+    for text in chunks:
+        occurrence = seen.get(text, 0)
+        seen[text] = occurrence + 1
+        identified.append((point_id(case_id, text, occurrence), text))
+    return identified
 
-    # --- embed ---
-    print(f"🔄 Embedding {len(chunks)} chunks for case {case_id}...")
-    embeddings = encoder.encode(chunks, show_progress_bar=False).tolist()
 
-    # --- upsert into Qdrant ---
-    points = [
+# -----------------------------
+# Diff a case against Qdrant
+# -----------------------------
+@dataclass
+class CaseDiff:
+    case_id: str
+    meta: Dict[str, Any]
+    wanted: Dict[str, str]  # point_id -> chunk text
+    new_ids: List[str] = field(default_factory=list)
+    stale_meta_ids: List[str] = field(default_factory=list)
+    removed_ids: List[Union[str, int]] = field(default_factory=list)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "chunks": len(self.wanted),
+            "upserted": len(self.new_ids),
+            "updated": len(self.stale_meta_ids),
+            "deleted": len(self.removed_ids),
+            "unchanged": len(self.wanted) - len(self.new_ids) - len(self.stale_meta_ids),
+        }
+
+
+def diff_case(case: dict, chunks: List[str], full: bool = False) -> CaseDiff:
+    """
+    Compare a case's current chunks with its points in Qdrant. full=True
+    re-embeds every chunk (e.g. after an embedding model change).
+    """
+    case_id = case["_id"]
+    diff = CaseDiff(case_id=case_id, meta=case_meta(case), wanted=dict(identify_chunks(case_id, chunks)))
+    existing = existing_points(case_id)
+
+    diff.new_ids = [pid for pid in diff.wanted if full or pid not in existing]
+    if not full:
+        diff.stale_meta_ids = [
+            pid for pid in diff.wanted if pid in existing and existing[pid] != diff.meta["meta_hash"]
+        ]
+    diff.removed_ids = [pid for pid in existing if pid not in diff.wanted]
+    return diff
+
+
+def _point_vector(text: str, dense: List[float], with_sparse: bool) -> models.VectorStruct:
+    if not with_sparse:
+        return dense
+    return {"": dense, collection.SPARSE_VECTOR_NAME: sparse.document_vector(text)}
+
+
+def build_points(diff: CaseDiff, ids: List[str], vectors: List[List[float]]) -> List[models.PointStruct]:
+    # Dense only on a collection created before hybrid retrieval (until migrate_collection.py)
+    with_sparse = collection.has_sparse_vectors(qdrant, COLLECTION)
+    return [
         models.PointStruct(
-            id=i,  # ✅ integer ID (safe for Qdrant)
-            vector=vector,
+            id=pid,
+            vector=_point_vector(diff.wanted[pid], vector, with_sparse),
             payload={
-                "case_id": case_id,
-                "user_id": case.get("user_id"),
-                "chunk": text,
-                "report_name": case.get("report_name"),
-                "doctor": case.get("doctor"),
-                "hospital": case.get("hospital"),
+                "case_id": diff.case_id,
+                "chunk": diff.wanted[pid],
+                "chunk_hash": chunk_hash(diff.wanted[pid]),
+                "chunker_version": CHUNKER_VERSION,
+                **diff.meta,
             },
         )
-        for i, (text, vector) in enumerate(zip(chunks, embeddings))
+        for pid, vector in zip(ids, vectors)
     ]
 
-    qdrant.upsert(collection_name=COLLECTION, points=points)
-    print(f"✅ Indexed {len(points)} chunks into Qdrant for case {case_id}")
-    return len(points)
+
+def send_upsert(points: List[models.PointStruct]) -> Future:
+    """Upsert without waiting for Qdrant to apply it (acknowledged once in its WAL)."""
+    return _upsert_pool.submit(qdrant.upsert, collection_name=COLLECTION, points=points, wait=False)
+
+
+def wait_for_writes() -> None:
+    """
+    Consistency barrier: Qdrant applies a collection's updates in WAL order,
+    so once a wait=True operation sent after them returns, every upsert
+    acknowledged before it is searchable. That holds per shard, and the
+    barrier reaches only the shard owning BARRIER_POINT_ID: it needs the
+    single-shard layout collection.collection_params() creates.
+    """
+    qdrant.delete(
+        collection_name=COLLECTION,
+        points_selector=models.PointIdsList(points=[BARRIER_POINT_ID]),
+        wait=True,
+    )
+
+
+def embed_and_upsert(diff: CaseDiff, ids: List[str]) -> None:
+    """
+    Embed and upload points in INDEX_UPSERT_BATCH_SIZE batches: batch N+1
+    is embedded while up to INDEX_UPSERT_PARALLELISM earlier batches upload.
+    Returns after the write barrier.
+    """
+    in_flight: Deque[Future] = deque()
+    for start in range(0, len(ids), INDEX_UPSERT_BATCH_SIZE):
+        batch = ids[start:start + INDEX_UPSERT_BATCH_SIZE]
+        vectors = embed_texts([diff.wanted[pid] for pid in batch])
+        while len(in_flight) >= INDEX_UPSERT_PARALLELISM:
+            in_flight.popleft().result()
+        in_flight.append(send_upsert(build_points(diff, batch, vectors)))
+    while in_flight:
+        in_flight.popleft().result()
+    wait_for_writes()
+
+
+def apply_metadata_and_deletes(diff: CaseDiff) -> None:
+    """The parts of a diff that need no embeddings."""
+    # --- metadata-only changes: no re-embedding ---
+    if diff.stale_meta_ids:
+        qdrant.set_payload(collection_name=COLLECTION, payload=diff.meta, points=diff.stale_meta_ids)
+
+    # --- drop chunks that are gone ---
+    if diff.removed_ids:
+        qdrant.delete(collection_name=COLLECTION, points_selector=models.PointIdsList(points=diff.removed_ids))
+
+
+# -----------------------------
+# Index a case into Qdrant
+# -----------------------------
+def reindex_case(case_id: str, full: bool = False) -> Dict[str, int]:
+    """
+    Bring a case's points in line with its current chunks: embed and upsert
+    only new chunks, refresh payload of points whose case metadata changed,
+    and delete points whose chunk no longer exists (including points from
+    older, non content-addressed indexing). Safe to run repeatedly.
+    Returns counts: chunks, upserted, updated, deleted, unchanged.
+    """
+    # Idempotent, so it is simply retried if the collection turns out to be gone
+    return collection.with_collection(qdrant, COLLECTION, _reindex_case, case_id, full)
+
+
+def _reindex_case(case_id: str, full: bool) -> Dict[str, int]:
+
+    # --- find case in Mongo ---
+    cases = get_cases_collection()
+    case = cases.find_one({"_id": case_id})
+    if not case:
+        raise ValueError(f"❌ Case {case_id} not found in Mongo")
+
+    diff = diff_case(case, load_case_chunks(case), full=full)
+
+    # --- embed + upsert only new chunks (pipelined) ---
+    if diff.new_ids:
+        print(f"🔄 Embedding {len(diff.new_ids)} new chunks for case {case_id}...")
+        embed_and_upsert(diff, diff.new_ids)
+
+    apply_metadata_and_deletes(diff)
+    mark_case_indexed(case_id, CHUNKER_VERSION)
+
+    stats = diff.stats()
+    if not diff.wanted:
+        print(f"⚠️ No content to index for case {case_id}")
+    else:
+        print(f"✅ Indexed case {case_id} into Qdrant: {stats}")
+    return stats
+
+
+def index_case(case_id: str) -> int:
+    """
+    Load cleaned.json + panels.json for a case (from Azure),
+    embed, and store in Qdrant (incrementally, see reindex_case).
+    Returns number of chunks indexed.
+    """
+    return reindex_case(case_id)["chunks"]
 
 # -----------------------------
 def delete_case_embeddings(case_id: str) -> int:
@@ -143,9 +301,11 @@ def delete_case_embeddings(case_id: str) -> int:
     Delete all embeddings (points) in Qdrant related to a specific case_id.
     Returns the number of deleted points.
     """
-    ensure_collection()
     try:
-        result = qdrant.delete(
+        result = collection.with_collection(
+            qdrant,
+            COLLECTION,
+            qdrant.delete,
             collection_name=COLLECTION,
             points_selector=models.FilterSelector(
                 filter=models.Filter(
@@ -1,62 +1,92 @@
 # ai_services/app/vector/retriever.py
+"""
+Chunk retrieval for the chatbot and the RAG agents.
+
+RETRIEVER_MODE=hybrid (default) runs two channels over the same filter:
+dense MiniLM search and BM25 over the chunk terms (sparse.py), each
+fetching top_k * RETRIEVER_PREFETCH_FACTOR candidates, and fuses them with
+reciprocal rank fusion in Qdrant. Exact tokens such as "LDL", "HbA1c" or
+"162" then rank the right rows first, so a small top_k is enough. The
+score of a hybrid result is its RRF score, not a cosine similarity.
+"dense" is the previous dense-only search, also used for collections that
+have no sparse vectors yet and for queries with no keyword terms.
+"""
 import os
 from typing import List, Dict, Optional
-from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from sentence_transformers import SentenceTransformer
+from app.storage.qdrant_client import get_qdrant_client
+from app.vector import collection, sparse
+from app.vector.embedding_service import embedding_service
 
 # -----------------------------
 # ENV config
 # -----------------------------
-QDRANT_URL = os.getenv("QDRANT_URL")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 COLLECTION = os.getenv("QDRANT_COLLECTION", "medscribe_cases")
+RETRIEVER_MODE = os.getenv("RETRIEVER_MODE", "hybrid").lower()  # hybrid | dense
+RETRIEVER_PREFETCH_FACTOR = int(os.getenv("RETRIEVER_PREFETCH_FACTOR", "4"))
+RETRIEVER_MIN_PREFETCH = int(os.getenv("RETRIEVER_MIN_PREFETCH", "20"))
 
 # -----------------------------
 # Init clients
 # -----------------------------
-qdrant = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
-encoder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+qdrant = get_qdrant_client()
 
 # -----------------------------
 # Ensure collection + indexes
 # -----------------------------
 def ensure_collection():
     """Ensure Qdrant collection exists with all required payload indexes."""
-    required_fields = {"case_id", "user_id", "report_name", "doctor", "hospital"}
+    collection.ensure_collection(qdrant, COLLECTION)
 
-    try:
-        coll_info = qdrant.get_collection(COLLECTION)
-        # Get already indexed fields
-        existing_indexes = set(coll_info.payload_schema.keys())
-
-        missing = required_fields - existing_indexes
-        for field in missing:
-            qdrant.create_payload_index(
-                collection_name=COLLECTION,
-                field_name=field,
-                field_schema="keyword",
-            )
-            print(f"✅ Added missing index: {field}")
-
-        return
-    except Exception:
-        pass
-
-    # If collection doesn’t exist → create it fresh
-    qdrant.recreate_collection(
+
+# -----------------------------
+# Search channels
+# -----------------------------
+def _dense_search(query_vector: List[float], query_filter: Optional[models.Filter], top_k: int) -> List:
+    return qdrant.search(
         collection_name=COLLECTION,
-        vectors_config=models.VectorParams(size=384, distance=models.Distance.COSINE),
+        query_vector=query_vector,
+        query_filter=query_filter,
+        search_params=collection.search_params(),
+        limit=top_k,
     )
 
-    for field in required_fields:
-        qdrant.create_payload_index(
-            collection_name=COLLECTION,
-            field_name=field,
-            field_schema="keyword",
-        )
 
-    print(f"✅ Created Qdrant collection with indexes: {COLLECTION}")
+def _hybrid_search(
+    query_vector: List[float],
+    keywords: models.SparseVector,
+    query_filter: Optional[models.Filter],
+    top_k: int,
+) -> List:
+    prefetch_limit = max(top_k * RETRIEVER_PREFETCH_FACTOR, RETRIEVER_MIN_PREFETCH)
+    return qdrant.query_points(
+        collection_name=COLLECTION,
+        prefetch=[
+            models.Prefetch(
+                query=query_vector,
+                filter=query_filter,
+                params=collection.search_params(),
+                limit=prefetch_limit,
+            ),
+            models.Prefetch(
+                query=keywords,
+                using=collection.SPARSE_VECTOR_NAME,
+                filter=query_filter,
+                limit=prefetch_limit,
+            ),
+        ],
+        query=models.FusionQuery(fusion=models.Fusion.RRF),
+        limit=top_k,
+        with_payload=True,
+    ).points
+
+
+def _search(query: str, query_filter: Optional[models.Filter], top_k: int) -> List:
+    query_vector = embedding_service.encode_query(query)
+    keywords = sparse.query_vector(query)
+    if RETRIEVER_MODE == "hybrid" and keywords.indices and collection.has_sparse_vectors(qdrant, COLLECTION):
+        return _hybrid_search(query_vector, keywords, query_filter, top_k)
+    return _dense_search(query_vector, query_filter, top_k)
 
 
 # -----------------------------
@@ -76,11 +106,6 @@ def retrieve_chunks(
         "results": [ { "score", "chunk" }, ... ]
       }
     """
-    ensure_collection()
-
-    # Encode query
-    query_vector = encoder.encode(query, convert_to_tensor=False).tolist()
-
     # Build filters
     must_filters = []
     if user_id:
@@ -89,11 +114,14 @@ def retrieve_chunks(
         must_filters.append(models.FieldCondition(key="case_id", match=models.MatchValue(value=case_id)))
 
     try:
-        results = qdrant.search(
-            collection_name=COLLECTION,
-            query_vector=query_vector,
-            query_filter=models.Filter(must=must_filters) if must_filters else None,
-            limit=top_k,
+        # Collection verified once per process/TTL (see collection.py), not per query
+        results = collection.with_collection(
+            qdrant,
+            COLLECTION,
+            _search,
+            query,
+            models.Filter(must=must_filters) if must_filters else None,
+            top_k,
         )
     except Exception as e:
         raise RuntimeError(f"Retriever error: {e}")
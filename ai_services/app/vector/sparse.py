@@ -0,0 +1,60 @@
+# app/vector/sparse.py
+"""
+BM25 sparse vectors for the keyword channel of hybrid retrieval.
+
+MiniLM vectors blur exact tokens ("LDL" vs "HDL", "HbA1c", "162"), which
+is what lab-value questions hinge on. Each chunk is also stored as a
+sparse vector of its terms: the document side carries BM25's saturated
+term frequency with length normalization, and Qdrant applies IDF at query
+time (Modifier.IDF on the sparse vector config), so the weights stay
+correct as the corpus changes without re-indexing.
+
+Terms are lowercased alphanumeric runs, keeping decimals ("7.2") and
+mixed tokens ("hba1c"); the index of a term is its CRC32, so no
+vocabulary has to be stored or shared between processes.
+"""
+import os
+import re
+import zlib
+from collections import Counter
+from typing import List
+
+from qdrant_client.http import models
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Average terms per chunk, for length normalization (~CHUNK_TARGET_TOKENS of chunker v2)
+BM25_AVG_DOC_TERMS = float(os.getenv("BM25_AVG_DOC_TERMS", "48"))
+
+_TERM = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+# Question words carry no signal and are rare in report text, so IDF would overrate them
+STOPWORDS = frozenset("""
+a about an and any are as at be been by can did do does for from had has have how i in is it its
+me my of on or our should that the their them there these this to was we were what when where which
+who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TERM.findall(text.lower()) if t not in STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+
+def _term_index(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def document_vector(text: str) -> models.SparseVector:
+    """BM25 term weights of a chunk (IDF applied by Qdrant)."""
+    counts = Counter(tokenize(text))
+    length_norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(counts.values()) / BM25_AVG_DOC_TERMS)
+    weights = {}
+    for term, tf in counts.items():
+        index = _term_index(term)
+        weights[index] = weights.get(index, 0.0) + tf * (BM25_K1 + 1) / (tf + length_norm)
+    return models.SparseVector(indices=list(weights), values=list(weights.values()))
+
+
+def query_vector(text: str) -> models.SparseVector:
+    """One unit weight per distinct query term."""
+    indices = sorted({_term_index(term) for term in tokenize(text)})
+    return models.SparseVector(indices=indices, values=[1.0] * len(indices))
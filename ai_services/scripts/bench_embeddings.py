@@ -0,0 +1,128 @@
+"""
+Compare embedding backends (torch vs int8 ONNX) on this machine.
+
+From ai_services/:
+
+    python scripts/bench_embeddings.py
+    python scripts/bench_embeddings.py --texts chunks.txt --threads 4 --repeat 3
+
+Each backend is loaded in its own process, so resident memory is measured
+without the other model in the way. Reports model load time, memory added
+by the model and its runtime, single-query latency (the /rag/chat path), batched encode
+throughput (the indexing path), and cosine parity of the backends'
+vectors on the same texts.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_TEXTS = [
+    "TESTS: - Hemoglobin: 12.1 g/dL (12.0 - 15.5)",
+    "LDL Cholesterol: 162 mg/dL (ref: < 130)",
+    "HDL Cholesterol: 41 mg/dL (ref: > 40)",
+    "Triglycerides: 189 mg/dL (ref: < 150)",
+    "IMPRESSION: Mild dyslipidemia. Hemoglobin at the lower limit of normal.",
+    "Platelets: 265 x10^9/L (ref: 150 - 400)",
+    "WBC: 7.8 x10^9/L (ref: 4.0 - 11.0)",
+    "What does a high LDL mean for me?",
+    "Is my hemoglobin normal for my age?",
+    "Should I be worried about my triglycerides?",
+    "HISTORY: 52 year old female, routine annual screening, no current medication.",
+    "HbA1c: 6.1 % (ref: 4.0 - 5.6)",
+]
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _bench_backend(backend: str, texts: List[str], threads: int, batch_size: int, repeat: int, queries: int) -> Dict[str, Any]:
+    from app.vector.embedding_service import EmbeddingService
+
+    service = EmbeddingService(backend=backend, threads=threads, use_cache=False)
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    service.encode_uncached(texts[:1])  # load + warm up
+    load_seconds = time.perf_counter() - started
+    rss_model = _rss_mb() - rss_before
+
+    latencies = []
+    for text in (texts * (queries // len(texts) + 1))[:queries]:
+        t0 = time.perf_counter()
+        service.encode_uncached([text], batch_size=1)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        vectors = service.encode_uncached(texts, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - t0
+
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "model_rss_mb": round(rss_model, 1),
+        "peak_rss_mb": round(_rss_mb(), 1),
+        "query_p50_ms": round(statistics.median(latencies), 2),
+        "query_p95_ms": round(sorted(latencies)[int(len(latencies) * 0.95) - 1], 2),
+        "texts_per_second": round(len(texts) * repeat / batch_seconds, 1),
+        "vectors": vectors,
+    }
+
+
+def _run_isolated(backend: str, args: argparse.Namespace, texts: List[str]) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(_bench_backend, (backend, texts, args.threads, args.batch_size, args.repeat, args.queries))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", help="file with one text per line (default: built-in report lines)")
+    parser.add_argument("--backends", default="torch,onnx")
+    parser.add_argument("--threads", type=int, default=0, help="EMBED_THREADS for both backends (0 = runtime default)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the texts for throughput")
+    parser.add_argument("--queries", type=int, default=200, help="single-text encodes for latency")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="parity threshold")
+    args = parser.parse_args()
+
+    if args.texts:
+        with open(args.texts, "r", encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = SAMPLE_TEXTS * 50
+
+    from app.vector.embedding_service import cosine_parity
+
+    results = [_run_isolated(backend.strip(), args, texts) for backend in args.backends.split(",") if backend.strip()]
+    for r in results:
+        print(json.dumps({k: v for k, v in r.items() if k != "vectors"}))
+
+    reference = results[0]
+    for r in results[1:]:
+        parity = cosine_parity(reference["vectors"], r["vectors"])
+        speedup = r["texts_per_second"] / reference["texts_per_second"]
+        print(
+            f"{r['backend']} vs {reference['backend']}: min cosine {parity['min_cosine']}, "
+            f"mean {parity['mean_cosine']}, throughput x{speedup:.2f}, "
+            f"query p50 {r['query_p50_ms']} ms vs {reference['query_p50_ms']} ms, "
+            f"model memory {r['model_rss_mb']} MB vs {reference['model_rss_mb']} MB"
+        )
+        if parity["min_cosine"] < args.min_cosine:
+            print(f"⚠️ Parity below {args.min_cosine}: do not switch EMBED_BACKEND to {r['backend']} for this model")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Recall/latency benchmark for Qdrant collection layouts.
+
+Copies a sample of the live case index (or random unit vectors with
+--synthetic) into temporary collections, one per layout, and for each
+reports recall@k against exact float32 search, query latency, and the
+RAM the vectors need. From ai_services/:
+
+    python scripts/bench_qdrant_config.py --points 50000 --queries 200
+    python scripts/bench_qdrant_config.py --synthetic 100000 --hnsw-ef 64,128,256
+
+Needs a real Qdrant server (QDRANT_URL): the embedded local mode ignores
+quantization and HNSW settings. Temporary collections are dropped at the
+end unless --keep.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# name -> create_collection overrides (see collection.collection_params)
+LAYOUTS: Dict[str, Dict[str, Any]] = {
+    "float32-ram": {"quantization": "none", "on_disk_vectors": False, "on_disk_payload": False},
+    "float32-disk": {"quantization": "none", "on_disk_vectors": True, "on_disk_payload": True},
+    "scalar-int8": {"quantization": "scalar", "on_disk_vectors": True, "on_disk_payload": True},
+    "binary": {"quantization": "binary", "on_disk_vectors": True, "on_disk_payload": True},
+}
+# Bytes per vector held in RAM for each layout
+RAM_BYTES_PER_DIM = {"float32-ram": 4.0, "float32-disk": 0.0, "scalar-int8": 1.0, "binary": 1 / 8}
+
+
+def load_sample(qdrant, source: str, points: int) -> List[Any]:
+    sample, offset = [], None
+    while len(sample) < points:
+        batch, offset = qdrant.scroll(
+            collection_name=source, limit=min(1000, points - len(sample)), offset=offset,
+            with_payload=True, with_vectors=True,
+        )
+        sample.extend(batch)
+        if offset is None:
+            break
+    return sample
+
+
+def main() -> None:
+    from qdrant_client.http import models
+    from app.vector import collection
+    from app.vector.embedding_service import EMBED_DIM
+    from app.vector.indexer import COLLECTION, qdrant
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20000, help="points sampled from the live index")
+    parser.add_argument("--synthetic", type=int, default=0, help="use this many random vectors instead")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--layouts", default=",".join(LAYOUTS))
+    parser.add_argument("--hnsw-ef", default=str(collection.QDRANT_SEARCH_HNSW_EF), help="comma-separated values to try")
+    parser.add_argument("--oversampling", type=float, default=collection.QDRANT_OVERSAMPLING)
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark collections")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    if args.synthetic:
+        vectors = rng.standard_normal((args.synthetic, EMBED_DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        points = [models.PointStruct(id=i, vector=v.tolist(), payload={}) for i, v in enumerate(vectors)]
+    else:
+        sample = load_sample(qdrant, COLLECTION, args.points)
+        points = [models.PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in sample]
+    if not points:
+        sys.exit("No points to benchmark")
+    # Queries: perturbed stored vectors, like a question close to a report line
+    picks = rng.choice(len(points), size=min(args.queries, len(points)), replace=False)
+    queries = []
+    for i in picks:
+        q = np.asarray(points[i].vector, dtype=np.float32) + rng.normal(0, 0.05, EMBED_DIM).astype(np.float32)
+        queries.append((q / np.linalg.norm(q)).tolist())
+    print(f"{len(points)} points, {len(queries)} queries, top_k={args.top_k}")
+
+    truth: List[set] = []
+    results = []
+    created = []
+    try:
+        for layout in [name.strip() for name in args.layouts.split(",") if name.strip()]:
+            name = f"bench_{layout.replace('-', '_')}_{int(time.time())}"
+            started = time.perf_counter()
+            collection.create_collection(qdrant, name, index_fields=(), **collection.collection_params(**LAYOUTS[layout]))
+            created.append(name)
+            for start in range(0, len(points), 512):
+                qdrant.upsert(collection_name=name, points=points[start:start + 512], wait=True)
+            while qdrant.get_collection(name).status != models.CollectionStatus.GREEN:
+                time.sleep(0.5)
+            build_seconds = time.perf_counter() - started
+
+            if not truth:
+                truth = [
+                    {p.id for p in qdrant.search(name, query_vector=q, limit=args.top_k,
+                                                 search_params=models.SearchParams(exact=True))}
+                    for q in queries
+                ]
+
+            quantized = LAYOUTS[layout]["quantization"] != "none"
+            for hnsw_ef in [int(v) for v in args.hnsw_ef.split(",")]:
+                params = models.SearchParams(
+                    hnsw_ef=hnsw_ef,
+                    quantization=models.QuantizationSearchParams(rescore=True, oversampling=args.oversampling)
+                    if quantized else None,
+                )
+                latencies, recalls = [], []
+                for q, expected in zip(queries, truth):
+                    t0 = time.perf_counter()
+                    found = qdrant.search(name, query_vector=q, limit=args.top_k, search_params=params)
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                    recalls.append(len({p.id for p in found} & expected) / max(1, len(expected)))
+                row = {
+                    "layout": layout,
+                    "hnsw_ef": hnsw_ef,
+                    f"recall@{args.top_k}": round(statistics.mean(recalls), 4),
+                    "p50_ms": round(statistics.median(latencies), 2),
+                    "p95_ms": round(sorted(latencies)[int(len(latencies) * 0.95) - 1], 2),
+                    "vector_ram_mb": round(len(points) * EMBED_DIM * RAM_BYTES_PER_DIM[layout] / 2**20, 1),
+                    "build_seconds": round(build_seconds, 1),
+                }
+                results.append(row)
+                print(json.dumps(row), flush=True)
+    finally:
+        if not args.keep:
+            for name in created:
+                qdrant.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
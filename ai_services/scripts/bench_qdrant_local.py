@@ -0,0 +1,160 @@
+"""
+Index/search throughput of the vector layer on a synthetic corpus.
+
+Runs against whatever QDRANT_MODE selects, so the same numbers can be
+taken for the embedded modes and for a server. From ai_services/:
+
+    QDRANT_MODE=memory python scripts/bench_qdrant_local.py
+    QDRANT_MODE=local QDRANT_PATH=/tmp/qdrant_bench python scripts/bench_qdrant_local.py --chunks 100000
+    QDRANT_URL=http://localhost:6333 python scripts/bench_qdrant_local.py --collection bench_chunks
+
+The corpus (chunk texts, unit vectors, case/user IDs) is generated once
+from --seed and saved as a fixture (.npz), so repeated runs and different
+modes index exactly the same data without loading the embedding model.
+Search runs unfiltered, per user and per case, like retrieve_chunks.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_NAMES = ["Hemoglobin", "LDL Cholesterol", "HDL Cholesterol", "Triglycerides", "HbA1c", "WBC", "Platelets", "TSH"]
+SECTIONS = ["TESTS", "IMPRESSION", "HISTORY", "FINDINGS"]
+
+
+def build_fixture(path: str, chunks: int, dim: int, seed: int, chunks_per_case: int, cases_per_user: int) -> None:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((chunks, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    names = rng.integers(0, len(TEST_NAMES), chunks)
+    sections = rng.integers(0, len(SECTIONS), chunks)
+    values = rng.uniform(0.5, 300, chunks).round(1)
+    texts = np.array([
+        f"{SECTIONS[s]}: - {TEST_NAMES[n]}: {v}" for s, n, v in zip(sections, names, values)
+    ])
+    case_index = np.arange(chunks) // chunks_per_case
+    np.savez_compressed(
+        path,
+        vectors=vectors,
+        texts=texts,
+        case_ids=np.array([f"case{c:06d}" for c in case_index]),
+        user_ids=np.array([f"user{c // cases_per_user:05d}" for c in case_index]),
+    )
+
+
+def load_fixture(args: argparse.Namespace, dim: int) -> Dict[str, np.ndarray]:
+    path = args.fixture or os.path.join(
+        tempfile.gettempdir(), f"medscribe_bench_corpus_{args.chunks}_{dim}_{args.seed}.npz"
+    )
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        build_fixture(path, args.chunks, dim, args.seed, args.chunks_per_case, args.cases_per_user)
+        print(f"Built fixture {path} in {time.perf_counter() - started:.1f}s")
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def percentile(values: List[float], q: float) -> float:
+    return round(sorted(values)[max(0, int(len(values) * q) - 1)], 2)
+
+
+def main() -> None:
+    from qdrant_client.http import models
+    from app.storage.qdrant_client import QDRANT_MODE, get_qdrant_client
+    from app.vector import collection
+    from app.vector.embedding_service import EMBED_DIM
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--chunks-per-case", type=int, default=40)
+    parser.add_argument("--cases-per-user", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fixture", help="corpus .npz (built if missing)")
+    parser.add_argument("--collection", default="bench_chunks")
+    parser.add_argument("--batch-size", type=int, default=512, help="points per upsert")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the collection afterwards")
+    args = parser.parse_args()
+
+    corpus = load_fixture(args, EMBED_DIM)
+    vectors, texts = corpus["vectors"], corpus["texts"]
+    case_ids, user_ids = corpus["case_ids"], corpus["user_ids"]
+    client = get_qdrant_client()
+    print(f"QDRANT_MODE={QDRANT_MODE}, {len(vectors)} chunks, {len(set(case_ids))} cases, {len(set(user_ids))} users")
+
+    try:
+        client.delete_collection(args.collection)
+    except Exception:
+        pass
+    collection.create_collection(client, args.collection)
+
+    started = time.perf_counter()
+    for start in range(0, len(vectors), args.batch_size):
+        end = min(start + args.batch_size, len(vectors))
+        client.upsert(
+            collection_name=args.collection,
+            points=[
+                models.PointStruct(
+                    id=i,
+                    vector=vectors[i].tolist(),
+                    payload={"case_id": str(case_ids[i]), "user_id": str(user_ids[i]), "chunk": str(texts[i])},
+                )
+                for i in range(start, end)
+            ],
+            wait=True,
+        )
+    index_seconds = time.perf_counter() - started
+    report: Dict[str, Any] = {
+        "mode": QDRANT_MODE,
+        "chunks": len(vectors),
+        "index_seconds": round(index_seconds, 1),
+        "index_chunks_per_second": round(len(vectors) / index_seconds, 1),
+    }
+
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.integers(0, len(vectors), args.queries)
+    filters = {
+        "none": lambda i: None,
+        "user": lambda i: models.Filter(must=[
+            models.FieldCondition(key="user_id", match=models.MatchValue(value=str(user_ids[i])))
+        ]),
+        "case": lambda i: models.Filter(must=[
+            models.FieldCondition(key="case_id", match=models.MatchValue(value=str(case_ids[i])))
+        ]),
+    }
+    for label, make_filter in filters.items():
+        latencies = []
+        started = time.perf_counter()
+        for i in picks:
+            query = vectors[i] + rng.normal(0, 0.05, vectors.shape[1]).astype(np.float32)
+            t0 = time.perf_counter()
+            client.search(
+                collection_name=args.collection,
+                query_vector=query.tolist(),
+                query_filter=make_filter(i),
+                search_params=collection.search_params(),
+                limit=args.top_k,
+            )
+            latencies.append((time.perf_counter() - t0) * 1000)
+        elapsed = time.perf_counter() - started
+        report[f"search_{label}"] = {
+            "qps": round(len(picks) / elapsed, 1),
+            "p50_ms": percentile(latencies, 0.5),
+            "p95_ms": percentile(latencies, 0.95),
+        }
+
+    if not args.keep:
+        client.delete_collection(args.collection)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
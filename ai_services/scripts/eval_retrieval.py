@@ -0,0 +1,94 @@
+"""
+Dense vs hybrid (dense + BM25, RRF) retrieval on lab-value questions.
+
+Samples lab panel chunks from the live case index, asks one question per
+lab item ("what is my LDL Cholesterol?") scoped to the chunk's case, like
+the RAG agent does, and reports for each mode how often the chunk holding
+that item is ranked first / within top k, and the mean reciprocal rank.
+From ai_services/:
+
+    python scripts/eval_retrieval.py --questions 300 --top-k 3
+
+The index needs sparse vectors for the hybrid mode
+(scripts/migrate_collection.py adds them to an older index).
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# "LDL Cholesterol: 162 mg/dL" items of a panel chunk ("TITLE: item; item; ...")
+_ITEM = re.compile(r"(?:^[^:]+:\s*|;\s*)([A-Za-z][A-Za-z0-9 ()/%-]{1,40}?):\s*[<>]?\s*[0-9]")
+
+
+def load_questions(qdrant, collection_name: str, sample_points: int, questions: int, seed: int) -> List[Tuple[str, str, str]]:
+    """(question, case_id, chunk) for lab items found in sampled chunks."""
+    candidates, offset = [], None
+    while len(candidates) < sample_points:
+        batch, offset = qdrant.scroll(
+            collection_name=collection_name, limit=min(1000, sample_points - len(candidates)), offset=offset,
+            with_payload=["case_id", "chunk"], with_vectors=False,
+        )
+        candidates.extend(batch)
+        if offset is None:
+            break
+    found = []
+    for p in candidates:
+        chunk = (p.payload or {}).get("chunk") or ""
+        for name in _ITEM.findall(chunk):
+            found.append((f"what is my {name.strip()}?", p.payload.get("case_id"), chunk))
+    random.Random(seed).shuffle(found)
+    return found[:questions]
+
+
+def evaluate(retriever, questions: List[Tuple[str, str, str]], top_k: int) -> Dict[str, Any]:
+    hits_at_1, hits_at_k, reciprocal, latencies = 0, 0, 0.0, []
+    for question, case_id, expected in questions:
+        t0 = time.perf_counter()
+        results = retriever.retrieve_chunks(question, case_id=case_id, top_k=top_k)["results"]
+        latencies.append((time.perf_counter() - t0) * 1000)
+        chunks = [r["chunk"] for r in results]
+        if expected in chunks:
+            rank = chunks.index(expected) + 1
+            hits_at_1 += rank == 1
+            hits_at_k += 1
+            reciprocal += 1 / rank
+    n = max(1, len(questions))
+    return {
+        "hit@1": round(hits_at_1 / n, 4),
+        f"hit@{top_k}": round(hits_at_k / n, 4),
+        "mrr": round(reciprocal / n, 4),
+        "p50_ms": round(sorted(latencies)[len(latencies) // 2], 2) if latencies else 0.0,
+    }
+
+
+def main() -> None:
+    from app.vector import collection, retriever
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample-points", type=int, default=20000, help="chunks scanned for lab items")
+    parser.add_argument("--questions", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if not collection.has_sparse_vectors(retriever.qdrant, retriever.COLLECTION):
+        sys.exit(f"{retriever.COLLECTION} has no sparse vectors: run scripts/migrate_collection.py first")
+    questions = load_questions(retriever.qdrant, retriever.COLLECTION, args.sample_points, args.questions, args.seed)
+    if not questions:
+        sys.exit("No lab items found in the sampled chunks")
+    print(f"{len(questions)} questions, top_k={args.top_k}")
+
+    for mode in ("dense", "hybrid"):
+        retriever.RETRIEVER_MODE = mode
+        print(json.dumps({"mode": mode, **evaluate(retriever, questions, args.top_k)}), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Closed-loop load generator for ai_services.
+
+Start the service against the offline model so results measure our own
+overhead rather than Gemini:
+
+    LLM_BACKEND=fake FAKE_LLM_LATENCY_MS=800 uvicorn app.main:app --workers 2
+
+then, from ai_services/:
+
+    python scripts/loadgen.py --target summary --concurrency 16 --requests 400
+    python scripts/loadgen.py --target pipeline --concurrency 8 --duration 60 --unique
+    python scripts/loadgen.py --target rag --user-id <user> --concurrency 8
+
+Each worker sends its next request as soon as the previous one finishes.
+Prints throughput, latency percentiles (and time to first byte for the
+streaming pipeline), errors by status, and /health/metrics after the run.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+SAMPLE_REPORT = """City Diagnostic Laboratory
+Patient: Jane Doe    Age: 52    Sex: F
+Test: Lipid Profile and Full Blood Count
+
+Total Cholesterol   238 mg/dL   (< 200)
+LDL Cholesterol     162 mg/dL   (< 130)
+HDL Cholesterol      41 mg/dL   (> 40)
+Triglycerides       189 mg/dL   (< 150)
+Hemoglobin         12.1 g/dL    (12.0 - 15.5)
+WBC                 7.8 x10^9/L (4.0 - 11.0)
+Platelets           265 x10^9/L (150 - 400)
+
+Impression: Borderline high LDL and triglycerides. Blood count within normal limits.
+"""
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Run:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.first_byte: List[float] = []
+        self.statuses: Counter = Counter()
+        self.sent = 0
+
+    def report(self, elapsed: float) -> Dict[str, object]:
+        ok = self.statuses.get(200, 0)
+        ms = lambda v: round(v * 1000, 1)
+        result = {
+            "requests": self.sent,
+            "ok": ok,
+            "statuses": dict(self.statuses),
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "mean": ms(statistics.fmean(self.latencies)) if self.latencies else 0.0,
+                "p50": ms(percentile(self.latencies, 50)),
+                "p90": ms(percentile(self.latencies, 90)),
+                "p99": ms(percentile(self.latencies, 99)),
+                "max": ms(max(self.latencies, default=0.0)),
+            },
+        }
+        if self.first_byte:
+            result["first_byte_ms"] = {
+                "p50": ms(percentile(self.first_byte, 50)),
+                "p90": ms(percentile(self.first_byte, 90)),
+            }
+        return result
+
+
+def report_text(base: str, n: int, unique: bool) -> str:
+    # Unique reports defeat single-flight and caches, identical ones exercise them
+    return f"{base}\nReference No: LG-{n:06d}\n" if unique else base
+
+
+async def send(client: httpx.AsyncClient, args, n: int, report: str, run: Run) -> None:
+    started = time.perf_counter()
+    status = 0
+    try:
+        if args.target == "summary":
+            files = {"file": (f"report_{n}.txt", report.encode("utf-8"), "text/plain")}
+            resp = await client.post("/summary/process", files=files)
+            status = resp.status_code
+        elif args.target == "rag":
+            body = {"query": args.query, "case_id": args.case_id}
+            resp = await client.post("/rag/chat", json=body, headers={"X-User-Id": args.user_id})
+            status = resp.status_code
+        else:
+            async with client.stream("POST", "/pipeline/run", json={"medical_report": report}) as resp:
+                status = resp.status_code
+                first: Optional[float] = None
+                async for _ in resp.aiter_bytes():
+                    if first is None:
+                        first = time.perf_counter() - started
+                if first is not None:
+                    run.first_byte.append(first)
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+
+    run.statuses[status] += 1
+    if status == 200:
+        run.latencies.append(time.perf_counter() - started)
+
+
+async def worker(client: httpx.AsyncClient, args, report: str, run: Run, deadline: Optional[float]) -> None:
+    while True:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return
+        if deadline is None and run.sent >= args.requests:
+            return
+        n = run.sent
+        run.sent += 1
+        await send(client, args, n, report_text(report, n, args.unique), run)
+
+
+async def main(args) -> None:
+    report = SAMPLE_REPORT
+    if args.report_file:
+        with open(args.report_file, "r", encoding="utf-8") as f:
+            report = f.read()
+
+    run = Run()
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration if args.duration else None
+        await asyncio.gather(*(worker(client, args, report, run, deadline) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        result = {"target": args.target, "concurrency": args.concurrency, **run.report(elapsed)}
+        try:
+            result["server_metrics"] = (await client.get("/health/metrics")).json()
+        except (httpx.HTTPError, ValueError):
+            pass
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for ai_services")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--target", choices=["summary", "rag", "pipeline"], default="summary")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="total requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="run for this many seconds instead")
+    parser.add_argument("--unique", action="store_true", help="make every report distinct")
+    parser.add_argument("--report-file", help="report text to send instead of the built-in sample")
+    parser.add_argument("--query", default="What does my LDL cholesterol result mean?")
+    parser.add_argument("--case-id", default=None)
+    parser.add_argument("--user-id", default="loadgen-user")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="also write the JSON result here")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,61 @@
+"""
+Rebuild a Qdrant collection with the current layout (quantization, on-disk
+vectors/payload, HNSW, BM25 sparse vectors) without taking it offline. See
+app/vector/collection.py for the settings and the switch-over steps. A case
+index built before hybrid retrieval gets its sparse vectors here, computed
+from the stored chunks (no re-embedding).
+
+From ai_services/:
+
+    python scripts/migrate_collection.py
+    python scripts/migrate_collection.py --quantization binary --hnsw-m 32 --keep-old
+    python scripts/migrate_collection.py --collection conversation_memory --index-fields user_id,case_id --no-sparse
+
+Then reconcile anything deleted during the copy:
+
+    python scripts/reindex_cases.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main() -> None:
+    from app.vector import collection
+    from app.vector.indexer import COLLECTION, qdrant
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default=COLLECTION, help="alias (or legacy collection) to rebuild")
+    parser.add_argument("--index-fields", default=",".join(collection.CASE_INDEX_FIELDS))
+    parser.add_argument("--quantization", choices=collection.QUANTIZATION_MODES, default=collection.QDRANT_QUANTIZATION)
+    parser.add_argument("--hnsw-m", type=int, default=collection.QDRANT_HNSW_M)
+    parser.add_argument("--hnsw-ef-construct", type=int, default=collection.QDRANT_HNSW_EF_CONSTRUCT)
+    parser.add_argument("--vectors-in-ram", action="store_true", help="keep original vectors in RAM instead of on disk")
+    parser.add_argument("--payload-in-ram", action="store_true", help="keep payloads in RAM instead of on disk")
+    parser.add_argument("--no-sparse", action="store_true", help="dense vectors only (no BM25 channel for hybrid retrieval)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--keep-old", action="store_true", help="do not drop the previous collection")
+    args = parser.parse_args()
+
+    overrides = collection.collection_params(
+        quantization=args.quantization,
+        on_disk_vectors=not args.vectors_in_ram,
+        on_disk_payload=not args.payload_in_ram,
+        hnsw_m=args.hnsw_m,
+        hnsw_ef_construct=args.hnsw_ef_construct,
+        sparse_vectors=collection.QDRANT_SPARSE_VECTORS and not args.no_sparse,
+    )
+    collection.migrate_collection(
+        qdrant,
+        args.collection,
+        index_fields=[f.strip() for f in args.index_fields.split(",") if f.strip()],
+        batch_size=args.batch_size,
+        keep_old=args.keep_old,
+        **overrides,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Bulk reindex of cases into Qdrant.
+
+Use after changing the chunking (incremental: only new/changed chunks are
+embedded; with --stale-only just the cases indexed with another
+CHUNKER_VERSION) or the embedding model (--full: every chunk is
+re-embedded and overwritten in place). From ai_services/:
+
+    python scripts/reindex_cases.py
+    python scripts/reindex_cases.py --stale-only
+    python scripts/reindex_cases.py --full --embed-workers 8 --batch-size 1024
+    python scripts/reindex_cases.py --user-id <user> --checkpoint reindex.ckpt.json
+    python scripts/reindex_cases.py --resume --checkpoint reindex.ckpt.json
+
+Pipeline:
+- case IDs stream from MongoDB in _id order
+- blobs (cleaned.json, panels.json) and existing point IDs are fetched by
+  an I/O thread pool, several cases ahead
+- chunks already in the embedding cache (app/vector/embedding_cache.py)
+  skip the model; the rest, from many cases, are embedded in large
+  batches on a process pool (one model per process, sized to the CPU
+  cores by default) and added to the cache
+- upserts run on their own threads while the next batches embed, without
+  waiting for Qdrant to apply them (wait=False)
+- every --barrier-every cases whose upserts are acknowledged, a write
+  barrier makes them searchable; only then are their removed chunks
+  deleted and metadata updated, so a case never loses its old points
+  before the new ones can be found (same order as indexer.reindex_case)
+
+The checkpoint file records the last case (in _id order) that went through
+all of that, so --resume continues after it without gaps. Cases that
+could not be loaded or updated are listed in it as failed_case_ids.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Each worker process holds one uncached EmbeddingService; the parent owns the cache
+_worker_service = None
+
+
+def _init_embed_worker(model_name: str, dim: int, threads: int) -> None:
+    global _worker_service
+    from app.vector.embedding_service import EmbeddingService
+
+    _worker_service = EmbeddingService(model_name, dim, threads=threads, use_cache=False)
+    _worker_service.model
+
+
+def _embed(texts: List[str], batch_size: int) -> Tuple[List[List[float]], float]:
+    started = time.perf_counter()
+    vectors = _worker_service.encode_uncached(texts, batch_size=batch_size)
+    return vectors, time.perf_counter() - started
+
+
+class Progress:
+    def __init__(self, report_every: float):
+        self.started = time.perf_counter()
+        self.report_every = report_every
+        self.last_report = self.started
+        self.counts = {"cases": 0, "chunks": 0, "cached": 0, "embedded": 0, "upserted": 0, "updated": 0, "deleted": 0, "failed": 0}
+
+    def add(self, **counts: int) -> None:
+        for key, value in counts.items():
+            self.counts[key] += value
+
+    def maybe_report(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self.last_report < self.report_every:
+            return
+        self.last_report = now
+        elapsed = max(now - self.started, 1e-9)
+        c = self.counts
+        print(
+            f"[{elapsed:7.1f}s] cases={c['cases']} ({c['cases'] / elapsed:.1f}/s) "
+            f"chunks={c['chunks']} cached={c['cached']} embedded={c['embedded']} ({c['embedded'] / elapsed:.0f}/s) "
+            f"upserted={c['upserted']} updated={c['updated']} deleted={c['deleted']} failed={c['failed']}",
+            flush=True,
+        )
+
+
+class Checkpoint:
+    """Tracks the last case, in stream order, whose points are all written."""
+
+    def __init__(self, path: Optional[str], every: int):
+        self.path = path
+        self.every = every
+        self.order: Deque[str] = deque()
+        self.done: set = set()
+        self.last: Optional[str] = None
+        self.failed: List[str] = []
+        self.since_write = 0
+
+    def load(self) -> Optional[str]:
+        if not self.path or not os.path.exists(self.path):
+            return None
+        with open(self.path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.last = state.get("last_case_id")
+        self.failed = state.get("failed_case_ids", [])
+        return self.last
+
+    def started(self, case_id: str) -> None:
+        self.order.append(case_id)
+
+    def finished(self, case_id: str) -> None:
+        self.done.add(case_id)
+        while self.order and self.order[0] in self.done:
+            self.last = self.order.popleft()
+            self.done.discard(self.last)
+            self.since_write += 1
+        if self.since_write >= self.every:
+            self.write()
+
+    def write(self) -> None:
+        if not self.path or self.last is None:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"last_case_id": self.last, "failed_case_ids": self.failed, "written_at": time.time()}, f)
+        os.replace(tmp, self.path)
+        self.since_write = 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="re-embed every chunk (embedding model changed)")
+    parser.add_argument("--user-id", help="only this user's cases")
+    parser.add_argument("--stale-only", action="store_true", help="only cases indexed with another CHUNKER_VERSION")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many cases")
+    parser.add_argument("--embed-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=512, help="chunks per embedding task (across cases)")
+    parser.add_argument("--encode-batch-size", type=int, default=64, help="model forward batch inside a task")
+    parser.add_argument("--io-workers", type=int, default=16, help="threads for blob/Qdrant reads")
+    parser.add_argument("--prefetch", type=int, default=64, help="cases loaded ahead of embedding")
+    parser.add_argument("--upsert-workers", type=int, default=4)
+    parser.add_argument("--upsert-batch-size", type=int, default=256)
+    parser.add_argument("--barrier-every", type=int, default=200, help="written cases between write barriers")
+    parser.add_argument("--checkpoint", help="checkpoint file (JSON)")
+    parser.add_argument("--checkpoint-every", type=int, default=50, help="cases between checkpoint writes")
+    parser.add_argument("--resume", action="store_true", help="continue after the case in --checkpoint")
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds between progress lines")
+    args = parser.parse_args()
+
+    from app.storage.cases_mongo import mark_case_indexed
+    from app.storage.mongo_client import get_cases_collection
+    from app.vector.chunker import CHUNKER_VERSION
+    from app.vector import indexer
+    from app.vector.embedding_service import embedding_service
+
+    checkpoint = Checkpoint(args.checkpoint, args.checkpoint_every)
+    query: Dict[str, Any] = {}
+    if args.user_id:
+        query["user_id"] = args.user_id
+    if args.stale_only:
+        query["index_chunker_version"] = {"$ne": CHUNKER_VERSION}
+    if args.resume:
+        if checkpoint.load() is None:
+            parser.error("--resume needs an existing --checkpoint file")
+        query["_id"] = {"$gt": checkpoint.last}
+        print(f"Resuming after case {checkpoint.last}")
+
+    indexer.ensure_collection()
+
+    def stream_cases() -> Iterator[dict]:
+        cursor = get_cases_collection().find(query).sort("_id", 1).batch_size(200)
+        for n, case in enumerate(cursor, 1):
+            yield case
+            if args.limit and n >= args.limit:
+                return
+
+    def prepare(case: dict) -> "indexer.CaseDiff":
+        return indexer.diff_case(case, indexer.load_case_chunks(case), full=args.full)
+
+    cache = embedding_service.cache
+    progress = Progress(args.report_every)
+    io_pool = ThreadPoolExecutor(max_workers=args.io_workers)
+    upsert_pool = ThreadPoolExecutor(max_workers=args.upsert_workers)
+    embed_threads = max(1, (os.cpu_count() or 1) // max(1, args.embed_workers))
+    embed_pool = ProcessPoolExecutor(
+        max_workers=args.embed_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_embed_worker,
+        initargs=(embedding_service.model_name, embedding_service.dim, embed_threads),
+    )
+
+    diffs: Dict[str, "indexer.CaseDiff"] = {}
+    remaining: Dict[str, int] = {}
+    buffer: List[Tuple[str, str]] = []  # (case_id, point_id) awaiting embedding
+    prefetched: Deque[Tuple[str, Future]] = deque()
+    embedding: Deque[Tuple[List[Tuple[str, str]], Future]] = deque()
+    upserting: Deque[Tuple[Dict[str, int], Future]] = deque()
+    written: List[str] = []  # cases whose upserts are all acknowledged, awaiting the barrier
+
+    def case_done(case_id: str, indexed: bool = True) -> None:
+        diffs.pop(case_id, None)
+        remaining.pop(case_id, None)
+        progress.add(cases=1)
+        if indexed:
+            io_pool.submit(mark_case_indexed, case_id, CHUNKER_VERSION)
+        checkpoint.finished(case_id)
+
+    def commit_written() -> None:
+        """Barrier, then deletes/metadata of the written cases, then record them as done."""
+        nonlocal written
+        if not written:
+            return
+        batch, written = written, []
+        indexer.wait_for_writes()
+        updates = [(case_id, io_pool.submit(indexer.apply_metadata_and_deletes, diffs[case_id])) for case_id in batch]
+        for case_id, future in updates:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️ Could not update/delete points of case {case_id}: {e}", flush=True)
+                progress.add(failed=1)
+                checkpoint.failed.append(case_id)
+                case_done(case_id, indexed=False)
+                continue
+            stats = diffs[case_id].stats()
+            progress.add(updated=stats["updated"], deleted=stats["deleted"])
+            case_done(case_id)
+
+    def case_written(case_id: str) -> None:
+        remaining.pop(case_id, None)
+        written.append(case_id)
+        if len(written) >= args.barrier_every:
+            commit_written()
+
+    def finish_upsert() -> None:
+        per_case, future = upserting.popleft()
+        future.result()
+        for case_id, n in per_case.items():
+            progress.add(upserted=n)
+            remaining[case_id] -= n
+            if remaining[case_id] == 0:
+                case_written(case_id)
+
+    def queue_upserts(items: List[Tuple[str, str]], vectors: List[List[float]]) -> None:
+        for start in range(0, len(items), args.upsert_batch_size):
+            part = items[start:start + args.upsert_batch_size]
+            points, per_case = [], {}
+            for (case_id, pid), vector in zip(part, vectors[start:start + args.upsert_batch_size]):
+                points.extend(indexer.build_points(diffs[case_id], [pid], [vector]))
+                per_case[case_id] = per_case.get(case_id, 0) + 1
+            while len(upserting) >= args.upsert_workers * 2:
+                finish_upsert()
+            upserting.append((per_case, upsert_pool.submit(
+                indexer.qdrant.upsert, collection_name=indexer.COLLECTION, points=points, wait=False
+            )))
+
+    def finish_embedding() -> None:
+        items, future = embedding.popleft()
+        vectors, seconds = future.result()
+        texts = [diffs[case_id].wanted[pid] for case_id, pid in items]
+        cache.record_encoded(len(items), seconds)
+        cache.put_many(texts, vectors)
+        progress.add(embedded=len(items))
+        queue_upserts(items, vectors)
+
+    def flush(force: bool = False) -> None:
+        nonlocal buffer
+        while len(buffer) >= args.batch_size or (force and buffer):
+            batch, buffer = buffer[:args.batch_size], buffer[args.batch_size:]
+            texts = [diffs[case_id].wanted[pid] for case_id, pid in batch]
+            while len(embedding) >= args.embed_workers * 2:
+                finish_embedding()
+            embedding.append((batch, embed_pool.submit(_embed, texts, args.encode_batch_size)))
+
+    def take_prepared() -> None:
+        case_id, future = prefetched.popleft()
+        try:
+            diff = future.result()
+        except Exception as e:
+            print(f"⚠️ Skipping case {case_id}: {e}", flush=True)
+            progress.add(failed=1)
+            checkpoint.failed.append(case_id)
+            case_done(case_id, indexed=False)
+            return
+        progress.add(chunks=len(diff.wanted))
+        diffs[case_id] = diff
+        if not diff.new_ids:
+            case_written(case_id)
+            return
+        remaining[case_id] = len(diff.new_ids)
+        # Chunks seen before (in any case) come from the embedding cache
+        cached = cache.get_many([diff.wanted[pid] for pid in diff.new_ids])
+        hits = [(case_id, pid) for pid, vector in zip(diff.new_ids, cached) if vector is not None]
+        if hits:
+            progress.add(cached=len(hits))
+            queue_upserts(hits, [vector for vector in cached if vector is not None])
+        buffer.extend((case_id, pid) for pid, vector in zip(diff.new_ids, cached) if vector is None)
+        flush()
+
+    try:
+        for case in stream_cases():
+            checkpoint.started(case["_id"])
+            prefetched.append((case["_id"], io_pool.submit(prepare, case)))
+            if len(prefetched) >= args.prefetch:
+                take_prepared()
+            progress.maybe_report()
+        while prefetched:
+            take_prepared()
+            progress.maybe_report()
+        flush(force=True)
+        while embedding:
+            finish_embedding()
+            progress.maybe_report()
+        while upserting:
+            finish_upsert()
+            progress.maybe_report()
+        commit_written()
+    finally:
+        checkpoint.write()
+        embed_pool.shutdown(cancel_futures=True)
+        io_pool.shutdown(cancel_futures=True)
+        upsert_pool.shutdown()
+
+    progress.maybe_report(force=True)
+    print(f"Done. Last fully indexed case: {checkpoint.last}")
+
+
+if __name__ == "__main__":
+    main()
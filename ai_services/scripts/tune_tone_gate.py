@@ -0,0 +1,105 @@
+"""
+Offline tuning for the tone gate threshold (TONE_GATE_THRESHOLD).
+
+Input is JSONL, one message per line:
+
+    {"text": "Your LDL is slightly high ...", "needs_tone": false}
+
+`needs_tone` is the label: whether the tone LLM should rewrite the message.
+Unlabelled messages can be labelled by the tone LLM itself: it rewrites
+each one and the message counts as needing tone work when the rewrite
+differs by more than --change-threshold (difflib ratio). From ai_services/:
+
+    python scripts/tune_tone_gate.py samples.jsonl
+    python scripts/tune_tone_gate.py samples.jsonl --label-with-llm --write-labels labelled.jsonl
+
+Prints skip rate and false-skip rate (messages that needed tone work but
+would be skipped) for each threshold, and recommends the highest threshold
+whose false-skip rate stays within --max-false-skip.
+"""
+import argparse
+import difflib
+import json
+import os
+import sys
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.agents.tone_checker.tone_gate import score_tone  # noqa: E402
+
+
+def load_samples(path: str) -> List[Dict[str, object]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def label_with_llm(samples: List[Dict[str, object]], change_threshold: float) -> None:
+    from app.agents.tone_checker.tone_checker_agent import check_message_tone
+
+    for i, sample in enumerate(samples, 1):
+        if "needs_tone" in sample:
+            continue
+        toned = check_message_tone(sample["text"])
+        ratio = difflib.SequenceMatcher(None, sample["text"], toned).ratio()
+        sample["needs_tone"] = ratio < change_threshold
+        sample["llm_similarity"] = round(ratio, 4)
+        print(f"labelled {i}/{len(samples)} similarity={ratio:.3f}", file=sys.stderr)
+
+
+def sweep(samples: List[Dict[str, object]], step: float) -> List[Dict[str, float]]:
+    scored = [(score_tone(s["text"]).score, bool(s["needs_tone"])) for s in samples]
+    positives = sum(1 for _, needs in scored if needs) or 1
+    rows = []
+    steps = int(round(1 / step))
+    for i in range(steps + 1):
+        threshold = round(i * step, 4)
+        skipped = [needs for score, needs in scored if score < threshold]
+        rows.append({
+            "threshold": threshold,
+            "skip_rate": len(skipped) / len(scored),
+            "false_skip_rate": sum(1 for needs in skipped if needs) / positives,
+            "skipped": len(skipped),
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("samples", help="JSONL file with text (and needs_tone labels)")
+    parser.add_argument("--label-with-llm", action="store_true", help="label unlabelled samples with the tone LLM")
+    parser.add_argument("--change-threshold", type=float, default=0.85,
+                        help="LLM rewrite similarity below this means the message needed tone work")
+    parser.add_argument("--write-labels", help="write labelled samples to this JSONL file")
+    parser.add_argument("--max-false-skip", type=float, default=0.05)
+    parser.add_argument("--step", type=float, default=0.05)
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    if args.label_with_llm:
+        label_with_llm(samples, args.change_threshold)
+    unlabelled = [s for s in samples if "needs_tone" not in s]
+    if unlabelled:
+        parser.error(f"{len(unlabelled)} samples have no needs_tone label (use --label-with-llm)")
+
+    if args.write_labels:
+        with open(args.write_labels, "w", encoding="utf-8") as f:
+            for sample in samples:
+                f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+
+    rows = sweep(samples, args.step)
+    print(f"{len(samples)} samples, {sum(1 for s in samples if s['needs_tone'])} need tone work\n")
+    print(f"{'threshold':>9}  {'skip_rate':>9}  {'false_skip':>10}")
+    for row in rows:
+        print(f"{row['threshold']:>9.2f}  {row['skip_rate']:>9.1%}  {row['false_skip_rate']:>10.1%}")
+
+    eligible = [row for row in rows if row["false_skip_rate"] <= args.max_false_skip]
+    best = max(eligible, key=lambda row: row["threshold"])
+    print(
+        f"\nRecommended TONE_GATE_THRESHOLD={best['threshold']:.2f} "
+        f"(skips {best['skip_rate']:.1%} of tone calls, false skips {best['false_skip_rate']:.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
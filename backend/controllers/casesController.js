@@ -29,7 +29,15 @@ export const createCase = async (req, res) => {
     });
 
     const r = await ai.post("/ingest/process", form, {
-      headers: { ...form.getHeaders(), "X-User-Id": userId },
+      headers: {
+        ...form.getHeaders(),
+        "X-User-Id": userId,
+        // Lets the AI service size its post-ingest precomputation to the plan
+        "X-User-Plan": req.userPlan || "Free",
+        ...(req.planLimits && req.userUsage && Number.isFinite(req.planLimits.agents)
+          ? { "X-Agent-Budget": String(Math.max(0, req.planLimits.agents - req.userUsage.agentCalls)) }
+          : {}),
+      },
       validateStatus: () => true,
       timeout: 60_000,
     });